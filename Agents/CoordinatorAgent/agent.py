@@ -5,36 +5,56 @@ Uses Google ADK to create a coordinator agent that orchestrates the OIC error mo
 It coordinates MonitorErrorsAgent, ResubmitErrorsAgent, and RecoveryJobAgent using shared state.
 """
 
-from google.adk.agents import Agent
-import vertexai
 import os
 import sys
-import requests
-import json
-import logging
-import uuid
-from typing import Dict, Any, Optional, List
-from dotenv import load_dotenv
 from pathlib import Path
 
+from google.adk.agents import Agent
+
 # Add parent directory to path to import config if available
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
-# Load environment variables from Capstone root (central location)
-capstone_root = Path(__file__).parent.parent.parent.parent  # Go up to Capstone folder
-env_path = capstone_root / '.env'
-load_dotenv(dotenv_path=env_path)
-
-# Use service_account.json from Capstone root (central location)
-service_account_path = capstone_root / 'service_account.json'
-if service_account_path.exists():
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(service_account_path.absolute())
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.retry import invocation_budget
+from shared.runtime import init_vertexai_before_model
 
-# Initialize Vertex AI with credentials from environment variables
-vertexai.init(
-    project=os.environ.get("GOOGLE_CLOUD_PROJECT"),
-    location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
-)
+# Tool functions live in tools.py, which imports without google-adk / vertexai.
+# Vertex AI itself is initialised lazily on the first model call (before_model_callback).
+if __package__:
+    from .tools import (
+        monitor_errors,
+        monitor_errors_async,
+        monitor_errors_multi_env,
+        monitor_errors_multi_env_async,
+        resubmit_errors,
+        resubmit_errors_async,
+        triage_errors,
+        triage_errors_async,
+        get_recovery_job_status,
+        get_recovery_job_status_async,
+        wait_for_recovery_jobs,
+        wait_for_recovery_jobs_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
+else:
+    from tools import (
+        monitor_errors,
+        monitor_errors_async,
+        monitor_errors_multi_env,
+        monitor_errors_multi_env_async,
+        resubmit_errors,
+        resubmit_errors_async,
+        triage_errors,
+        triage_errors_async,
+        get_recovery_job_status,
+        get_recovery_job_status_async,
+        wait_for_recovery_jobs,
+        wait_for_recovery_jobs_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
 
 # Configure ADK logging
 try:
@@ -52,280 +72,14 @@ except ImportError:
     logger.info("Using basic logging (utility.logging_config not available)")
 
 
-# --- Helper Functions ---
-
-def get_shared_state() -> Dict[str, Any]:
-    """Read the shared state file."""
-    shared_state_path = Path(__file__).parent.parent / 'shared_state.json'
-    try:
-        if shared_state_path.exists():
-            with open(shared_state_path, 'r') as f:
-                return json.load(f)
-    except:
-        pass
-    return {}
-
-
-def update_shared_state(updates: Dict[str, Any]) -> None:
-    """Update the shared state file."""
-    shared_state_path = Path(__file__).parent.parent / 'shared_state.json'
-    state = get_shared_state()
-    state.update(updates)
-    try:
-        with open(shared_state_path, 'w') as f:
-            json.dump(state, f, indent=2)
-    except:
-        pass
-
-
-def _send_mcp_request(endpoint: str, mcp_message: Dict[str, Any]) -> Dict[str, Any]:
-    """Send MCP request and return parsed response."""
-    try:
-        response = requests.post(
-            endpoint,
-            json=mcp_message,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            },
-            stream=False,
-            timeout=60
-        )
-        response.raise_for_status()
-        
-        result = response.json()
-        if "result" in result and "content" in result["result"]:
-            for item in result["result"]["content"]:
-                if item.get("type") == "text":
-                    try:
-                        return json.loads(item.get("text", "{}"))
-                    except:
-                        return {"raw": item.get("text")}
-        return result
-        
-    except requests.exceptions.ConnectionError:
-        return {"isError": True, "error": f"Cannot connect to MCP server at {endpoint}"}
-    except Exception as e:
-        return {"isError": True, "error": str(e)}
-
-
-# --- Tool Definitions ---
-
-def monitor_errors(
-    environment: str = "qa3",
-    duration: str = "1h",
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Monitor and retrieve errored integration instances from OIC.
-    
-    Args:
-        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
-        duration: Time window (1h, 6h, 1d, 2d, 3d). Default: 1h
-        mcp_server_url: MCP server URL (optional)
-    
-    Returns:
-        JSON string with errored instances and count. Instance IDs are saved to shared state.
-    """
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    stream_endpoint = f"{mcp_server_url}/stream"
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringErroredInstances",
-            "arguments": {
-                "environment": environment,
-                "duration": duration
-            }
-        }
-    }
-    
-    result = _send_mcp_request(stream_endpoint, mcp_message)
-    
-    # Extract and save instance IDs to shared state
-    if not result.get("isError"):
-        instance_ids = []
-        items = result.get("items", [])
-        for item in items:
-            if "id" in item:
-                instance_ids.append(item["id"])
-            elif "instanceId" in item:
-                instance_ids.append(item["instanceId"])
-        
-        update_shared_state({
-            "last_errored_instance_ids": instance_ids,
-            "environment": environment,
-            "error_count": len(instance_ids)
-        })
-    
-    return json.dumps(result, indent=2)
-
-
-def resubmit_errors(
-    environment: str = "qa3",
-    instanceIds: Optional[List[str]] = None,
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Resubmit errored integration instances for recovery.
-    
-    Args:
-        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
-        instanceIds: List of instance IDs. If empty, uses IDs from shared state.
-        mcp_server_url: MCP server URL (optional)
-    
-    Returns:
-        JSON string with resubmission result and recovery job IDs.
-    """
-    # Load from shared state if no IDs provided
-    if not instanceIds:
-        state = get_shared_state()
-        instanceIds = state.get("last_errored_instance_ids", [])
-        if not environment or environment == "qa3":
-            environment = state.get("environment", "qa3")
-    
-    if not instanceIds:
-        return json.dumps({
-            "isError": True,
-            "error": "No instance IDs available. Run monitor_errors first."
-        }, indent=2)
-    
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    stream_endpoint = f"{mcp_server_url}/stream"
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringResubmitErroredInstances",
-            "arguments": {
-                "environment": environment,
-                "instanceIds": instanceIds
-            }
-        }
-    }
-    
-    result = _send_mcp_request(stream_endpoint, mcp_message)
-    
-    # Save resubmit results to shared state (bulk API response format)
-    if not result.get("isError"):
-        recovery_job_id = result.get("recoveryJobId")
-        update_shared_state({
-            "resubmit_result": {
-                "acceptedIds": result.get("acceptedIds", []),
-                "recoveryJobId": recovery_job_id,
-                "resubmitRequested": result.get("resubmitRequested", False),
-                "resubmittedInstancesCount": result.get("resubmittedInstancesCount", 0),
-                "resubmittedFailedInstances": result.get("resubmittedFailedInstances", []),
-            },
-            "last_recovery_job_ids": [recovery_job_id] if recovery_job_id else [],
-            "environment": environment
-        })
-    
-    return json.dumps(result, indent=2)
-
-
-def get_recovery_job_status(
-    environment: str = "qa3",
-    jobId: Optional[str] = None,
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Get the status of a recovery job.
-    
-    Args:
-        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
-        jobId: Recovery job ID. If empty, uses ID from shared state.
-        mcp_server_url: MCP server URL (optional)
-    
-    Returns:
-        JSON string with recovery job details and status.
-    """
-    # Load from shared state if no job ID provided
-    if not jobId:
-        state = get_shared_state()
-        job_ids = state.get("last_recovery_job_ids", [])
-        if job_ids:
-            jobId = job_ids[0]
-        if not environment or environment == "qa3":
-            environment = state.get("environment", "qa3")
-    
-    if not jobId:
-        return json.dumps({
-            "isError": True,
-            "error": "No job ID available. Run resubmit_errors first."
-        }, indent=2)
-    
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    stream_endpoint = f"{mcp_server_url}/stream"
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringErrorRecoveryJobDetails",
-            "arguments": {
-                "environment": environment,
-                "id": jobId
-            }
-        }
-    }
-    
-    result = _send_mcp_request(stream_endpoint, mcp_message)
-    return json.dumps(result, indent=2)
-
-
-def check_mcp_server_health(mcp_server_url: Optional[str] = None) -> Dict[str, Any]:
-    """Check if the OIC Monitor MCP server is running and healthy."""
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    health_endpoint = f"{mcp_server_url}/health"
-    
-    try:
-        response = requests.get(health_endpoint, timeout=5)
-        response.raise_for_status()
-        health_data = response.json()
-        
-        return {
-            "status": "healthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "health_check": health_data
-        }
-    except requests.exceptions.ConnectionError:
-        return {
-            "status": "unhealthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Error checking server health: {str(e)}"
-        }
-
-
 # Get agent model from environment or use default
 AGENT_MODEL = os.environ.get("AGENT_MODEL", "gemini-2.0-flash")
 
+# Deadline budget of one Coordinator invocation in seconds, 0 for none (see shared.retry):
+# every MCP call the invocation makes, retries and recovery waits included, shares it
+COORDINATOR_DEADLINE = float(os.environ.get("COORDINATOR_DEADLINE", 600))
+open_deadline_budget, close_deadline_budget = invocation_budget(COORDINATOR_DEADLINE)
+
 # Create the Coordinator Agent
 root_agent = Agent(
     name="CoordinatorAgent",
@@ -335,32 +89,59 @@ root_agent = Agent(
     You are the Coordinator Agent responsible for orchestrating the OIC error monitoring and recovery workflow.
     
     **Available Tools:**
-    1. monitor_errors - Find errored instances (saves instance IDs to shared state)
-    2. resubmit_errors - Bulk resubmit errors (max 50 IDs per call, uses IDs from state, saves recovery job ID)
-    3. get_recovery_job_status - Check recovery job status (uses job ID from state)
-    4. check_mcp_server_health - Verify MCP server is running
+    1. monitor_errors_async - Find errored instances (saves instance IDs to shared state)
+    1a. monitor_errors_multi_env_async - Find errored instances in several (default: all) environments in one call
+    2. resubmit_errors_async - Bulk resubmit errors (any number of IDs, sent in batches of 50, uses IDs from state, saves recovery job IDs)
+    2a. triage_errors_async - Find errors and resubmit, discard or escalate each one by the triage rules
+    3. get_recovery_job_status_async - Check recovery job status once (uses every job ID from state)
+    4. wait_for_recovery_jobs_async - Wait until every recovery job finishes (polls all jobs concurrently)
+    5. check_mcp_server_health_async - Verify MCP server is running
+    
+    **Checking several environments:**
+    For requests like "check all environments", call monitor_errors_multi_env_async once with
+    environments (e.g. ['dev', 'prod1']; omit for all four) instead of calling monitor_errors_async
+    per environment. Items are tagged with "environment"; report per-environment counts from
+    "environments" and list every environment in "failed" with its error (partialFailure: true).
+    To resubmit errors found by this scan, call resubmit_errors_async once per environment with
+    that environment.
+    
+    **Triage:**
+    When the user asks to triage errors (or to resubmit only what is worth resubmitting), call
+    triage_errors_async with environment and duration instead of steps 1 and 2 below; use
+    dryRun=true to only show what would happen. Report "counts" (resubmit/discard/escalate),
+    "ruleCounts", the recovery job IDs from "resubmit", the discarded IDs from "discard" and
+    every escalated instance (id, integration, errorCode, rule), then continue with step 3.
     
     **Workflow for "find errors and resubmit":**
     
-    1. Call monitor_errors with environment and duration
+    1. Call monitor_errors_async with environment and duration
        - Returns list of errored instances with their flow IDs
        - Automatically saves instance IDs to shared state
+       - If the response has "truncated": true, use "summary" for totals and call the tool again
+         with cursor = moreAvailable.cursor when the user needs the remaining instances
+         (every instance ID is still saved for resubmission)
        
-    2. If errors found, call resubmit_errors with environment
-       - Uses instance IDs from shared state automatically (max 50 per request)
-       - Returns bulk resubmit response with recoveryJobId
-       - Saves recovery job ID to shared state
+    2. If errors found, call resubmit_errors_async with environment
+       - Uses instance IDs from shared state automatically and splits them into batches of 50
+       - Returns one merged bulk resubmit response with every recoveryJobId
+       - Saves all recovery job IDs to shared state
        
-    3. Call get_recovery_job_status to check the recovery job
-       - Uses job ID from shared state automatically
-       - Returns job status and details
+    3. Call wait_for_recovery_jobs_async to wait for the recovery jobs
+       - Uses every recovery job ID from shared state automatically
+       - Polls all jobs concurrently with backoff until they finish or timeoutSeconds passes
+       - Returns each job's status and details plus statusCounts and allDone
+       - Use get_recovery_job_status_async instead for a single immediate status check
     
     **Bulk Resubmit Response Format:**
     - acceptedIds: List of accepted instance IDs
-    - recoveryJobId: The recovery job ID for tracking
+    - recoveryJobId: The first recovery job ID for tracking
+    - recoveryJobIds: All recovery job IDs (one per batch of 50)
     - resubmitRequested: Boolean indicating request was accepted
     - resubmittedInstancesCount: Number of instances resubmitted
     - resubmittedFailedInstances: List of any failed instances
+    - failedBatches: Batches whose request failed (only present on partial failure)
+    - skippedIds: IDs not resubmitted because they were resubmitted within the cool-down
+      (their earlier jobs are in skippedRecoveryJobIds; only present if any were skipped)
     
     **Output Format (plain text, NOT HTML):**
     
@@ -372,22 +153,29 @@ root_agent = Agent(
     
     **Step 2: Resubmit Errors (Bulk)**
     - Accepted IDs: [count]
-    - Recovery Job ID: [recoveryJobId]
+    - Recovery Job IDs: [recoveryJobIds]
     - Resubmitted Count: [count]
     
     **Step 3: Recovery Job Status**
-    - Job ID: [recoveryJobId]
-    - Status: [COMPLETED/IN_PROGRESS/FAILED]
+    - Job IDs: [recoveryJobIds]
+    - Status per job: [COMPLETED/IN_PROGRESS/FAILED]
     - Success Count: [X]
     - Failed Count: [Y]
+    - All Jobs Done: [allDone]
     
     If any MCP tool call returns an error, return the exact error message to the user.
     """,
+    before_agent_callback=open_deadline_budget,
+    after_agent_callback=close_deadline_budget,
+    before_model_callback=init_vertexai_before_model,
     tools=[
-        monitor_errors,
-        resubmit_errors,
-        get_recovery_job_status,
-        check_mcp_server_health
+        monitor_errors_async,
+        monitor_errors_multi_env_async,
+        resubmit_errors_async,
+        triage_errors_async,
+        get_recovery_job_status_async,
+        wait_for_recovery_jobs_async,
+        check_mcp_server_health_async
     ]
 )
 
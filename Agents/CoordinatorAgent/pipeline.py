@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+CoordinatorAgent Pipeline
+
+Runs the Coordinator's fixed workflow without a model:
+
+    1. Monitor errors      monitoringErroredInstances for the environment and duration
+    2. Resubmit errors     every errored instance, in API-sized batches (only if errors were found)
+    3. Recovery job status wait for the recovery jobs of step 2 (or check them once)
+
+Each step uses the same helpers as the Coordinator tools (tools.py) and updates shared
+state the same way, so the agent can still answer follow-up questions about a run.
+The whole run shares one deadline budget (see shared.retry): MCP calls are retried on
+transient failures only while the budget lasts, the recovery wait is cut to what is
+left, and calls after the deadline fail fast.
+Scheduled runs need no Gemini round-trip per step; the LLM agent is only needed for
+free-form questions. The report has the Step 1/2/3 format of the agent's instruction,
+and stops at the first step that returns an error, reporting the exact error message.
+
+Configuration (defaults for the command line options):
+
+    PIPELINE_ENVIRONMENTS       Comma separated environments, or "all" (default: qa3)
+    PIPELINE_DURATION           Time window (default: 1h)
+    PIPELINE_WAIT_TIMEOUT       Seconds to wait for recovery jobs; 0 checks them once (default: 300)
+    PIPELINE_DEADLINE           Deadline budget of one environment's run in seconds; 0 for
+                                none (default: 600)
+    MCP_RESUBMIT_BATCH_SIZE     Instance IDs per resubmit call (default: 50)
+    MCP_RESUBMIT_CONCURRENCY    Resubmit calls in flight (default: 4)
+
+Usage:
+    python pipeline.py                                   # qa3, last hour
+    python pipeline.py --environment prod1 --environment prod3 --duration 6h
+    python pipeline.py --environment all --no-resubmit   # Report errors only
+    python pipeline.py --batch-size 25 --concurrency 2 --wait-timeout 0 --json
+    python pipeline.py --deadline 120                    # Give up on a run after two minutes
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+if __package__:
+    from .tools import _save_errored_instances
+else:
+    from tools import _save_errored_instances
+
+from shared.fanout import resolve_environments
+from shared.mcp_client import get_mcp_client
+from shared.mcp_async_client import get_async_mcp_client
+from shared.recovery_watcher import job_status, watch_recovery_jobs, watch_recovery_jobs_async
+from shared.resubmit import resubmit_in_batches, resubmit_in_batches_async, save_resubmit_result
+from shared.retry import deadline_budget, remaining_budget
+
+MONITOR_TOOL = "monitoringErroredInstances"
+DEFAULT_DEADLINE = 600.0
+
+
+def _wait_budget(wait_timeout: float) -> float:
+    """The recovery wait, cut to what is left of the run's deadline budget."""
+    remaining = remaining_budget()
+    return wait_timeout if remaining is None else max(0.0, min(wait_timeout, remaining))
+
+
+def _new_report(environment: str, duration: str) -> Dict[str, Any]:
+    return {
+        "environment": environment,
+        "duration": duration,
+        "monitor": None,
+        "resubmit": None,
+        "recovery": None,
+        "error": None,
+    }
+
+
+def _monitor_step(report: Dict[str, Any], result: Dict[str, Any]) -> List[str]:
+    if result.get("isError"):
+        report["error"] = result.get("error", "monitoringErroredInstances failed")
+        return []
+    instance_ids = _save_errored_instances(result, report["environment"])
+    report["monitor"] = {"errorsFound": len(instance_ids), "instanceIds": instance_ids}
+    return instance_ids
+
+
+def _resubmit_step(report: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, str]:
+    """Record the bulk resubmit result; returns the recovery jobs to watch ({jobId: environment})."""
+    if result.get("isError"):
+        report["error"] = result.get("error", "monitoringResubmitErroredInstances failed")
+        return {}
+    save_resubmit_result(result, report["environment"])
+    report["resubmit"] = {
+        "acceptedIds": result.get("acceptedIds", []),
+        "recoveryJobIds": result.get("recoveryJobIds", []),
+        "resubmittedInstancesCount": result.get("resubmittedInstancesCount", 0),
+        "resubmittedFailedInstances": result.get("resubmittedFailedInstances", []),
+        "failedBatches": result.get("failedBatches", []),
+        "skippedIds": result.get("skippedIds", []),
+    }
+    return {job_id: report["environment"] for job_id in report["resubmit"]["recoveryJobIds"]}
+
+
+def _recovery_step(report: Dict[str, Any], summary: Dict[str, Any]) -> None:
+    jobs = {}
+    success_count = failed_count = 0
+    for job_id, details in summary.get("jobs", {}).items():
+        jobs[job_id] = "ERROR_POLLING" if details.get("isError") else (job_status(details) or "UNKNOWN")
+        success_count += details.get("successCount", 0) or 0
+        failed_count += details.get("failedCount", 0) or 0
+    report["recovery"] = {
+        "jobs": jobs,
+        "successCount": success_count,
+        "failedCount": failed_count,
+        "allDone": summary.get("allDone", False),
+        "timedOut": summary.get("timedOut", False),
+        "elapsedSeconds": summary.get("elapsedSeconds"),
+    }
+
+
+def run_pipeline(
+    environment: str = "qa3",
+    duration: str = "1h",
+    resubmit: bool = True,
+    wait_timeout: float = 300.0,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    mcp_server_url: Optional[str] = None,
+    deadline: Optional[float] = DEFAULT_DEADLINE
+) -> Dict[str, Any]:
+    """Run monitor -> resubmit -> recovery job status for one environment; returns the report."""
+    start = time.perf_counter()
+    report = _new_report(environment, duration)
+    client = get_mcp_client(mcp_server_url)
+
+    with deadline_budget(deadline):
+        result = client.call_tool(MONITOR_TOOL, {"environment": environment, "duration": duration})
+        instance_ids = _monitor_step(report, result)
+        if instance_ids and resubmit:
+            jobs = _resubmit_step(report, resubmit_in_batches(client, environment, instance_ids, batch_size, concurrency))
+            if jobs:
+                _recovery_step(report, watch_recovery_jobs(client, jobs, timeout=_wait_budget(wait_timeout)))
+
+    report["elapsedSeconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+async def run_pipeline_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    resubmit: bool = True,
+    wait_timeout: float = 300.0,
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    mcp_server_url: Optional[str] = None,
+    deadline: Optional[float] = DEFAULT_DEADLINE
+) -> Dict[str, Any]:
+    """Run monitor -> resubmit -> recovery job status for one environment; returns the report."""
+    start = time.perf_counter()
+    report = _new_report(environment, duration)
+    client = get_async_mcp_client(mcp_server_url)
+
+    with deadline_budget(deadline):
+        result = await client.call_tool(MONITOR_TOOL, {"environment": environment, "duration": duration})
+        instance_ids = _monitor_step(report, result)
+        if instance_ids and resubmit:
+            result = await resubmit_in_batches_async(client, environment, instance_ids, batch_size, concurrency)
+            jobs = _resubmit_step(report, result)
+            if jobs:
+                _recovery_step(report, await watch_recovery_jobs_async(client, jobs, timeout=_wait_budget(wait_timeout)))
+
+    report["elapsedSeconds"] = round(time.perf_counter() - start, 2)
+    return report
+
+
+def _list(values: List[Any]) -> str:
+    return "[" + ", ".join(str(value) for value in values) + "]"
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Plain-text report in the Output Format of the Coordinator's instruction."""
+    lines = [
+        "**Step 1: Monitor Errors**",
+        f"- Environment: {report['environment']}",
+        f"- Time Window: {report['duration']}",
+    ]
+    monitor = report.get("monitor")
+    if monitor is not None:
+        lines.append(f"- Errors Found: {monitor['errorsFound']}")
+        lines.append(f"- Instance IDs: {_list(monitor['instanceIds'])}")
+
+    resubmit = report.get("resubmit")
+    if resubmit is not None:
+        lines += [
+            "",
+            "**Step 2: Resubmit Errors (Bulk)**",
+            f"- Accepted IDs: {len(resubmit['acceptedIds'])}",
+            f"- Recovery Job IDs: {_list(resubmit['recoveryJobIds'])}",
+            f"- Resubmitted Count: {resubmit['resubmittedInstancesCount']}",
+        ]
+        if resubmit["skippedIds"]:
+            lines.append(f"- Skipped (resubmitted within cool-down): {len(resubmit['skippedIds'])}")
+        if resubmit["resubmittedFailedInstances"]:
+            lines.append(f"- Failed Instances: {_list(resubmit['resubmittedFailedInstances'])}")
+        for batch in resubmit["failedBatches"]:
+            lines.append(f"- Failed Batch ({len(batch['instanceIds'])} IDs): {batch.get('error')}")
+
+    recovery = report.get("recovery")
+    if recovery is not None:
+        lines += [
+            "",
+            "**Step 3: Recovery Job Status**",
+            f"- Job IDs: {_list(list(recovery['jobs']))}",
+            "- Status per job: " + ", ".join(f"{job_id}: {status}" for job_id, status in recovery["jobs"].items()),
+            f"- Success Count: {recovery['successCount']}",
+            f"- Failed Count: {recovery['failedCount']}",
+            f"- All Jobs Done: {recovery['allDone']}",
+        ]
+        if recovery["timedOut"]:
+            lines.append(f"- Timed Out: waited {recovery['elapsedSeconds']}s")
+
+    if report.get("error"):
+        lines += ["", f"Error: {report['error']}"]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Coordinator workflow without the LLM")
+    parser.add_argument("--environment", "-e", action="append",
+                        help="OIC environment (repeatable, or 'all'; default: PIPELINE_ENVIRONMENTS or qa3)")
+    parser.add_argument("--duration", "-d", default=os.environ.get("PIPELINE_DURATION", "1h"),
+                        help="Time window: 1h, 6h, 1d, 2d, 3d")
+    parser.add_argument("--batch-size", type=int, help="Instance IDs per resubmit call (max 50)")
+    parser.add_argument("--concurrency", type=int, help="Resubmit calls in flight")
+    parser.add_argument("--wait-timeout", type=float, default=float(os.environ.get("PIPELINE_WAIT_TIMEOUT", 300)),
+                        help="Seconds to wait for recovery jobs; 0 checks them once")
+    parser.add_argument("--deadline", type=float,
+                        default=float(os.environ.get("PIPELINE_DEADLINE", DEFAULT_DEADLINE)),
+                        help="Deadline budget of each environment's run in seconds; 0 for none")
+    parser.add_argument("--no-resubmit", action="store_true", help="Only report errors (step 1)")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Use the async MCP client")
+    parser.add_argument("--json", action="store_true", help="Print the reports as JSON")
+    parser.add_argument("--url", help="MCP server URL (default: MCP_SERVER_URL)")
+    args = parser.parse_args()
+
+    environments = resolve_environments(args.environment or os.environ.get("PIPELINE_ENVIRONMENTS", "qa3"))
+    options = {
+        "duration": args.duration,
+        "resubmit": not args.no_resubmit,
+        "wait_timeout": args.wait_timeout,
+        "batch_size": args.batch_size,
+        "concurrency": args.concurrency,
+        "mcp_server_url": args.url,
+        "deadline": args.deadline,
+    }
+
+    if args.use_async:
+        async def run_all() -> List[Dict[str, Any]]:
+            from shared.mcp_async_client import close_async_mcp_clients
+            try:
+                return [await run_pipeline_async(environment, **options) for environment in environments]
+            finally:
+                await close_async_mcp_clients()
+        reports = asyncio.run(run_all())
+    else:
+        reports = [run_pipeline(environment, **options) for environment in environments]
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+    else:
+        print("\n\n".join(format_report(report) for report in reports))
+    sys.exit(1 if any(report["error"] for report in reports) else 0)
+
+
+if __name__ == "__main__":
+    main()
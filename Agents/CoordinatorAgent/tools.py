@@ -0,0 +1,361 @@
+"""
+CoordinatorAgent Tools
+
+Monitor, triage, resubmit and recovery job tools of CoordinatorAgent (layout:
+shared.runtime). The async twins read and save shared state (SQLite) in a worker thread,
+off the event loop.
+
+With TRACING_ENABLED=true every tool runs in a trace span, with its MCP calls as child
+spans (see shared.tracing).
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.fanout import errored_ids_by_environment, fan_out, fan_out_async, resolve_errored_ids, save_errored_ids
+from shared.mcp_client import get_mcp_client, check_mcp_server_health
+from shared.mcp_async_client import get_async_mcp_client, check_mcp_server_health_async
+from shared.projection import render_tool_output
+from shared.recovery_watcher import resolve_recovery_jobs, watch_recovery_jobs, watch_recovery_jobs_async
+from shared.resubmit import resubmit_in_batches, resubmit_in_batches_async, save_resubmit_result
+from shared.retry import budget_timeout, remaining_budget
+from shared.state_store import get_shared_state, update_shared_state
+from shared.tracing import traced
+from shared.triage import triage, triage_async
+from shared.runtime import async_twin, load_environment
+
+# Load environment variables (MCP_SERVER_URL, ...) from Capstone root (central location)
+load_environment()
+
+ERRORED_TOOL = "monitoringErroredInstances"
+DETAILS_TOOL = "monitoringErrorRecoveryJobDetails"
+
+NO_IDS_ERROR = json.dumps({
+    "isError": True,
+    "error": "No instance IDs available. Run monitor_errors first."
+}, indent=2)
+NO_JOBS_ERROR = json.dumps({
+    "isError": True,
+    "error": "No job ID available. Run resubmit_errors first."
+}, indent=2)
+
+
+# --- Tool Definitions ---
+
+def _save_errored_instances(result: Dict[str, Any], environment: str) -> List[str]:
+    """Extract and save instance IDs to shared state; returns the IDs."""
+    if result.get("isError"):
+        return []
+    instance_ids = []
+    items = result.get("items", [])
+    for item in items:
+        if "id" in item:
+            instance_ids.append(item["id"])
+        elif "instanceId" in item:
+            instance_ids.append(item["instanceId"])
+    
+    update_shared_state({
+        "last_errored_instance_ids": instance_ids,
+        "environment": environment,
+        "error_count": len(instance_ids)
+    })
+    save_errored_ids({environment: instance_ids})
+    return instance_ids
+
+
+def _wait_budget(timeout: float) -> float:
+    """A recovery wait, cut to what is left of the invocation's deadline budget."""
+    return max(0.0, budget_timeout(timeout, remaining_budget()))
+
+
+def _resolve_resubmit_args(environment: str, instanceIds: Optional[List[str]]):
+    """Load the environment's instance IDs from shared state if none were provided."""
+    if not instanceIds:
+        return resolve_errored_ids(get_shared_state(), environment)
+    return environment, instanceIds
+
+
+def _errored_args(environment: str, duration: str) -> Dict[str, Any]:
+    return {"environment": environment, "duration": duration}
+
+
+def _errored_output(result: Dict[str, Any], environment: str, cursor: Optional[str]) -> str:
+    _save_errored_instances(result, environment)
+    return render_tool_output(result, "errored_instances", cursor)
+
+
+def _multi_env_output(result: Dict[str, Any], cursor: Optional[str]) -> str:
+    if not result.get("isError"):
+        save_errored_ids(errored_ids_by_environment(result))
+    return render_tool_output(result, "errored_instances", cursor)
+
+
+def _resubmit_output(result: Dict[str, Any], environment: str) -> str:
+    save_resubmit_result(result, environment)
+    return render_tool_output(result)
+
+
+def _save_triage_result(result: Dict[str, Any], environment: str) -> None:
+    """Save the recovery job IDs of the triage's resubmission to shared state."""
+    resubmitted = result.get("resubmit")
+    if resubmitted and not resubmitted.get("isError"):
+        save_resubmit_result(resubmitted, environment)
+
+
+def _triage_output(result: Dict[str, Any], environment: str) -> str:
+    _save_triage_result(result, environment)
+    return render_tool_output(result)
+
+
+@traced
+def monitor_errors(
+    environment: str = "qa3",
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Monitor and retrieve errored integration instances from OIC.
+    
+    Args:
+        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
+        duration: Time window (1h, 6h, 1d, 2d, 3d). Default: 1h
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: MCP server URL (optional)
+    
+    Returns:
+        JSON string with errored instances and count. Instance IDs are saved to shared state.
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return _errored_output(result, environment, cursor)
+
+
+@traced
+@async_twin(monitor_errors)
+async def monitor_errors_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return await asyncio.to_thread(_errored_output, result, environment, cursor)
+
+
+@traced
+def monitor_errors_multi_env(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Monitor errored integration instances in several OIC environments at once (queried concurrently).
+    
+    Args:
+        environments: OIC environments to query, e.g. ['dev', 'prod1']. Default: all ('dev', 'qa3', 'prod1', 'prod3')
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d'. Default: '1h'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with every errored instance tagged by environment, per-environment counts,
+        and the environments that failed (partialFailure).
+    """
+    result = fan_out(get_mcp_client(mcp_server_url), ERRORED_TOOL, environments, {"duration": duration})
+    return _multi_env_output(result, cursor)
+
+
+@traced
+@async_twin(monitor_errors_multi_env)
+async def monitor_errors_multi_env_async(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await fan_out_async(
+        get_async_mcp_client(mcp_server_url), ERRORED_TOOL, environments, {"duration": duration}
+    )
+    return await asyncio.to_thread(_multi_env_output, result, cursor)
+
+
+@traced
+def resubmit_errors(
+    environment: str = "qa3",
+    instanceIds: Optional[List[str]] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Resubmit errored integration instances for recovery.
+    
+    Args:
+        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
+        instanceIds: List of instance IDs (any number; sent in batches of 50). If empty, uses IDs from shared state.
+        mcp_server_url: MCP server URL (optional)
+    
+    Returns:
+        JSON string with resubmission result and recovery job IDs.
+    """
+    environment, instanceIds = _resolve_resubmit_args(environment, instanceIds)
+    if not instanceIds:
+        return NO_IDS_ERROR
+    result = resubmit_in_batches(get_mcp_client(mcp_server_url), environment, instanceIds)
+    return _resubmit_output(result, environment)
+
+
+@traced
+@async_twin(resubmit_errors)
+async def resubmit_errors_async(
+    environment: str = "qa3",
+    instanceIds: Optional[List[str]] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    environment, instanceIds = await asyncio.to_thread(_resolve_resubmit_args, environment, instanceIds)
+    if not instanceIds:
+        return NO_IDS_ERROR
+    result = await resubmit_in_batches_async(get_async_mcp_client(mcp_server_url), environment, instanceIds)
+    return await asyncio.to_thread(_resubmit_output, result, environment)
+
+
+@traced
+def triage_errors(
+    environment: str = "qa3",
+    duration: str = "1h",
+    dryRun: bool = False,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Find errored instances and resubmit, discard or escalate each one by the triage rules.
+    
+    Args:
+        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
+        duration: Time window (1h, 6h, 1d, 2d, 3d). Default: 1h
+        dryRun: Only classify the instances, do not resubmit or discard anything. Default: False
+        mcp_server_url: MCP server URL (optional)
+    
+    Returns:
+        JSON string with counts per action and rule, the resubmit and discard results,
+        and the escalated instances. Recovery job IDs are saved to shared state.
+    """
+    client = get_mcp_client(mcp_server_url)
+    found = client.call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    if found.get("isError"):
+        return render_tool_output(found)
+    _save_errored_instances(found, environment)
+
+    result = triage(client, environment, found.get("items", []), dry_run=dryRun)
+    return _triage_output(result, environment)
+
+
+@traced
+@async_twin(triage_errors)
+async def triage_errors_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    dryRun: bool = False,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    client = get_async_mcp_client(mcp_server_url)
+    found = await client.call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    if found.get("isError"):
+        return render_tool_output(found)
+    await asyncio.to_thread(_save_errored_instances, found, environment)
+
+    result = await triage_async(client, environment, found.get("items", []), dry_run=dryRun)
+    return await asyncio.to_thread(_triage_output, result, environment)
+
+
+@traced
+def get_recovery_job_status(
+    environment: str = "qa3",
+    jobId: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Get the status of a recovery job.
+    
+    Args:
+        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
+        jobId: Recovery job ID. If empty, checks every recovery job from shared state concurrently.
+        mcp_server_url: MCP server URL (optional)
+    
+    Returns:
+        JSON string with recovery job details and status.
+    """
+    client = get_mcp_client(mcp_server_url)
+    if jobId:
+        return render_tool_output(client.call_tool(DETAILS_TOOL, {"environment": environment, "id": jobId}))
+
+    jobs = resolve_recovery_jobs(environment)
+    if not jobs:
+        return NO_JOBS_ERROR
+    return render_tool_output(watch_recovery_jobs(client, jobs))
+
+
+@traced
+@async_twin(get_recovery_job_status)
+async def get_recovery_job_status_async(
+    environment: str = "qa3",
+    jobId: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    client = get_async_mcp_client(mcp_server_url)
+    if jobId:
+        return render_tool_output(await client.call_tool(DETAILS_TOOL, {"environment": environment, "id": jobId}))
+
+    jobs = await asyncio.to_thread(resolve_recovery_jobs, environment)
+    if not jobs:
+        return NO_JOBS_ERROR
+    return render_tool_output(await watch_recovery_jobs_async(client, jobs))
+
+
+@traced
+def wait_for_recovery_jobs(
+    environment: str = "qa3",
+    jobIds: Optional[List[str]] = None,
+    timeoutSeconds: int = 300,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Wait until all recovery jobs reach a terminal status or the deadline passes.
+    
+    Polls every job concurrently with exponential backoff and jitter, and stops
+    polling each job once it is COMPLETED/FAILED/ABORTED.
+    
+    Args:
+        environment: OIC environment (dev, qa3, prod1, prod3). Default: qa3
+        jobIds: Recovery job IDs. If empty, uses every open recovery job from shared state.
+        timeoutSeconds: Maximum time to wait in seconds, capped to the invocation's deadline budget. Default: 300
+        mcp_server_url: MCP server URL (optional)
+    
+    Returns:
+        JSON string with every job's final details, status counts, and whether all jobs finished.
+    """
+    jobs = resolve_recovery_jobs(environment, jobIds)
+    if not jobs:
+        return NO_JOBS_ERROR
+    summary = watch_recovery_jobs(get_mcp_client(mcp_server_url), jobs, timeout=_wait_budget(timeoutSeconds))
+    return render_tool_output(summary)
+
+
+@traced
+@async_twin(wait_for_recovery_jobs)
+async def wait_for_recovery_jobs_async(
+    environment: str = "qa3",
+    jobIds: Optional[List[str]] = None,
+    timeoutSeconds: int = 300,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    jobs = await asyncio.to_thread(resolve_recovery_jobs, environment, jobIds)
+    if not jobs:
+        return NO_JOBS_ERROR
+    summary = await watch_recovery_jobs_async(
+        get_async_mcp_client(mcp_server_url), jobs, timeout=_wait_budget(timeoutSeconds)
+    )
+    return render_tool_output(summary)
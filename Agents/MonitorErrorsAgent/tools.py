@@ -0,0 +1,180 @@
+"""
+MonitorErrorsAgent Tools
+
+Errored instance tools of MonitorErrorsAgent (layout: shared.runtime). The async twins
+save to shared state (SQLite) in a worker thread, off the event loop.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Dict, Any, Optional, List
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.error_clusters import cluster_errors
+from shared.fanout import errored_ids_by_environment, fan_out, fan_out_async, save_errored_ids
+from shared.mcp_client import get_mcp_client, check_mcp_server_health
+from shared.mcp_async_client import get_async_mcp_client, check_mcp_server_health_async
+from shared.projection import render_tool_output
+from shared.state_store import update_shared_state
+from shared.runtime import async_twin, load_environment
+
+# Load environment variables (MCP_SERVER_URL, ...) from Capstone root (central location)
+load_environment()
+
+ERRORED_TOOL = "monitoringErroredInstances"
+
+
+def _save_errored_instances(result: Dict[str, Any], environment: str) -> None:
+    """Save instance IDs to shared state for other agents."""
+    if result.get("isError"):
+        return
+    instance_ids = []
+    items = result.get("items", [])
+    for inst in items:
+        if "id" in inst:
+            instance_ids.append(inst["id"])
+        elif "instanceId" in inst:
+            instance_ids.append(inst["instanceId"])
+    
+    if instance_ids:
+        update_shared_state({
+            "last_errored_instance_ids": instance_ids,
+            "environment": environment
+        })
+    save_errored_ids({environment: instance_ids})
+
+
+def _errored_args(environment: str, duration: str) -> Dict[str, Any]:
+    return {"environment": environment, "duration": duration}
+
+
+def _errored_output(result: Dict[str, Any], environment: str, cursor: Optional[str]) -> str:
+    _save_errored_instances(result, environment)
+    return render_tool_output(result, "errored_instances", cursor)
+
+
+def _multi_env_output(result: Dict[str, Any], cursor: Optional[str]) -> str:
+    if not result.get("isError"):
+        save_errored_ids(errored_ids_by_environment(result))
+    return render_tool_output(result, "errored_instances", cursor)
+
+
+def _clusters_output(result: Dict[str, Any], environment: str, maxExamples: int, cursor: Optional[str]) -> str:
+    if result.get("isError"):
+        return render_tool_output(result)
+    _save_errored_instances(result, environment)
+    clusters = cluster_errors(result.get("items", []), max_examples=maxExamples)
+    clusters["environment"] = environment
+    return render_tool_output(clusters, "error_clusters", cursor)
+
+
+def call_mcp_monitoring_errored_instances(
+    environment: str = "qa3",
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Call the MCP server's monitoringErroredInstances tool to retrieve errored integration instances.
+    
+    Args:
+        environment: OIC environment to query. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d'. Default: '1h'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with errored integration instances information
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return _errored_output(result, environment, cursor)
+
+
+@async_twin(call_mcp_monitoring_errored_instances)
+async def call_mcp_monitoring_errored_instances_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return await asyncio.to_thread(_errored_output, result, environment, cursor)
+
+
+def call_mcp_monitoring_errored_instances_multi_env(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Retrieve errored integration instances from several OIC environments at once (queried concurrently).
+    
+    Args:
+        environments: OIC environments to query, e.g. ['dev', 'prod1']. Default: all ('dev', 'qa3', 'prod1', 'prod3')
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d'. Default: '1h'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with every errored instance tagged by environment, per-environment counts,
+        and the environments that failed (partialFailure).
+    """
+    result = fan_out(get_mcp_client(mcp_server_url), ERRORED_TOOL, environments, {"duration": duration})
+    return _multi_env_output(result, cursor)
+
+
+@async_twin(call_mcp_monitoring_errored_instances_multi_env)
+async def call_mcp_monitoring_errored_instances_multi_env_async(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await fan_out_async(
+        get_async_mcp_client(mcp_server_url), ERRORED_TOOL, environments, {"duration": duration}
+    )
+    return await asyncio.to_thread(_multi_env_output, result, cursor)
+
+
+def find_error_clusters(
+    environment: str = "qa3",
+    duration: str = "1h",
+    maxExamples: int = 3,
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Group errored integration instances by root cause instead of listing them one by one.
+    
+    Error messages are normalised (IDs, timestamps and numbers removed) into fingerprints,
+    and instances are grouped by (integration, errorCode, fingerprint).
+    
+    Args:
+        environment: OIC environment to query. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d', 'RETENTIONPERIOD'. Default: '1h'
+        maxExamples: Example instance IDs per cluster. Default: 3
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with totalInstances, clusterCount and the clusters (largest first), each with
+        integration, errorCode, pattern, count, recoverable count, firstSeen, lastSeen and exampleIds.
+        All instance IDs are saved to shared state.
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return _clusters_output(result, environment, maxExamples, cursor)
+
+
+@async_twin(find_error_clusters)
+async def find_error_clusters_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    maxExamples: int = 3,
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(ERRORED_TOOL, _errored_args(environment, duration))
+    return await asyncio.to_thread(_clusters_output, result, environment, maxExamples, cursor)
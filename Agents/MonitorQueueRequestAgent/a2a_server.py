@@ -42,6 +42,10 @@ A2A_PORT = int(os.environ.get("MONITOR_QUEUE_A2A_PORT", "10003"))
 print(f"🚀 Starting MonitorQueueRequestAgent A2A Server on port {A2A_PORT}")
 a2a_app = to_a2a(root_agent, port=A2A_PORT)
 
+# Prometheus metrics for this agent's MCP calls at /metrics
+from shared.metrics import mount_metrics
+mount_metrics(a2a_app, "MonitorQueueRequestAgent")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(a2a_app, host="0.0.0.0", port=A2A_PORT)
@@ -5,36 +5,43 @@ Uses Google ADK to create an agent that monitors integration instances in the qu
 by calling the monitoringInstances tool from the OIC Monitor MCP server.
 """
 
-from google.adk.agents import Agent
-import vertexai
 import os
 import sys
-import requests
-import json
-import logging
-import uuid
-from typing import Dict, Any, Optional
-from dotenv import load_dotenv
 from pathlib import Path
 
+from google.adk.agents import Agent
+
 # Add parent directory to path to import config if available
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
-# Load environment variables from Capstone root (central location)
-capstone_root = Path(__file__).parent.parent.parent.parent  # Go up to Capstone folder
-env_path = capstone_root / '.env'
-load_dotenv(dotenv_path=env_path)
-
-# Use service_account.json from Capstone root (central location)
-service_account_path = capstone_root / 'service_account.json'
-if service_account_path.exists():
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(service_account_path.absolute())
-
-# Initialize Vertex AI with credentials from environment variables
-vertexai.init(
-    project=os.environ.get("GOOGLE_CLOUD_PROJECT"),
-    location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
-)
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.runtime import init_vertexai_before_model
+
+# Tool functions live in tools.py, which imports without google-adk / vertexai.
+# Vertex AI itself is initialised lazily on the first model call (before_model_callback).
+if __package__:
+    from .tools import (
+        call_mcp_monitoring_instances,
+        call_mcp_monitoring_instances_async,
+        call_mcp_monitoring_instances_multi_env,
+        call_mcp_monitoring_instances_multi_env_async,
+        find_queued_instances,
+        find_queued_instances_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
+else:
+    from tools import (
+        call_mcp_monitoring_instances,
+        call_mcp_monitoring_instances_async,
+        call_mcp_monitoring_instances_multi_env,
+        call_mcp_monitoring_instances_multi_env_async,
+        find_queued_instances,
+        find_queued_instances_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
 
 # Configure ADK logging
 # Try to import logging config from utility if available
@@ -55,173 +62,6 @@ except ImportError:
     logger.info("Using basic logging (utility.logging_config not available)")
 
 
-def call_mcp_monitoring_instances(
-    environment: str = "qa3",
-    duration: str = "1h",
-    status: str = "IN_PROGRESS",
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Call the MCP server's monitoringInstances tool to retrieve integration instances.
-    
-    This tool queries the OIC Monitor MCP server to get integration instances
-    filtered by duration and status. The MCP server handles pagination internally.
-    
-    Args:
-        environment: OIC environment to query. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
-        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d', 'RETENTIONPERIOD'. Default: '1h'
-        status: Instance status filter. Valid values: 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'ABORTED'. Default: 'IN_PROGRESS'
-        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
-    
-    Returns:
-        JSON string with integration instances information (raw response from MCP server)
-    """
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    # Use streaming HTTP transport endpoint
-    stream_endpoint = f"{mcp_server_url}/stream"
-    
-    # MCP protocol message format for calling a tool
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringInstances",
-            "arguments": {
-                "environment": environment,
-                "duration": duration,
-                "status": status
-            }
-        }
-    }
-    
-    try:
-        # Use streaming HTTP POST request
-        response = requests.post(
-            stream_endpoint,
-            json=mcp_message,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            },
-            stream=False,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        
-        # Parse streaming response
-        # For MCP protocol, responses may come as SSE or JSON
-        content_type = response.headers.get("Content-Type", "")
-        
-        if "text/event-stream" in content_type or "application/json" in content_type:
-            # Try to parse as JSON first
-            try:
-                result = response.json()
-                # Extract content from MCP response structure
-                if isinstance(result, dict):
-                    if "result" in result:
-                        content = result["result"].get("content", [])
-                        for item in content:
-                            if item.get("type") == "text":
-                                text_content = item.get("text", "{}")
-                                try:
-                                    json.loads(text_content)
-                                    return text_content
-                                except json.JSONDecodeError:
-                                    return json.dumps({"raw": text_content})
-                    elif "content" in result:
-                        for item in result["content"]:
-                            if item.get("type") == "text":
-                                text_content = item.get("text", "{}")
-                                try:
-                                    json.loads(text_content)
-                                    return text_content
-                                except json.JSONDecodeError:
-                                    return json.dumps({"raw": text_content})
-                return json.dumps(result, indent=2)
-            except ValueError:
-                # If not JSON, read as text (SSE format)
-                text_response = response.text
-                # Try to extract JSON from SSE format
-                lines = text_response.split('\n')
-                for line in lines:
-                    if line.startswith('data: '):
-                        try:
-                            data = json.loads(line[6:])  # Remove 'data: ' prefix
-                            if "result" in data:
-                                content = data["result"].get("content", [])
-                                for item in content:
-                                    if item.get("type") == "text":
-                                        return item.get("text", "{}")
-                            return json.dumps(data, indent=2)
-                        except (json.JSONDecodeError, KeyError):
-                            continue
-                return json.dumps({"raw": text_response})
-        else:
-            # Fallback: treat as plain text
-            return json.dumps({"raw": response.text})
-            
-    except requests.exceptions.ConnectionError:
-        error_response = {
-            "isError": True,
-            "error": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }
-        return json.dumps(error_response, indent=2)
-    except Exception as e:
-        error_response = {
-            "isError": True,
-            "error": f"Error calling MCP server: {str(e)}"
-        }
-        return json.dumps(error_response, indent=2)
-
-
-def check_mcp_server_health(mcp_server_url: Optional[str] = None) -> Dict[str, Any]:
-    """
-    Check if the OIC Monitor MCP server is running and healthy.
-    
-    Args:
-        mcp_server_url: URL of the MCP server (optional)
-    
-    Returns:
-        dict: Dictionary containing server health status
-    """
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    health_endpoint = f"{mcp_server_url}/health"
-    
-    try:
-        response = requests.get(health_endpoint, timeout=5)
-        response.raise_for_status()
-        health_data = response.json()
-        
-        return {
-            "status": "healthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "health_check": health_data
-        }
-    except requests.exceptions.ConnectionError:
-        return {
-            "status": "unhealthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Error checking server health: {str(e)}"
-        }
-
-
 # Get agent model from environment or use default
 # Using gemini-2.0-flash for better function calling support
 AGENT_MODEL = os.environ.get("AGENT_MODEL", "gemini-2.0-flash")
@@ -236,27 +76,33 @@ root_agent = Agent(
     
     When users ask for any requests pending in queue before processing:
     
-    1. Call the call_mcp_monitoring_instances tool with:
+    1. Call the find_queued_instances_async tool with:
        - environment: The OIC environment to query (e.g., 'qa3', 'dev', 'prod1', 'prod3')
        - duration: Time window (default '1h')
-       - status: Instance status (default 'IN_PROGRESS')
+       - minAgeMinutes: Only if the user asks for another minimum time in queue (default 15)
+       - mepTypes: Only if the user asks for other message exchange patterns (default ['ASYNC_ONE_WAY'])
     
-    2. The MCP server handles pagination automatically
+    2. The tool fetches IN_PROGRESS instances (the MCP server handles pagination) and already
+       filters them to mepType ASYNC_ONE_WAY with dataFetchTime - creationDate > 15 minutes.
+       It returns only the matching instances, their count, and creation times converted to MST.
+       Do not filter or convert the results again.
+       If the response has "truncated": true, report the full count and call the tool again
+       with cursor = moreAvailable.cursor when the user needs the remaining instances.
     
-    3. Filter the response to match instances with:
-       - status: "IN_PROGRESS"
-       - mepType: "ASYNC_ONE_WAY"
-       - dataFetchTime - creationDate > 15 minutes (date format: 2025-11-21T04:33:10.496+0000 GMT)
+    3. Use call_mcp_monitoring_instances_async only when the user asks for the raw, unfiltered instance list.
+       For the raw list across several environments, call call_mcp_monitoring_instances_multi_env_async
+       once (environments omitted = all) and report any environment listed in "failed".
     
     4. Return details in a clean, structured text format:
-       - Start with a summary: "**Total matching instances: X**"
+       - Start with a summary: "**Total matching instances: [count]**"
        - For each instance, display as a numbered list with clear labels:
          
          **Instance 1:**
-         - Created: [creationDate in MST timezone]
-         - Integration: [integration name]
+         - Created: [created]
+         - Integration: [integration]
          - Instance ID: [instanceId]
-         - Tracking: [name-value pairs, max 200 chars]
+         - Queued: [queuedMinutes] minutes
+         - Tracking: [tracking]
          
     5. If no instances found, simply state: "No pending requests found in queue for [environment] environment."
     
@@ -264,7 +110,8 @@ root_agent = Agent(
     
     Always present results in clear, readable plain text format - NOT HTML tables.
     """,
-    tools=[call_mcp_monitoring_instances, check_mcp_server_health]
+    before_model_callback=init_vertexai_before_model,
+    tools=[find_queued_instances_async, call_mcp_monitoring_instances_async, call_mcp_monitoring_instances_multi_env_async, check_mcp_server_health_async]
 )
 
 
@@ -0,0 +1,166 @@
+"""
+MonitorQueueRequestAgent Tools
+
+Integration instance and queue tools of MonitorQueueRequestAgent (layout: shared.runtime).
+"""
+
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.fanout import fan_out, fan_out_async
+from shared.mcp_client import get_mcp_client, check_mcp_server_health
+from shared.mcp_async_client import get_async_mcp_client, check_mcp_server_health_async
+from shared.projection import render_tool_output
+from shared.queue_filter import filter_queued_instances
+from shared.runtime import async_twin, load_environment
+
+# Load environment variables (MCP_SERVER_URL, ...) from Capstone root (central location)
+load_environment()
+
+INSTANCES_TOOL = "monitoringInstances"
+
+
+def _instances_args(environment: str, duration: str, status: str) -> Dict[str, Any]:
+    return {"environment": environment, "duration": duration, "status": status}
+
+
+def _queued_output(result: Dict[str, Any], environment: str, minAgeMinutes: Optional[float],
+                   mepTypes: Optional[List[str]], cursor: Optional[str]) -> str:
+    if result.get("isError"):
+        return render_tool_output(result)
+    queued = filter_queued_instances(result.get("items", []), min_age_minutes=minAgeMinutes, mep_types=mepTypes)
+    queued["environment"] = environment
+    return render_tool_output(queued, "queued_instances", cursor)
+
+
+def call_mcp_monitoring_instances(
+    environment: str = "qa3",
+    duration: str = "1h",
+    status: str = "IN_PROGRESS",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Call the MCP server's monitoringInstances tool to retrieve integration instances.
+    
+    This tool queries the OIC Monitor MCP server to get integration instances
+    filtered by duration and status. The MCP server handles pagination internally.
+    
+    Args:
+        environment: OIC environment to query. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d', 'RETENTIONPERIOD'. Default: '1h'
+        status: Instance status filter. Valid values: 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'ABORTED'. Default: 'IN_PROGRESS'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with integration instances information (raw response from MCP server)
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(INSTANCES_TOOL, _instances_args(environment, duration, status))
+    return render_tool_output(result, "instances", cursor)
+
+
+@async_twin(call_mcp_monitoring_instances)
+async def call_mcp_monitoring_instances_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    status: str = "IN_PROGRESS",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(
+        INSTANCES_TOOL, _instances_args(environment, duration, status)
+    )
+    return render_tool_output(result, "instances", cursor)
+
+
+def call_mcp_monitoring_instances_multi_env(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    status: str = "IN_PROGRESS",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Retrieve integration instances from several OIC environments at once (queried concurrently).
+    
+    Args:
+        environments: OIC environments to query, e.g. ['dev', 'prod1']. Default: all ('dev', 'qa3', 'prod1', 'prod3')
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d', 'RETENTIONPERIOD'. Default: '1h'
+        status: Instance status filter. Valid values: 'IN_PROGRESS', 'COMPLETED', 'FAILED', 'ABORTED'. Default: 'IN_PROGRESS'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with every instance tagged by environment, per-environment counts,
+        and the environments that failed (partialFailure).
+    """
+    result = fan_out(
+        get_mcp_client(mcp_server_url), INSTANCES_TOOL, environments, {"duration": duration, "status": status}
+    )
+    return render_tool_output(result, "instances", cursor)
+
+
+@async_twin(call_mcp_monitoring_instances_multi_env)
+async def call_mcp_monitoring_instances_multi_env_async(
+    environments: Optional[List[str]] = None,
+    duration: str = "1h",
+    status: str = "IN_PROGRESS",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await fan_out_async(
+        get_async_mcp_client(mcp_server_url), INSTANCES_TOOL, environments, {"duration": duration, "status": status}
+    )
+    return render_tool_output(result, "instances", cursor)
+
+
+def find_queued_instances(
+    environment: str = "qa3",
+    duration: str = "1h",
+    minAgeMinutes: Optional[float] = None,
+    mepTypes: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Find requests waiting in the queue longer than a threshold.
+    
+    Fetches IN_PROGRESS instances with the monitoringInstances tool and keeps only those
+    whose mepType matches and whose dataFetchTime - creationDate exceeds minAgeMinutes.
+    Creation times are converted to MST.
+    
+    Args:
+        environment: OIC environment to query. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        duration: Time window. Valid values: '1h', '6h', '1d', '2d', '3d', 'RETENTIONPERIOD'. Default: '1h'
+        minAgeMinutes: Minimum time in queue in minutes. Default: QUEUE_MIN_AGE_MINUTES (15)
+        mepTypes: Message exchange patterns to include. Default: ['ASYNC_ONE_WAY']
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with the count of matching instances and, for each, instanceId,
+        integration, created (MST), queuedMinutes and tracking.
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(
+        INSTANCES_TOOL, _instances_args(environment, duration, "IN_PROGRESS")
+    )
+    return _queued_output(result, environment, minAgeMinutes, mepTypes, cursor)
+
+
+@async_twin(find_queued_instances)
+async def find_queued_instances_async(
+    environment: str = "qa3",
+    duration: str = "1h",
+    minAgeMinutes: Optional[float] = None,
+    mepTypes: Optional[List[str]] = None,
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(
+        INSTANCES_TOOL, _instances_args(environment, duration, "IN_PROGRESS")
+    )
+    return _queued_output(result, environment, minAgeMinutes, mepTypes, cursor)
@@ -1,2 +1,10 @@
-from .agent import root_agent
-__all__ = ['root_agent']
+import sys
+from pathlib import Path
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.runtime import lazy_root_agent
+
+__getattr__ = lazy_root_agent(__name__)
+
+__all__ = ["root_agent"]
@@ -42,6 +42,10 @@ A2A_PORT = int(os.environ.get("RECOVERY_JOB_A2A_PORT", "10005"))
 print(f"🚀 Starting RecoveryJobAgent A2A Server on port {A2A_PORT}")
 a2a_app = to_a2a(root_agent, port=A2A_PORT)
 
+# Prometheus metrics for this agent's MCP calls at /metrics
+from shared.metrics import mount_metrics
+mount_metrics(a2a_app, "RecoveryJobAgent")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(a2a_app, host="0.0.0.0", port=A2A_PORT)
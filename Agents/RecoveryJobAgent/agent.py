@@ -5,36 +5,43 @@ Uses Google ADK to create an agent that retrieves details of error recovery jobs
 by calling the monitoringErrorRecoveryJobDetails tool from the OIC Monitor MCP server.
 """
 
-from google.adk.agents import Agent
-import vertexai
 import os
 import sys
-import requests
-import json
-import logging
-import uuid
-from typing import Dict, Any, Optional, List
-from dotenv import load_dotenv
 from pathlib import Path
 
+from google.adk.agents import Agent
+
 # Add parent directory to path to import config if available
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '../..'))
 
-# Load environment variables from Capstone root (central location)
-capstone_root = Path(__file__).parent.parent.parent.parent  # Go up to Capstone folder
-env_path = capstone_root / '.env'
-load_dotenv(dotenv_path=env_path)
-
-# Use service_account.json from Capstone root (central location)
-service_account_path = capstone_root / 'service_account.json'
-if service_account_path.exists():
-    os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(service_account_path.absolute())
-
-# Initialize Vertex AI with credentials from environment variables
-vertexai.init(
-    project=os.environ.get("GOOGLE_CLOUD_PROJECT"),
-    location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
-)
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.runtime import init_vertexai_before_model
+
+# Tool functions live in tools.py, which imports without google-adk / vertexai.
+# Vertex AI itself is initialised lazily on the first model call (before_model_callback).
+if __package__:
+    from .tools import (
+        call_mcp_recovery_job_details,
+        call_mcp_recovery_job_details_async,
+        wait_for_recovery_jobs,
+        wait_for_recovery_jobs_async,
+        call_mcp_list_recovery_jobs,
+        call_mcp_list_recovery_jobs_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
+else:
+    from tools import (
+        call_mcp_recovery_job_details,
+        call_mcp_recovery_job_details_async,
+        wait_for_recovery_jobs,
+        wait_for_recovery_jobs_async,
+        call_mcp_list_recovery_jobs,
+        call_mcp_list_recovery_jobs_async,
+        check_mcp_server_health,
+        check_mcp_server_health_async
+    )
 
 # Configure ADK logging
 try:
@@ -52,215 +59,6 @@ except ImportError:
     logger.info("Using basic logging (utility.logging_config not available)")
 
 
-def call_mcp_recovery_job_details(
-    environment: str = "qa3",
-    jobId: Optional[str] = None,
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Call the MCP server's monitoringErrorRecoveryJobDetails tool to get job details.
-    
-    Args:
-        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
-        jobId: The ID of the recovery job. If None, reads from shared state.
-        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
-    
-    Returns:
-        JSON string with the job details including status and instance information.
-    """
-    # Try to load from shared state if no ID provided
-    if not jobId:
-        try:
-            shared_state_path = Path(__file__).parent.parent / 'shared_state.json'
-            if shared_state_path.exists():
-                with open(shared_state_path, 'r') as f:
-                    state = json.load(f)
-                    job_ids = state.get("last_recovery_job_ids", [])
-                    if job_ids:
-                        jobId = job_ids[0]  # Use the most recent job ID
-                    # Use environment from state if not specified
-                    if environment == "qa3" and "environment" in state:
-                        environment = state["environment"]
-        except Exception:
-            pass
-            
-    if not jobId:
-        return json.dumps({
-            "isError": True,
-            "error": "No job ID provided and no recent recovery jobs found in shared state. Run ResubmitErrorsAgent first."
-        }, indent=2)
-
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    stream_endpoint = f"{mcp_server_url}/stream"
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringErrorRecoveryJobDetails",
-            "arguments": {
-                "environment": environment,
-                "id": jobId
-            }
-        }
-    }
-    
-    try:
-        response = requests.post(
-            stream_endpoint,
-            json=mcp_message,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            },
-            stream=False,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        
-        content_type = response.headers.get("Content-Type", "")
-        
-        if "application/json" in content_type:
-            try:
-                result = response.json()
-                if isinstance(result, dict):
-                    if "result" in result:
-                        content = result["result"].get("content", [])
-                        for item in content:
-                            if item.get("type") == "text":
-                                return item.get("text", "{}")
-                return json.dumps(result, indent=2)
-            except ValueError:
-                return json.dumps({"raw": response.text})
-        else:
-            return json.dumps({"raw": response.text})
-            
-    except requests.exceptions.ConnectionError:
-        return json.dumps({
-            "isError": True,
-            "error": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }, indent=2)
-    except Exception as e:
-        return json.dumps({
-            "isError": True,
-            "error": f"Error calling MCP server: {str(e)}"
-        }, indent=2)
-
-
-def call_mcp_list_recovery_jobs(
-    environment: str = "qa3",
-    mcp_server_url: Optional[str] = None
-) -> str:
-    """
-    Call the MCP server's monitoringErrorRecoveryJobs tool to list all recovery jobs.
-    
-    Args:
-        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
-        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
-    
-    Returns:
-        JSON string with list of recovery jobs.
-    """
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    stream_endpoint = f"{mcp_server_url}/stream"
-    request_id = str(uuid.uuid4())
-    
-    mcp_message = {
-        "jsonrpc": "2.0",
-        "id": request_id,
-        "method": "tools/call",
-        "params": {
-            "name": "monitoringErrorRecoveryJobs",
-            "arguments": {
-                "environment": environment
-            }
-        }
-    }
-    
-    try:
-        response = requests.post(
-            stream_endpoint,
-            json=mcp_message,
-            headers={
-                "Content-Type": "application/json",
-                "Accept": "application/json, text/event-stream"
-            },
-            stream=False,
-            timeout=60
-        )
-        
-        response.raise_for_status()
-        
-        content_type = response.headers.get("Content-Type", "")
-        
-        if "application/json" in content_type:
-            try:
-                result = response.json()
-                if isinstance(result, dict):
-                    if "result" in result:
-                        content = result["result"].get("content", [])
-                        for item in content:
-                            if item.get("type") == "text":
-                                return item.get("text", "{}")
-                return json.dumps(result, indent=2)
-            except ValueError:
-                return json.dumps({"raw": response.text})
-        else:
-            return json.dumps({"raw": response.text})
-            
-    except requests.exceptions.ConnectionError:
-        return json.dumps({
-            "isError": True,
-            "error": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }, indent=2)
-    except Exception as e:
-        return json.dumps({
-            "isError": True,
-            "error": f"Error calling MCP server: {str(e)}"
-        }, indent=2)
-
-
-def check_mcp_server_health(mcp_server_url: Optional[str] = None) -> Dict[str, Any]:
-    """Check if the OIC Monitor MCP server is running and healthy."""
-    if not mcp_server_url:
-        mcp_server_url = os.environ.get("MCP_SERVER_URL", "http://localhost:3000")
-    
-    health_endpoint = f"{mcp_server_url}/health"
-    
-    try:
-        response = requests.get(health_endpoint, timeout=5)
-        response.raise_for_status()
-        health_data = response.json()
-        
-        return {
-            "status": "healthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "health_check": health_data
-        }
-    except requests.exceptions.ConnectionError:
-        return {
-            "status": "unhealthy",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Cannot connect to OIC Monitor MCP server at {mcp_server_url}. Make sure the server is running."
-        }
-    except Exception as e:
-        return {
-            "status": "error",
-            "server_url": mcp_server_url,
-            "server_type": "oic-monitor-mcp",
-            "error_message": f"Error checking server health: {str(e)}"
-        }
-
-
 # Get agent model from environment or use default
 AGENT_MODEL = os.environ.get("AGENT_MODEL", "gemini-2.0-flash")
 
@@ -274,11 +72,13 @@ root_agent = Agent(
     
     When users ask about recovery job status:
     
-    1. Call call_mcp_recovery_job_details with:
+    1. Call call_mcp_recovery_job_details_async with:
        - environment: The OIC environment ('dev', 'qa3', 'prod1', 'prod3')
-       - jobId: The recovery job ID (or leave empty to use recoveryJobId from ResubmitErrorsAgent shared state)
+       - jobId: The recovery job ID (or leave empty to check every recoveryJobId from ResubmitErrorsAgent shared state)
     
-    2. The recoveryJobId is returned by the bulk resubmit API and saved to shared state automatically.
+    2. The recoveryJobIds are returned by the bulk resubmit API and saved to shared state automatically.
+       To wait until every job finishes, call wait_for_recovery_jobs_async (optionally with jobIds
+       and timeoutSeconds); it polls all jobs concurrently and returns statusCounts and allDone.
     
     3. Return results in a clean, structured text format:
        
@@ -291,13 +91,15 @@ root_agent = Agent(
        - Successful: [count]
        - Failed: [count]
        
-    4. If listing all jobs, use call_mcp_list_recovery_jobs.
+    4. If listing all jobs, use call_mcp_list_recovery_jobs_async. If its response has
+       "truncated": true, call it again with cursor = moreAvailable.cursor for the next page.
     
     If any MCP tool call returns an error, return the exact error message to the user.
     
     Always present results in plain text format - NOT HTML tables.
     """,
-    tools=[call_mcp_recovery_job_details, call_mcp_list_recovery_jobs, check_mcp_server_health]
+    before_model_callback=init_vertexai_before_model,
+    tools=[call_mcp_recovery_job_details_async, wait_for_recovery_jobs_async, call_mcp_list_recovery_jobs_async, check_mcp_server_health_async]
 )
 
 
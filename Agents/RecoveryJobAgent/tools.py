@@ -0,0 +1,148 @@
+"""
+RecoveryJobAgent Tools
+
+Recovery job tools of RecoveryJobAgent (layout: shared.runtime). The async twins read
+the open jobs from shared state (SQLite) in a worker thread, off the event loop.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, List
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.mcp_client import get_mcp_client, check_mcp_server_health
+from shared.mcp_async_client import get_async_mcp_client, check_mcp_server_health_async
+from shared.projection import render_tool_output
+from shared.recovery_watcher import resolve_recovery_jobs, watch_recovery_jobs, watch_recovery_jobs_async
+from shared.runtime import async_twin, load_environment
+
+# Load environment variables (MCP_SERVER_URL, ...) from Capstone root (central location)
+load_environment()
+
+DETAILS_TOOL = "monitoringErrorRecoveryJobDetails"
+LIST_TOOL = "monitoringErrorRecoveryJobs"
+
+NO_JOBS_ERROR = json.dumps({
+    "isError": True,
+    "error": "No job ID provided and no recent recovery jobs found in shared state. Run ResubmitErrorsAgent first."
+}, indent=2)
+
+
+def _details_args(environment: str, jobId: str) -> Dict[str, Any]:
+    return {"environment": environment, "id": jobId}
+
+
+def call_mcp_recovery_job_details(
+    environment: str = "qa3",
+    jobId: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Call the MCP server's monitoringErrorRecoveryJobDetails tool to get job details.
+    
+    Args:
+        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        jobId: The ID of the recovery job. If None, checks every recovery job in shared state concurrently.
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with the job details including status and instance information.
+    """
+    client = get_mcp_client(mcp_server_url)
+    if jobId:
+        return render_tool_output(client.call_tool(DETAILS_TOOL, _details_args(environment, jobId)))
+
+    jobs = resolve_recovery_jobs(environment)
+    if not jobs:
+        return NO_JOBS_ERROR
+    return render_tool_output(watch_recovery_jobs(client, jobs))
+
+
+@async_twin(call_mcp_recovery_job_details)
+async def call_mcp_recovery_job_details_async(
+    environment: str = "qa3",
+    jobId: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    client = get_async_mcp_client(mcp_server_url)
+    if jobId:
+        return render_tool_output(await client.call_tool(DETAILS_TOOL, _details_args(environment, jobId)))
+
+    jobs = await asyncio.to_thread(resolve_recovery_jobs, environment)
+    if not jobs:
+        return NO_JOBS_ERROR
+    return render_tool_output(await watch_recovery_jobs_async(client, jobs))
+
+
+def wait_for_recovery_jobs(
+    environment: str = "qa3",
+    jobIds: Optional[List[str]] = None,
+    timeoutSeconds: int = 300,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Wait until all recovery jobs reach a terminal status or the deadline passes.
+    
+    Polls every job concurrently with exponential backoff and jitter, and stops
+    polling each job once it is COMPLETED/FAILED/ABORTED.
+    
+    Args:
+        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        jobIds: Recovery job IDs. If None, uses every open recovery job in shared state.
+        timeoutSeconds: Maximum time to wait in seconds. Default: 300
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with every job's final details, status counts, and whether all jobs finished.
+    """
+    jobs = resolve_recovery_jobs(environment, jobIds)
+    if not jobs:
+        return NO_JOBS_ERROR
+    return render_tool_output(watch_recovery_jobs(get_mcp_client(mcp_server_url), jobs, timeout=timeoutSeconds))
+
+
+@async_twin(wait_for_recovery_jobs)
+async def wait_for_recovery_jobs_async(
+    environment: str = "qa3",
+    jobIds: Optional[List[str]] = None,
+    timeoutSeconds: int = 300,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    jobs = await asyncio.to_thread(resolve_recovery_jobs, environment, jobIds)
+    if not jobs:
+        return NO_JOBS_ERROR
+    summary = await watch_recovery_jobs_async(get_async_mcp_client(mcp_server_url), jobs, timeout=timeoutSeconds)
+    return render_tool_output(summary)
+
+
+def call_mcp_list_recovery_jobs(
+    environment: str = "qa3",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Call the MCP server's monitoringErrorRecoveryJobs tool to list all recovery jobs.
+    
+    Args:
+        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        cursor: moreAvailable.cursor from a previous truncated response, to get the next page
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with list of recovery jobs.
+    """
+    result = get_mcp_client(mcp_server_url).call_tool(LIST_TOOL, {"environment": environment})
+    return render_tool_output(result, "recovery_jobs", cursor)
+
+
+@async_twin(call_mcp_list_recovery_jobs)
+async def call_mcp_list_recovery_jobs_async(
+    environment: str = "qa3",
+    cursor: Optional[str] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    result = await get_async_mcp_client(mcp_server_url).call_tool(LIST_TOOL, {"environment": environment})
+    return render_tool_output(result, "recovery_jobs", cursor)
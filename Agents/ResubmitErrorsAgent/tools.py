@@ -0,0 +1,78 @@
+"""
+ResubmitErrorsAgent Tools
+
+Resubmit tools of ResubmitErrorsAgent (layout: shared.runtime). The async twin reads and
+saves shared state (SQLite) in a worker thread, off the event loop.
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional, List
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from shared.fanout import resolve_errored_ids
+from shared.mcp_client import get_mcp_client, check_mcp_server_health
+from shared.mcp_async_client import get_async_mcp_client, check_mcp_server_health_async
+from shared.projection import render_tool_output
+from shared.resubmit import resubmit_in_batches, resubmit_in_batches_async, save_resubmit_result
+from shared.state_store import get_shared_state
+from shared.runtime import async_twin, load_environment
+
+# Load environment variables (MCP_SERVER_URL, ...) from Capstone root (central location)
+load_environment()
+
+NO_IDS_ERROR = json.dumps({
+    "isError": True,
+    "error": "No instance IDs provided and no recent errors found in shared state. Run MonitorErrorsAgent first."
+}, indent=2)
+
+
+def _resolve_resubmit_args(environment: str, instanceIds: Optional[List[str]]):
+    """Try to load the environment's instance IDs from shared state if none were provided."""
+    if not instanceIds:
+        return resolve_errored_ids(get_shared_state(), environment)
+    return environment, instanceIds
+
+
+def _resubmit_output(result: Dict[str, Any], environment: str) -> str:
+    save_resubmit_result(result, environment)
+    return render_tool_output(result)
+
+
+def call_mcp_resubmit_errors(
+    environment: str = "qa3",
+    instanceIds: Optional[List[str]] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    """
+    Call the MCP server's monitoringResubmitErroredInstances tool to resubmit errored instances.
+    
+    Args:
+        environment: OIC environment. Valid values: 'dev', 'qa3', 'prod1', 'prod3'. Default: 'qa3'
+        instanceIds: List of instance IDs to resubmit (any number; sent in batches of 50). If None, reads from shared state.
+        mcp_server_url: URL of the MCP server (optional, uses MCP_SERVER_URL env var)
+    
+    Returns:
+        JSON string with the result of the resubmission including recovery job IDs.
+    """
+    environment, instanceIds = _resolve_resubmit_args(environment, instanceIds)
+    if not instanceIds:
+        return NO_IDS_ERROR
+    result = resubmit_in_batches(get_mcp_client(mcp_server_url), environment, instanceIds)
+    return _resubmit_output(result, environment)
+
+
+@async_twin(call_mcp_resubmit_errors)
+async def call_mcp_resubmit_errors_async(
+    environment: str = "qa3",
+    instanceIds: Optional[List[str]] = None,
+    mcp_server_url: Optional[str] = None
+) -> str:
+    environment, instanceIds = await asyncio.to_thread(_resolve_resubmit_args, environment, instanceIds)
+    if not instanceIds:
+        return NO_IDS_ERROR
+    result = await resubmit_in_batches_async(get_async_mcp_client(mcp_server_url), environment, instanceIds)
+    return await asyncio.to_thread(_resubmit_output, result, environment)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Single-Process A2A Host
+
+Serves the OIC AgentOps A2A agents from one Python process instead of one process per
+agent. Every agent keeps its own port (COORDINATOR_A2A_PORT, MONITOR_ERRORS_A2A_PORT,
+...), so the agent_card.json URLs and the cards ADK generates are the same as with
+start_a2a_servers.py; the uvicorn servers just share one event loop.
+
+Running in one process means the agents share:
+
+    - the interpreter and the imported google-adk / a2a / MCP client modules
+    - the pooled MCP clients (get_mcp_client / get_async_mcp_client are per-process
+      singletons, and the async ones are per event loop)
+    - the response cache and the state store connection
+
+Each agent's port also serves /metrics; the registry is shared by the process, and
+series are labelled with the agent that served the request.
+
+Agents are imported as packages (CoordinatorAgent.agent, ...) rather than through each
+a2a_server.py, whose `from agent import root_agent` only works with one agent per process.
+
+Usage:
+    python a2a_host.py                                   # Host all agents
+    python a2a_host.py --agent coordinator --agent monitor_errors
+    python start_a2a_servers.py --single-process         # Same, via the launcher
+"""
+
+import argparse
+import asyncio
+import contextlib
+import importlib
+import logging
+import os
+import signal
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Add Agents directory to path so agents import as packages and find shared/
+sys.path.insert(0, str(Path(__file__).parent))
+
+from shared.metrics import mount_metrics
+from shared.runtime import load_environment
+from start_a2a_servers import AGENTS
+
+load_environment()
+
+logger = logging.getLogger(__name__)
+
+
+def agent_port(agent_key: str) -> int:
+    """Port of an agent: <AGENT_KEY>_A2A_PORT or its default from AGENTS."""
+    return int(os.environ.get(f"{agent_key.upper()}_A2A_PORT", AGENTS[agent_key]["port"]))
+
+
+def build_apps(agent_keys: Optional[List[str]] = None) -> Dict[str, Tuple[Any, int]]:
+    """Import each agent and wrap it with to_a2a; returns {agent_key: (asgi_app, port)}."""
+    from google.adk.a2a.utils.agent_to_a2a import to_a2a
+
+    apps = {}
+    for agent_key in agent_keys or list(AGENTS):
+        config = AGENTS.get(agent_key)
+        if not config:
+            raise ValueError(f"Unknown agent: {agent_key}")
+        port = agent_port(agent_key)
+        module = importlib.import_module(f"{config['path']}.agent")
+        app = mount_metrics(to_a2a(module.root_agent, port=port), config["name"])
+        apps[agent_key] = (app, port)
+        logger.info(f"Loaded {config['name']} for port {port}")
+    return apps
+
+
+def _hosted_server_class():
+    import uvicorn
+
+    class HostedServer(uvicorn.Server):
+        """uvicorn.Server that leaves signal handling to the host (several run on one loop)."""
+
+        def install_signal_handlers(self) -> None:
+            pass
+
+        @contextlib.contextmanager
+        def capture_signals(self):
+            yield
+
+    return HostedServer
+
+
+async def serve(apps: Dict[str, Tuple[Any, int]], host: str = "0.0.0.0", log_level: str = "info") -> None:
+    """Run one uvicorn server per agent on the current event loop until SIGINT/SIGTERM."""
+    import uvicorn
+
+    server_class = _hosted_server_class()
+    servers = [
+        server_class(uvicorn.Config(app, host=host, port=port, log_level=log_level))
+        for app, port in apps.values()
+    ]
+
+    def stop() -> None:
+        for server in servers:
+            server.should_exit = True
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(sig, stop)
+
+    await asyncio.gather(*(server.serve() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host A2A agents in a single process")
+    parser.add_argument("--agent", "-a", action="append", choices=list(AGENTS),
+                        help="Agent to host (repeatable; default: all)")
+    parser.add_argument("--host", default=os.environ.get("A2A_HOST", "0.0.0.0"), help="Bind address")
+    parser.add_argument("--log-level", default="info", help="uvicorn log level")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    start = time.perf_counter()
+    try:
+        apps = build_apps(args.agent)
+    except ImportError as e:
+        print(f"Error: {e}. Please install/upgrade google-adk (pip install --upgrade google-adk).")
+        sys.exit(1)
+
+    print("\n" + "=" * 60)
+    print(f"🤖 OIC AgentOps A2A Host ({len(apps)} agents, pid {os.getpid()})")
+    print("=" * 60)
+    for agent_key, (_, port) in apps.items():
+        print(f"  {AGENTS[agent_key]['name']}: http://localhost:{port}/a2a")
+    print(f"\n⏱️  Agents loaded in {time.perf_counter() - start:.2f}s")
+    print("⏳ Press Ctrl+C to stop all agents...\n")
+
+    asyncio.run(serve(apps, host=args.host, log_level=args.log_level))
+
+
+if __name__ == "__main__":
+    main()
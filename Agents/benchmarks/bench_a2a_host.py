@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+A2A Launcher vs Single-Process Host Benchmark
+
+Starts the A2A agents both ways and compares:
+
+    cold start    Seconds from spawning the process(es) until every agent card answers
+    resident mem  Sum of VmRSS of the agent process(es) once all of them are ready
+
+    launcher      One `python a2a_server.py` process per agent (what start_a2a_servers.py does)
+    host          One `python a2a_host.py` process serving every agent
+
+Both modes use the same ports (--port-base, default 11001..11005, so a running deployment
+on 10001..10005 is not disturbed). Needs google-adk installed; RSS is read from
+/proc/<pid>/status (Linux) or psutil when available.
+
+Usage:
+    python bench_a2a_host.py [--runs N] [--port-base PORT] [--timeout SECONDS]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional
+
+AGENTS_DIR = Path(__file__).parent.parent
+sys.path.insert(0, str(AGENTS_DIR))
+
+from start_a2a_servers import AGENTS
+
+# a2a-sdk serves the card at agent-card.json; older releases used agent.json
+CARD_PATHS = ("/.well-known/agent-card.json", "/.well-known/agent.json")
+
+
+def rss_bytes(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss
+    except Exception:
+        return None
+
+
+def card_ready(port: int) -> bool:
+    for path in CARD_PATHS:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            continue
+    return False
+
+
+def ports_for(port_base: int) -> Dict[str, int]:
+    return {agent_key: port_base + index for index, agent_key in enumerate(AGENTS)}
+
+
+def port_env(ports: Dict[str, int]) -> Dict[str, str]:
+    env = os.environ.copy()
+    env.update({f"{agent_key.upper()}_A2A_PORT": str(port) for agent_key, port in ports.items()})
+    return env
+
+
+def spawn_launcher(ports: Dict[str, int]) -> List[subprocess.Popen]:
+    env = port_env(ports)
+    return [
+        subprocess.Popen(
+            [sys.executable, "a2a_server.py"], cwd=str(AGENTS_DIR / AGENTS[agent_key]["path"]), env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        for agent_key in ports
+    ]
+
+
+def spawn_host(ports: Dict[str, int]) -> List[subprocess.Popen]:
+    return [subprocess.Popen(
+        [sys.executable, "a2a_host.py", "--log-level", "warning"], cwd=str(AGENTS_DIR), env=port_env(ports),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )]
+
+
+def measure(spawn, ports: Dict[str, int], timeout: float) -> Dict[str, float]:
+    start = time.perf_counter()
+    processes = spawn(ports)
+    try:
+        pending = set(ports.values())
+        while pending:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"agents on ports {sorted(pending)} not ready after {timeout}s")
+            if any(process.poll() is not None for process in processes):
+                raise RuntimeError("an agent process exited during start-up")
+            pending = {port for port in pending if not card_ready(port)}
+            if pending:
+                time.sleep(0.05)
+        cold_start = time.perf_counter() - start
+        time.sleep(1.0)  # let start-up allocations settle
+        rss = [rss_bytes(process.pid) for process in processes]
+        return {
+            "coldStartSeconds": cold_start,
+            "rssMiB": sum(r for r in rss if r) / (1024 * 1024) if all(rss) else float("nan"),
+            "processes": len(processes),
+        }
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the A2A launcher with the single-process host")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per mode (median reported)")
+    parser.add_argument("--port-base", type=int, default=11001, help="First agent port")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Start-up timeout per run")
+    args = parser.parse_args()
+
+    ports = ports_for(args.port_base)
+    results = {}
+    for mode, spawn in (("launcher", spawn_launcher), ("host", spawn_host)):
+        runs = [measure(spawn, ports, args.timeout) for _ in range(args.runs)]
+        results[mode] = {
+            "coldStartSeconds": statistics.median(run["coldStartSeconds"] for run in runs),
+            "rssMiB": statistics.median(run["rssMiB"] for run in runs),
+            "processes": runs[0]["processes"],
+        }
+
+    print(f"\nA2A start-up: {len(ports)} agents, median of {args.runs} runs")
+    print(f"{'mode':<10}{'processes':>10}{'cold start':>14}{'resident':>14}")
+    for mode, result in results.items():
+        print(f"{mode:<10}{result['processes']:>10}{result['coldStartSeconds']:>13.2f}s"
+              f"{result['rssMiB']:>10.1f} MiB")
+    launcher, host = results["launcher"], results["host"]
+    print(f"\nhost vs launcher: {host['rssMiB'] / launcher['rssMiB']:.2f}x memory, "
+          f"{host['coldStartSeconds'] / launcher['coldStartSeconds']:.2f}x cold start")
+
+
+if __name__ == "__main__":
+    main()
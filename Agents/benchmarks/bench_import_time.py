@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Agent Import-Time Benchmark
+
+Measures how long each agent takes to import, using the interpreter's own
+-X importtime instrumentation, in a fresh subprocess per run:
+
+    <Agent>.tools   Tool functions only (must not load google-adk / vertexai)
+    <Agent>.agent   Full ADK agent (skipped if google-adk is not installed)
+
+The fastest of the runs (least disturbed by other load on the machine) of each target
+is compared against the tracked
+baseline in import_time_baseline.json; the run fails (exit code 1) if a target is
+slower than the baseline by more than --max-regression, or if a .tools target pulls
+in google-adk or vertexai.
+
+Usage:
+    python bench_import_time.py [--runs N] [--agent NAME] [--max-regression 0.25]
+    python bench_import_time.py --update-baseline      # record the current numbers
+"""
+
+import argparse
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+AGENTS_DIR = Path(__file__).parent.parent
+BASELINE_PATH = Path(__file__).parent / "import_time_baseline.json"
+
+AGENTS = [
+    "CoordinatorAgent",
+    "MonitorErrorsAgent",
+    "MonitorQueueRequestAgent",
+    "RecoveryJobAgent",
+    "ResubmitErrorsAgent",
+]
+
+# Modules a .tools import must never load
+HEAVY_MODULES = ("google.adk", "vertexai", "google.cloud.aiplatform")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_once(module: str) -> Tuple[Optional[float], Dict[str, float], List[str]]:
+    """
+    Import module in a fresh interpreter.
+
+    Returns (total milliseconds or None if the import failed, cumulative ms of each
+    module imported directly by a top-level import, names of every imported module).
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=str(AGENTS_DIR),
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        return None, {}, [proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed"]
+
+    total_us = 0
+    direct: Dict[str, float] = {}
+    modules: List[str] = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        cumulative_us, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        modules.append(name)
+        if len(indent) <= 1:
+            total_us += cumulative_us
+        elif len(indent) == 3:
+            direct[name] = direct.get(name, 0.0) + cumulative_us / 1000.0
+    return total_us / 1000.0, direct, modules
+
+
+def measure(module: str, runs: int) -> Dict[str, object]:
+    totals = []
+    heaviest: Dict[str, float] = {}
+    modules: List[str] = []
+    for _ in range(runs):
+        total, direct, modules = measure_once(module)
+        if total is None:
+            return {"error": modules[0]}
+        totals.append(total)
+        heaviest = direct
+    top = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "medianMs": round(statistics.median(totals), 1),
+        "minMs": round(min(totals), 1),
+        "heavyModulesLoaded": sorted({m for m in modules if m.startswith(HEAVY_MODULES)}),
+        "heaviest": [(name, round(ms, 1)) for name, ms in top],
+    }
+
+
+def load_baseline() -> Dict[str, object]:
+    try:
+        with open(BASELINE_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {"targets": {}}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark agent import time")
+    parser.add_argument("--runs", "-n", type=int, default=5)
+    parser.add_argument("--agent", "-a", action="append", choices=AGENTS, help="Only benchmark this agent")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Allowed slowdown vs baseline (fraction, default 0.25)")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args()
+
+    targets = [f"{agent}.{part}" for agent in (args.agent or AGENTS) for part in ("tools", "agent")]
+    baseline = load_baseline()
+    baseline_targets = baseline.get("targets", {})
+
+    print("\n" + "=" * 72)
+    print("⏱️  Agent Import-Time Benchmark (-X importtime, best of %d runs)" % args.runs)
+    print("=" * 72)
+
+    results = {}
+    failed = False
+    for target in targets:
+        result = measure(target, args.runs)
+        results[target] = result
+        if "error" in result:
+            print(f"  {target:<36} skipped ({result['error']})")
+            continue
+
+        line = f"  {target:<36} {result['minMs']:8.1f} ms (median {result['medianMs']:.1f})"
+        base = baseline_targets.get(target)
+        if base:
+            change = result["minMs"] / base - 1
+            line += f"  (baseline {base:.1f} ms, {change:+.0%})"
+            if change > args.max_regression:
+                line += "  ❌ REGRESSION"
+                failed = True
+        if target.endswith(".tools") and result["heavyModulesLoaded"]:
+            line += f"  ❌ loads {', '.join(result['heavyModulesLoaded'][:3])}"
+            failed = True
+        print(line)
+        print("      heaviest: " + ", ".join(f"{name} {ms:.0f} ms" for name, ms in result["heaviest"]))
+
+    if args.update_baseline:
+        measured = {target: r["minMs"] for target, r in results.items() if "minMs" in r}
+        baseline = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "runs": args.runs,
+            "targets": {**baseline_targets, **measured},
+        }
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\n  Baseline written to {BASELINE_PATH.name}")
+
+    print("=" * 72)
+    sys.exit(1 if failed and not args.update_baseline else 0)
+
+
+if __name__ == "__main__":
+    main()
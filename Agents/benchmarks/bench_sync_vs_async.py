@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Sync vs Async MCP Transport Benchmark
+
+Measures tool-call throughput (requests/sec) against the local stand-in MCP server for:
+
+    sync          Sequential calls on the pooled MCPClient (what a blocked event loop gets)
+    sync-threads  MCPClient calls from a thread pool (one thread per in-flight request)
+    async         AsyncMCPClient calls gathered on a single event loop
+
+Usage:
+    python bench_sync_vs_async.py [--requests N] [--concurrency C] [--latency-ms MS] [--url URL]
+
+Run the stand-in server in its own process (python mcp_standin_server.py) and pass --url
+to keep the server's threads from competing with the client for the GIL. The client-side
+rate limiter is off unless RATE_LIMIT_ENABLED is set.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from shared.mcp_client import MCPClient
+from shared.mcp_async_client import AsyncMCPClient
+from mcp_standin_server import StandInMCPServer
+
+TOOL_NAME = "monitoringErroredInstances"
+TOOL_ARGUMENTS = {"environment": "qa3", "duration": "1h"}
+
+
+def bench_sync(url: str, requests: int) -> float:
+    client = MCPClient(url, pool_size=1)
+    start = time.perf_counter()
+    for _ in range(requests):
+        result = client.call_tool(TOOL_NAME, TOOL_ARGUMENTS)
+        assert not result.get("isError"), result
+    elapsed = time.perf_counter() - start
+    client.close()
+    return requests / elapsed
+
+
+def bench_sync_threads(url: str, requests: int, concurrency: int) -> float:
+    client = MCPClient(url, pool_size=concurrency)
+
+    def call(_):
+        result = client.call_tool(TOOL_NAME, TOOL_ARGUMENTS)
+        assert not result.get("isError"), result
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, range(requests)))
+    elapsed = time.perf_counter() - start
+    client.close()
+    return requests / elapsed
+
+
+async def _bench_async(url: str, requests: int, concurrency: int) -> float:
+    client = AsyncMCPClient(url, pool_size=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call():
+        async with semaphore:
+            result = await client.call_tool(TOOL_NAME, TOOL_ARGUMENTS)
+            assert not result.get("isError"), result
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(requests)))
+    elapsed = time.perf_counter() - start
+    await client.aclose()
+    return requests / elapsed
+
+
+def bench_async(url: str, requests: int, concurrency: int) -> float:
+    return asyncio.run(_bench_async(url, requests, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sync vs async MCP tool calls")
+    parser.add_argument("--requests", "-n", type=int, default=200)
+    parser.add_argument("--concurrency", "-c", type=int, default=20)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Simulated OIC latency per tool call")
+    parser.add_argument("--url", help="Use an already running stand-in server instead of an in-process one")
+    args = parser.parse_args()
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+    server = None
+    url = args.url
+    if not url:
+        server = StandInMCPServer(latency=args.latency_ms / 1000.0).start()
+        url = server.url
+
+    print("\n" + "=" * 60)
+    print("📊 MCP Transport Benchmark")
+    print("=" * 60)
+    print(f"  Server: {url}  Tool: {TOOL_NAME}")
+    print(f"  Requests: {args.requests}  Concurrency: {args.concurrency}  Latency: {args.latency_ms:.0f} ms")
+    print("-" * 60)
+
+    try:
+        results = {
+            "sync": bench_sync(url, args.requests),
+            "sync-threads": bench_sync_threads(url, args.requests, args.concurrency),
+            "async": bench_async(url, args.requests, args.concurrency),
+        }
+    finally:
+        if server:
+            server.stop()
+
+    for mode, rps in results.items():
+        print(f"  {mode:<14} {rps:10.1f} req/s  ({rps / results['sync']:.1f}x)")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Agent Tool Benchmark
+
+Calls the agents' tool functions (the functions registered with the ADK agents, e.g.
+MonitorErrorsAgent.tools.call_mcp_monitoring_errored_instances) against the stand-in
+MCP server and reports, per tool function:
+
+    calls/s      Completed calls per second of wall-clock time
+    p50/p95/p99  Per-call latency percentiles in milliseconds
+    errors       Calls whose result reported isError
+
+This measures the whole agent-side path - MCP transport, response decoding, projection
+and shared-state writes - without a live OIC tenant or a model. The response cache is
+disabled unless --cache is given, so every call reaches the stand-in, the resubmit
+cool-down, idempotent replays and the rate limiter are off, and shared state goes to a temporary directory instead of the agents'
+state store.
+
+Usage:
+    python bench_tools.py [--calls N] [--concurrency C] [--mode sync|async|both]
+                          [--items N] [--latency-ms MS] [--jitter-ms MS] [--error-rate R]
+                          [--sse] [--tools SUBSTRING ...] [--cache] [--json FILE] [--url URL]
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+# Add Agents directory to path to import the agents' tools as packages
+sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from mcp_standin_server import StandInMCPServer
+
+RESUBMIT_IDS = [f"err-qa3-{i:06d}" for i in range(100)]
+
+# (module, sync tool function, arguments); the async twin is "<function>_async"
+TOOL_CASES: List[Tuple[str, str, Dict[str, Any]]] = [
+    ("MonitorErrorsAgent.tools", "call_mcp_monitoring_errored_instances", {"environment": "qa3", "duration": "1h"}),
+    ("MonitorErrorsAgent.tools", "call_mcp_monitoring_errored_instances_multi_env", {"duration": "1h"}),
+    ("MonitorErrorsAgent.tools", "find_error_clusters", {"environment": "qa3", "duration": "1h"}),
+    ("MonitorQueueRequestAgent.tools", "call_mcp_monitoring_instances", {"environment": "qa3", "duration": "1h"}),
+    ("MonitorQueueRequestAgent.tools", "find_queued_instances", {"environment": "qa3", "duration": "1h"}),
+    ("ResubmitErrorsAgent.tools", "call_mcp_resubmit_errors", {"environment": "qa3", "instanceIds": RESUBMIT_IDS}),
+    ("RecoveryJobAgent.tools", "call_mcp_recovery_job_details", {"environment": "qa3", "jobId": "job-00001"}),
+    ("RecoveryJobAgent.tools", "call_mcp_list_recovery_jobs", {"environment": "qa3"}),
+    ("CoordinatorAgent.tools", "monitor_errors", {"environment": "qa3", "duration": "1h"}),
+    ("CoordinatorAgent.tools", "resubmit_errors", {"environment": "qa3", "instanceIds": RESUBMIT_IDS}),
+    ("CoordinatorAgent.tools", "get_recovery_job_status", {"environment": "qa3", "jobId": "job-00001"}),
+]
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _is_error(output: Any) -> bool:
+    try:
+        return bool(json.loads(output).get("isError"))
+    except (TypeError, ValueError, AttributeError):
+        return False
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        "calls": len(latencies),
+        "errors": errors,
+        "callsPerSecond": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50Ms": round(percentile(ordered, 50) * 1000, 2),
+        "p95Ms": round(percentile(ordered, 95) * 1000, 2),
+        "p99Ms": round(percentile(ordered, 99) * 1000, 2),
+    }
+
+
+def bench_sync(function: Callable[..., str], arguments: Dict[str, Any], calls: int, concurrency: int) -> Dict[str, Any]:
+    def call(_) -> Tuple[float, bool]:
+        start = time.perf_counter()
+        output = function(**arguments)
+        return time.perf_counter() - start, _is_error(output)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    return summarize([latency for latency, _ in results], sum(error for _, error in results), elapsed)
+
+
+async def _bench_async(function: Callable[..., Any], arguments: Dict[str, Any], calls: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call() -> Tuple[float, bool]:
+        async with semaphore:
+            start = time.perf_counter()
+            output = await function(**arguments)
+            return time.perf_counter() - start, _is_error(output)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(call() for _ in range(calls)))
+    elapsed = time.perf_counter() - start
+
+    from shared.mcp_async_client import close_async_mcp_clients
+    await close_async_mcp_clients()
+    return summarize([latency for latency, _ in results], sum(error for _, error in results), elapsed)
+
+
+def bench_async(function: Callable[..., Any], arguments: Dict[str, Any], calls: int, concurrency: int) -> Dict[str, Any]:
+    return asyncio.run(_bench_async(function, arguments, calls, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the agents' tool functions against the stand-in MCP server")
+    parser.add_argument("--calls", "-n", type=int, default=200, help="Calls per tool function")
+    parser.add_argument("--concurrency", "-c", type=int, default=10)
+    parser.add_argument("--mode", choices=("sync", "async", "both"), default="both")
+    parser.add_argument("--items", type=int, default=100, help="Items returned by each list tool")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated OIC latency per tool call")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="Extra random latency, uniform in [0, MS]")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of tool calls that fail")
+    parser.add_argument("--sse", action="store_true", help="Stand-in answers with text/event-stream bodies")
+    parser.add_argument("--tools", nargs="*", help="Only tool functions whose name contains one of these")
+    parser.add_argument("--cache", action="store_true", help="Keep the MCP response cache enabled")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    parser.add_argument("--url", help="Use an already running stand-in server instead of an in-process one")
+    args = parser.parse_args()
+
+    os.environ.setdefault("MCP_CACHE_ENABLED", "true" if args.cache else "false")
+    # Every resubmit call sends the same IDs; measure the calls, not the cool-down filter
+    # or replayed idempotent results
+    os.environ.setdefault("RESUBMIT_COOLDOWN_SECONDS", "0")
+    os.environ.setdefault("IDEMPOTENCY_TTL_SECONDS", "0")
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    # --error-rate failures should reach the tools, not be absorbed by client retries
+    os.environ.setdefault("MCP_RETRY_ATTEMPTS", "1")
+    os.environ["AGENT_STATE_PATH"] = str(Path(tempfile.mkdtemp(prefix="bench_tools_")) / "shared_state.db")
+
+    server = None
+    url = args.url
+    if not url:
+        server = StandInMCPServer(
+            latency=args.latency_ms / 1000.0, sse=args.sse, items=args.items,
+            jitter=args.jitter_ms / 1000.0, error_rate=args.error_rate
+        ).start()
+        url = server.url
+    os.environ["MCP_SERVER_URL"] = url
+
+    modes = ("sync", "async") if args.mode == "both" else (args.mode,)
+    runs = []
+    for module_name, function_name, arguments in TOOL_CASES:
+        if args.tools and not any(name in function_name for name in args.tools):
+            continue
+        module = importlib.import_module(module_name)
+        for mode in modes:
+            name = function_name if mode == "sync" else f"{function_name}_async"
+            function = getattr(module, name, None)
+            if function is not None:
+                runs.append((f"{module_name.split('.')[0]}.{name}", function, arguments, mode))
+
+    width = max([len(label) for label, *_ in runs] + [len("tool function")]) + 2
+    line = "=" * (width + 40)
+    print("\n" + line)
+    print("📊 Agent Tool Benchmark")
+    print(line)
+    print(f"  Server: {url}  Items: {args.items}  Latency: {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms  "
+          f"Error rate: {args.error_rate:.0%}")
+    print(f"  Calls: {args.calls}  Concurrency: {args.concurrency}  Cache: {os.environ['MCP_CACHE_ENABLED']}")
+    print("-" * (width + 40))
+    print(f"  {'tool function':<{width}}{'calls/s':>9}{'p50':>8}{'p95':>8}{'p99':>8}{'err':>5}")
+    print("-" * (width + 40))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    try:
+        for label, function, arguments, mode in runs:
+            runner = bench_sync if mode == "sync" else bench_async
+            result = runner(function, arguments, args.calls, args.concurrency)
+            results[label] = result
+            print(f"  {label:<{width}}{result['callsPerSecond']:>9.1f}{result['p50Ms']:>8.1f}"
+                  f"{result['p95Ms']:>8.1f}{result['p99Ms']:>8.1f}{result['errors']:>5}")
+    finally:
+        if server:
+            server.stop()
+
+    print(line)
+    print("  Latencies in ms; calls/s over wall-clock time at the given concurrency")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({
+            "config": {
+                "calls": args.calls, "concurrency": args.concurrency, "items": args.items,
+                "latencyMs": args.latency_ms, "jitterMs": args.jitter_ms, "errorRate": args.error_rate,
+                "sse": args.sse, "cache": os.environ["MCP_CACHE_ENABLED"],
+            },
+            "results": results,
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
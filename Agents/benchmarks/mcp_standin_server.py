@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Stand-in OIC Monitor MCP Server
+
+Small local server that speaks the same JSON-RPC-over-/stream protocol (and /health
+endpoint) as MCPServers/oic-monitor-server, so agent-side throughput can be measured
+without a live OIC tenant. Each tool call sleeps for a configurable latency (plus
+optional uniform jitter) to model the OIC round-trip and returns a synthetic payload:
+list tools return --items items with realistic field values, and --error-rate makes
+a fraction of calls fail like an OIC outage would. With --sse the response is sent as
+a chunked text/event-stream (a progress notification followed by the JSON-RPC
+response), like the Streamable HTTP transport of the real server.
+
+Usage:
+    python mcp_standin_server.py [--port PORT] [--latency-ms MS] [--jitter-ms MS]
+                                 [--items N] [--error-rate R] [--seed S] [--sse]
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+INTEGRATIONS = [f"INT_{name}" for name in (
+    "HELLO_WORLD", "ORDER_SYNC", "INVOICE_EXPORT", "CUSTOMER_UPSERT", "PAYMENT_NOTIFY", "SHIPMENT_STATUS",
+    "EMPLOYEE_FEED", "GL_JOURNAL", "PO_APPROVAL", "ITEM_MASTER",
+)]
+ERROR_MESSAGES = [
+    "Execution failed",
+    "Connection timed out after 30000 ms",
+    "Invalid payload: element 'orderId' is missing",
+    "401 Unauthorized from REST endpoint",
+    "Fault: ORA-00001 unique constraint violated",
+    "Service unavailable (503)",
+]
+DURATION_SECONDS = {"1h": 3600, "6h": 6 * 3600, "1d": 86400, "2d": 2 * 86400, "3d": 3 * 86400}
+OIC_TIMESTAMP = "%Y-%m-%dT%H:%M:%S.{ms:03d}+0000"
+
+
+def _oic_timestamp(epoch_seconds: float) -> str:
+    dt = datetime.fromtimestamp(epoch_seconds, timezone.utc)
+    return dt.strftime(OIC_TIMESTAMP).format(ms=dt.microsecond // 1000)
+
+
+class SyntheticPayloads:
+    """
+    Deterministic synthetic OIC monitoring payloads.
+
+    List tools return `items` items spread over the requested duration window, with a
+    mix of integrations, error messages, statuses and mepTypes. Payloads are generated
+    once per (tool, environment, arguments) and served from memory afterwards, so the
+    stand-in itself stays cheap at large scales.
+    """
+
+    def __init__(self, items: int = 10, seed: int = 0):
+        self.items = items
+        self.seed = seed
+        self._cache: Dict[Tuple[str, str], str] = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, *key: Any) -> random.Random:
+        return random.Random(f"{self.seed}:{':'.join(map(str, key))}")
+
+    def cached(self, tool_name: str, arguments: Dict[str, Any], build: Callable[[], Dict[str, Any]]) -> str:
+        """JSON text of build(), generated once per tool and arguments."""
+        key = (tool_name, json.dumps(arguments, sort_keys=True))
+        with self._lock:
+            text = self._cache.get(key)
+        if text is None:
+            text = json.dumps(build())
+            with self._lock:
+                self._cache[key] = text
+        return text
+
+    def errored_instances(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        environment = arguments.get("environment")
+        rng = self._rng("errors", environment, arguments.get("duration"))
+        now = time.time()
+        window = DURATION_SECONDS.get(str(arguments.get("duration", "1h")).lower(), 3600)
+        items = [
+            {
+                "id": f"err-{environment}-{i:06d}",
+                "integrationInstance": f"{rng.choice(INTEGRATIONS)}|01.00.{rng.randint(0, 3):04d}",
+                "creationDate": _oic_timestamp(now - rng.uniform(0, window)),
+                "errorCode": rng.choice(ERROR_MESSAGES),
+                "recoverable": rng.random() < 0.8,
+            }
+            for i in range(self.items)
+        ]
+        return {"environment": environment, "totalResults": len(items), "items": items}
+
+    def instances(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        environment = arguments.get("environment")
+        status = arguments.get("status")
+        rng = self._rng("instances", environment, arguments.get("duration"), status)
+        now = time.time()
+        window = DURATION_SECONDS.get(str(arguments.get("duration", "1h")).lower(), 3600)
+        fetched = _oic_timestamp(now)
+        items = []
+        for i in range(self.items):
+            integration = rng.choice(INTEGRATIONS)
+            items.append({
+                "id": f"inst-{environment}-{i:06d}",
+                "integration": integration,
+                "integrationName": integration.replace("_", " ").title(),
+                "integrationVersion": "01.00.0000",
+                "status": status or rng.choice(("IN_PROGRESS", "COMPLETED", "FAILED")),
+                "mepType": rng.choice(("ASYNC_ONE_WAY", "ASYNC_ONE_WAY", "SYNC")),
+                "creationDate": _oic_timestamp(now - rng.uniform(0, window)),
+                "dataFetchTime": fetched,
+                "trackings": [{"name": "orderId", "value": f"ORD-{rng.randint(100000, 999999)}"}],
+            })
+        return {"environment": environment, "totalResults": len(items), "items": items}
+
+    def resubmit(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        instance_ids = arguments.get("instanceIds", [])
+        return {
+            "acceptedIds": list(instance_ids),
+            "recoveryJobId": uuid.uuid4().hex[:22],
+            "resubmitRequested": True,
+            "resubmittedInstancesCount": len(instance_ids),
+            "resubmittedFailedInstances": [],
+        }
+
+    def discard(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        instance_ids = arguments.get("instanceIds", [])
+        return {"discardRequested": True, "discardedIds": list(instance_ids), "discardedInstancesCount": len(instance_ids)}
+
+    def recovery_job_details(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {"id": arguments.get("id"), "status": "COMPLETED", "successCount": 10, "failedCount": 0}
+
+    def recovery_jobs(self, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        rng = self._rng("jobs", arguments.get("environment"))
+        now = time.time()
+        items = []
+        for i in range(self.items):
+            created = now - rng.uniform(0, 86400)
+            success = rng.randint(0, 50)
+            items.append({
+                "id": f"job-{i:05d}",
+                "status": rng.choice(("COMPLETED", "COMPLETED", "IN_PROGRESS", "FAILED")),
+                "creationDate": _oic_timestamp(created),
+                "lastUpdatedDate": _oic_timestamp(created + rng.uniform(1, 600)),
+                "successCount": success,
+                "failedCount": rng.randint(0, 5),
+                "resubmittedCount": success,
+            })
+        return {"environment": arguments.get("environment"), "totalResults": len(items), "items": items}
+
+
+# Tool name -> (payload builder, cacheable); writes are never cached
+TOOL_HANDLERS: Dict[str, Tuple[Callable[[SyntheticPayloads, Dict[str, Any]], Dict[str, Any]], bool]] = {
+    "monitoringErroredInstances": (SyntheticPayloads.errored_instances, True),
+    "monitoringInstances": (SyntheticPayloads.instances, True),
+    "monitoringResubmitErroredInstances": (SyntheticPayloads.resubmit, False),
+    "monitoringDiscardErroredInstances": (SyntheticPayloads.discard, False),
+    "monitoringErrorRecoveryJobDetails": (SyntheticPayloads.recovery_job_details, False),
+    "monitoringErrorRecoveryJobs": (SyntheticPayloads.recovery_jobs, True),
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_StandInHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body: Any) -> None:
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _send_sse(self, messages: List[Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for message in messages:
+            event = f"event: message\ndata: {json.dumps(message)}\n\n".encode("utf-8")
+            self.wfile.write(f"{len(event):X}\r\n".encode("ascii") + event + b"\r\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._send_json(200, {"status": "ok", "server": "mcp-standin"})
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if self.path != "/stream":
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            message = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"jsonrpc": "2.0", "id": None, "error": {"code": -32700, "message": "Parse error"}})
+            return
+
+        params = message.get("params", {})
+        tool_name = params.get("name")
+        entry = TOOL_HANDLERS.get(tool_name)
+        if entry is None:
+            self._send_json(200, {
+                "jsonrpc": "2.0",
+                "id": message.get("id"),
+                "error": {"code": -32601, "message": f"Unknown tool: {tool_name}"}
+            })
+            return
+
+        server = self.server
+        delay = server.latency + (random.uniform(0, server.jitter) if server.jitter > 0 else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+        arguments = params.get("arguments", {})
+        # Like the real server, replay the response of a call retried with the same idempotency key
+        idempotency_key = (params.get("_meta") or {}).get("idempotencyKey")
+        with server.lock:
+            replayed = server.idempotent_responses.get(idempotency_key) if idempotency_key else None
+        if replayed is not None:
+            result = replayed
+        elif server.error_rate > 0 and random.random() < server.error_rate:
+            result = {
+                "content": [{"type": "text", "text": json.dumps({"error": "Synthetic OIC error (HTTP 503)"})}],
+                "isError": True,
+            }
+        else:
+            build, cacheable = entry
+            if cacheable:
+                text = server.payloads.cached(tool_name, arguments, lambda: build(server.payloads, arguments))
+            else:
+                text = json.dumps(build(server.payloads, arguments))
+            result = {"content": [{"type": "text", "text": text}]}
+            if idempotency_key:
+                with server.lock:
+                    server.idempotent_responses[idempotency_key] = result
+
+        response = {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+        if server.sse:
+            self._send_sse([
+                {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}},
+                response,
+            ])
+        else:
+            self._send_json(200, response)
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The socketserver default (5) drops connection bursts into 1s SYN retransmits
+    request_queue_size = 256
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    sse: bool = False
+    payloads: SyntheticPayloads
+    idempotent_responses: Dict[str, Any]
+    lock: threading.Lock
+
+
+class StandInMCPServer:
+    """Run the stand-in MCP server on a background thread."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        sse: bool = False,
+        items: int = 10,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0
+    ):
+        self.httpd = _StandInHTTPServer((host, port), _Handler)
+        self.httpd.latency = latency
+        self.httpd.jitter = jitter
+        self.httpd.error_rate = error_rate
+        self.httpd.sse = sse
+        self.httpd.payloads = SyntheticPayloads(items, seed)
+        self.httpd.idempotent_responses = {}
+        self.httpd.lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInMCPServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StandInMCPServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stand-in OIC Monitor MCP server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", "-p", type=int, default=3000)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated OIC latency per tool call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Extra random latency, uniform in [0, MS]")
+    parser.add_argument("--items", type=int, default=10, help="Items returned by each list tool")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of tool calls that fail")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic payloads")
+    parser.add_argument("--sse", action="store_true", help="Answer tool calls with text/event-stream bodies")
+    args = parser.parse_args()
+
+    server = StandInMCPServer(
+        args.host, args.port, args.latency_ms / 1000.0, args.sse,
+        items=args.items, jitter=args.jitter_ms / 1000.0, error_rate=args.error_rate, seed=args.seed
+    )
+    print(f"🚀 Stand-in MCP server listening on {server.url} "
+          f"({args.items} items per list, latency {args.latency_ms:.0f}+{args.jitter_ms:.0f} ms, "
+          f"error rate {args.error_rate:.0%})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Continuous Error Monitoring Daemon
+
+Polls monitoringErroredInstances for every configured environment in a loop and only
+reports errored instances that have not been seen before. Instead of fetching a fixed
+"1h" window every cycle, each environment keeps a watermark (see shared.watermark) of
+the newest creationDate already seen; a cycle fetches the smallest duration bucket that
+covers the gap since then, drops instances it has already seen, and persists the
+watermark in shared state, so a restart resumes without rescanning.
+
+New instances of a cycle are:
+
+    - logged, and appended as JSON lines ({"environment", "polledAt", "items"}) to
+      --output when given
+    - added to errored_instance_ids_by_environment[env] in shared state, where
+      resubmit_errors(environment=env) picks them up; IDs a resubmit accepted are
+      removed from it again
+
+Environments are polled concurrently; a failing environment keeps its watermark and is
+retried next cycle. So does an environment whose window returned fewer instances than
+OIC reports (the MCP server stops paginating at offset 500): its returned instances are
+reported, and the rest once a later poll of the same window returns them.
+
+Configuration (defaults for the command line options):
+
+    MONITOR_DAEMON_ENVIRONMENTS      Comma separated environments, or "all" (default: all)
+    MONITOR_DAEMON_INTERVAL          Seconds between cycles (default: 60)
+    MONITOR_DAEMON_INITIAL_DURATION  Window of the first poll of an environment (default: 1h)
+    MONITOR_WATERMARK_OVERLAP        Seconds re-checked behind the watermark (default: 120)
+
+Usage:
+    python monitor_daemon.py                          # All environments, every minute
+    python monitor_daemon.py -e prod1 -e prod3 --interval 30 --output new_errors.jsonl
+    python monitor_daemon.py --once                   # One cycle, then exit
+    python monitor_daemon.py --reset -e qa3           # Forget qa3's watermark first
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+# Add Agents directory to path to import shared helpers
+sys.path.insert(0, str(Path(__file__).parent))
+
+from shared.fanout import resolve_environments, save_errored_ids
+from shared.mcp_client import get_mcp_client
+from shared.runtime import load_environment
+from shared.tracing import with_current_context
+from shared.watermark import Watermark, load_watermarks, reset_watermarks, save_watermark
+
+load_environment()
+
+logger = logging.getLogger(__name__)
+
+MONITOR_TOOL = "monitoringErroredInstances"
+
+
+class MonitorDaemon:
+    """Incremental errored-instance polling for several environments."""
+
+    def __init__(
+        self,
+        environments: Optional[List[str]] = None,
+        interval: float = 60.0,
+        initial_duration: str = "1h",
+        output: Optional[str] = None,
+        mcp_server_url: Optional[str] = None
+    ):
+        self.environments = resolve_environments(environments)
+        self.interval = interval
+        self.initial_duration = initial_duration
+        self.output = Path(output) if output else None
+        self.client = get_mcp_client(mcp_server_url)
+        stored = load_watermarks()
+        self.watermarks: Dict[str, Watermark] = {env: stored.get(env) or Watermark() for env in self.environments}
+        self.cycles = 0
+        self._stop = threading.Event()
+        self._output_lock = threading.Lock()
+
+    def poll(self, environment: str) -> Dict[str, Any]:
+        """Poll one environment once; returns a summary of the poll."""
+        watermark = self.watermarks[environment]
+        polled_at = time.time()
+        duration = watermark.duration(polled_at, initial=self.initial_duration)
+        result = self.client.call_tool(MONITOR_TOOL, {"environment": environment, "duration": duration})
+        if result.get("isError"):
+            logger.warning(f"{environment}: {result.get('error')} (watermark kept)")
+            return {"environment": environment, "duration": duration, "error": result.get("error")}
+
+        items = result.get("items", []) or []
+        total = result.get("totalResults")
+        truncated = isinstance(total, int) and total > len(items)
+        if truncated:
+            logger.warning(f"{environment}: {duration} window returned {len(items)} of {total} instances "
+                           f"(watermark kept, the window is fetched again next cycle)")
+        new_items = watermark.advance(items, polled_at, complete=not truncated)
+        save_watermark(environment, watermark)
+        if new_items:
+            self.publish(environment, new_items, polled_at)
+        summary = {"environment": environment, "duration": duration, "fetched": len(items), "new": len(new_items)}
+        if truncated:
+            summary["truncated"] = True
+        return summary
+
+    def publish(self, environment: str, items: List[Dict[str, Any]], polled_at: float) -> None:
+        instance_ids = [item.get("id") or item.get("instanceId") for item in items]
+        instance_ids = [instance_id for instance_id in instance_ids if instance_id]
+
+        # Added to the IDs still waiting for a resubmit (resubmits remove the accepted ones)
+        save_errored_ids({environment: instance_ids}, merge=True)
+
+        if self.output:
+            line = json.dumps({"environment": environment, "polledAt": polled_at, "items": items}) + "\n"
+            with self._output_lock:
+                with self.output.open("a", encoding="utf-8") as f:
+                    f.write(line)
+
+    def cycle(self) -> List[Dict[str, Any]]:
+        """Poll every environment concurrently."""
+        with ThreadPoolExecutor(max_workers=len(self.environments)) as pool:
+            polls = list(pool.map(with_current_context(self.poll), self.environments))
+        self.cycles += 1
+        logger.info("Cycle %d: %s", self.cycles, ", ".join(
+            f"{p['environment']} {p['duration']} "
+            + ("error" if p.get("error") else f"{p['new']} new/{p['fetched']}")
+            for p in polls
+        ))
+        return polls
+
+    def run(self, once: bool = False) -> None:
+        while not self._stop.is_set():
+            start = time.monotonic()
+            try:
+                self.cycle()
+            except Exception as e:
+                logger.exception(f"Monitoring cycle failed: {e}")
+            if once:
+                break
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - start)))
+
+    def stop(self, *_) -> None:
+        self._stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuously monitor OIC errored instances incrementally")
+    parser.add_argument("--environment", "-e", action="append",
+                        help="OIC environment (repeatable; default: MONITOR_DAEMON_ENVIRONMENTS or all)")
+    parser.add_argument("--interval", type=float, default=float(os.environ.get("MONITOR_DAEMON_INTERVAL", 60)),
+                        help="Seconds between cycles")
+    parser.add_argument("--initial-duration", default=os.environ.get("MONITOR_DAEMON_INITIAL_DURATION", "1h"),
+                        help="Window of an environment's first poll: 1h, 6h, 1d, 2d, 3d")
+    parser.add_argument("--output", "-o", help="Append new instances to this JSON lines file")
+    parser.add_argument("--once", action="store_true", help="Run a single cycle and exit")
+    parser.add_argument("--reset", action="store_true", help="Forget the watermarks of these environments first")
+    parser.add_argument("--url", help="MCP server URL (default: MCP_SERVER_URL)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    environments = args.environment or os.environ.get("MONITOR_DAEMON_ENVIRONMENTS", "all")
+    if args.reset:
+        reset_watermarks(*resolve_environments(environments))
+
+    daemon = MonitorDaemon(environments, args.interval, args.initial_duration, args.output, args.url)
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, daemon.stop)
+
+    logger.info(f"Monitoring {', '.join(daemon.environments)} every {daemon.interval:g}s")
+    daemon.run(once=args.once)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""
+Shared helpers used by every OIC AgentOps agent.
+
+Modules in this package are imported by the individual agents (CoordinatorAgent,
+MonitorErrorsAgent, MonitorQueueRequestAgent, ResubmitErrorsAgent, RecoveryJobAgent)
+so that cross-cutting concerns such as MCP server access live in one place.
+"""
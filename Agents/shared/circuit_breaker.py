@@ -0,0 +1,178 @@
+"""
+MCP Circuit Breaker
+
+Fails MCP tool calls fast while the MCP server is down. Without it every call during an
+outage waits for its own connection error or timeout (up to MCP_READ_TIMEOUT) before the
+agent can report the problem.
+
+One breaker is kept per MCP endpoint and shared by the sync and async clients:
+
+    closed     Calls go through. MCP_BREAKER_FAILURE_THRESHOLD consecutive failures
+               open the circuit.
+    open       Calls return {"isError": true, "circuitOpen": true, ...} immediately,
+               without touching the network, for MCP_BREAKER_RESET_SECONDS.
+    half_open  Up to MCP_BREAKER_HALF_OPEN_REQUESTS calls are let through as probes; a
+               successful probe closes the circuit, a failed one opens it again.
+
+Only failures of the endpoint itself count: connection errors, timeouts, HTTP 5xx
+responses and streams that end without a response. Tool errors reported by the server
+(e.g. an OIC 404) and HTTP 4xx responses show the server is up and count as successes.
+
+check_mcp_server_health reports the breaker's state under "circuit_breaker"; rejected
+calls are counted as oic_agent_mcp_errors_total{type="circuit_open"}.
+
+Configuration:
+
+    MCP_BREAKER_ENABLED             Enable the breaker (default: true)
+    MCP_BREAKER_FAILURE_THRESHOLD   Consecutive failures that open the circuit (default: 5)
+    MCP_BREAKER_RESET_SECONDS       Time the circuit stays open before probing (default: 30)
+    MCP_BREAKER_HALF_OPEN_REQUESTS  Probe calls allowed at once while half-open (default: 1)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .metrics import record_circuit_rejected
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Error types (see shared.metrics.error_type) that mean the endpoint itself failed
+ENDPOINT_FAILURES = ("connection", "timeout", "no_response", "other")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def is_endpoint_failure(error: Optional[str]) -> bool:
+    """Whether a call's error type counts against the endpoint (None means it succeeded)."""
+    return bool(error) and (error in ENDPOINT_FAILURES or error.startswith("http_5"))
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one MCP endpoint."""
+
+    def __init__(
+        self,
+        endpoint: str,
+        enabled: Optional[bool] = None,
+        failure_threshold: Optional[int] = None,
+        reset_timeout: Optional[float] = None,
+        half_open_requests: Optional[int] = None
+    ):
+        self.endpoint = endpoint
+        self.enabled = _env_bool("MCP_BREAKER_ENABLED", True) if enabled is None else enabled
+        self.failure_threshold = max(1, failure_threshold or int(_env_float("MCP_BREAKER_FAILURE_THRESHOLD", 5)))
+        self.reset_timeout = max(0.0, reset_timeout if reset_timeout is not None
+                                 else _env_float("MCP_BREAKER_RESET_SECONDS", 30))
+        self.half_open_requests = max(1, half_open_requests or int(_env_float("MCP_BREAKER_HALF_OPEN_REQUESTS", 1)))
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.probes = 0
+        self.trips = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _open(self, now: float) -> None:
+        self.state = OPEN
+        self.opened_at = now
+        self.probes = 0
+        self.trips += 1
+
+    def before_call(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """None if the call may go ahead, else the error result to return instead."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self.probes = 0
+            if self.state == CLOSED:
+                return None
+            if self.state == HALF_OPEN and self.probes < self.half_open_requests:
+                self.probes += 1
+                return None
+            self.rejected += 1
+            retry_in = max(0.0, self.reset_timeout - (now - self.opened_at))
+            failures, last_error = self.consecutive_failures, self.last_error
+        record_circuit_rejected(tool_name, arguments)
+        return {
+            "isError": True,
+            "circuitOpen": True,
+            "error": f"OIC Monitor MCP server at {self.endpoint} is unavailable ({failures} consecutive "
+                     f"failures, last: {last_error}); not calling it for another {retry_in:.0f}s."
+        }
+
+    def record(self, error: Optional[str]) -> None:
+        """Report the outcome of a call let through by before_call (error type or None)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if is_endpoint_failure(error):
+                self.consecutive_failures += 1
+                self.last_error = error
+                if self.state == HALF_OPEN or (
+                    self.state == CLOSED and self.consecutive_failures >= self.failure_threshold
+                ):
+                    self._open(time.monotonic())
+            else:
+                self.consecutive_failures = 0
+                if self.state != CLOSED:
+                    self.state = CLOSED
+                    self.opened_at = None
+                    self.probes = 0
+
+    def cancel(self) -> None:
+        """Give back the probe slot of a call that was let through but never sent."""
+        with self._lock:
+            if self.state == HALF_OPEN and self.probes > 0:
+                self.probes -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats: Dict[str, Any] = {
+                "enabled": self.enabled,
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "failureThreshold": self.failure_threshold,
+                "resetSeconds": self.reset_timeout,
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+            if self.last_error and self.consecutive_failures:
+                stats["lastError"] = self.last_error
+            if self.state == OPEN:
+                stats["retryInSeconds"] = round(max(0.0, self.reset_timeout - (time.monotonic() - self.opened_at)), 1)
+        return stats
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(server_url: str) -> CircuitBreaker:
+    """Return the process-wide breaker of an MCP endpoint."""
+    breaker = _breakers.get(server_url)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(server_url)
+            if breaker is None:
+                breaker = _breakers[server_url] = CircuitBreaker(server_url)
+    return breaker
@@ -0,0 +1,183 @@
+"""
+Error Fingerprints and Clusters
+
+Groups errored instances by root cause so an agent can report "412 instances of
+INT_ORDER_SYNC failed with the same timeout" instead of walking the model through
+every instance one by one.
+
+Each instance's error text (errorMessage / errorDetails / errorCode) is normalised into
+a stable pattern: UUIDs, timestamps, URLs, e-mail and IP addresses, quoted literals
+and numbers are replaced by placeholders, every other token with a digit (OIC IDs, hex
+values, order numbers such as ABC123) by <ID>, and whitespace is collapsed, so "timed
+out after 30000 ms for order 'A-1029'" and "timed out after 60000 ms for order 'B-77'"
+share one pattern. Surrounding punctuation, including a trailing ":", is kept as is and
+not classified, so "ORA-00001: unique constraint ..." keeps its error code. The
+fingerprint is a short hash of that pattern.
+
+Instances are then grouped by (integration, errorCode, fingerprint); the integration is
+the integrationInstance name without its version. Every cluster reports its count,
+recoverable count, environments, first/last creationDate and a few example IDs.
+
+Clustering is a single pass over the items with one dictionary lookup per item, and each
+distinct error text is normalised once (plain words are never classified, only tokens
+with digits, "@", "://" or quotes), so the cost is linear in the number of instances
+and mostly depends on how many distinct messages they have.
+"""
+
+import hashlib
+import re
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Fields holding the error text, most specific first
+MESSAGE_FIELDS = ("errorMessage", "errorDetails", "errorDescription", "errorCode")
+DEFAULT_MAX_EXAMPLES = 3
+MAX_PATTERN_CHARS = 300
+
+# Candidate tokens: quoted literals and whitespace-separated runs containing a digit, an
+# "@" or "://". Plain words never reach the (slower) classification below.
+_CANDIDATES = re.compile(r"'[^'\n]*'|\"[^\"\n]*\"|[^\s'\"]*(?:\d|@|://)[^\s'\"]*")
+_PUNCTUATION = "()[]{}<>,;:.!?"
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+_UUID = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+_TIMESTAMP = re.compile(
+    r"\d{4}-\d{2}-\d{2}(?:T\d{2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?)?"
+    r"|\d{1,2}:\d{2}(?::\d{2}(?:[.,]\d+)?)?(?:Z|[+-]\d{2}:?\d{2})?"
+)
+_IP = re.compile(r"\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?")
+_NUMBER = re.compile(r"[+-]?\d+(?:[.,]\d+)*")
+# Codes that stay meaningful with their digits: ORA-00001, OSB-382500, HTTP statuses
+# written as "(503)" or followed by their reason ("401 Unauthorized", "503: Service Unavailable")
+_ERROR_CODE = re.compile(r"[A-Z]{2,5}-\d{3,6}")
+_HTTP_STATUS = re.compile(r"[1-5]\d\d")
+_REASON_PHRASE = re.compile(r"\s+[A-Z][a-z]")
+
+
+def _classify(core: str, lead: str, trail: str, text: str, end: int) -> str:
+    if core.startswith(("http://", "https://")):
+        return "<URL>"
+    if "@" in core and _EMAIL.fullmatch(core):
+        return "<EMAIL>"
+    if _UUID.fullmatch(core):
+        return "<UUID>"
+    if _TIMESTAMP.fullmatch(core):
+        return "<TS>"
+    if _IP.fullmatch(core):
+        return "<IP>"
+    if _ERROR_CODE.fullmatch(core):
+        return core
+    if _HTTP_STATUS.fullmatch(core) and (
+        (lead.endswith("(") and trail.startswith(")")) or (trail in ("", ":") and _REASON_PHRASE.match(text, end))
+    ):
+        return core
+    if _NUMBER.fullmatch(core):
+        return "<N>"
+    if "=" in core:
+        name, _, value = core.partition("=")
+        return f"{name}={_classify(value, '', '', text, end) if value else ''}"
+    return "<ID>"
+
+
+def _replace(match: "re.Match[str]") -> str:
+    token = match.group(0)
+    if token[0] in "'\"":
+        return "<STR>"
+    core = token.strip(_PUNCTUATION)
+    if not core:
+        return token
+    start = token.index(core)
+    lead, trail = token[:start], token[start + len(core):]
+    return lead + _classify(core, lead, trail, match.string, match.end()) + trail
+
+
+def error_text(item: Dict[str, Any]) -> str:
+    """The most specific error text of an errored instance."""
+    for field in MESSAGE_FIELDS:
+        value = item.get(field)
+        if value:
+            return str(value)
+    return ""
+
+
+def normalize_error_message(text: str) -> str:
+    """Replace the variable parts of an error message by placeholders."""
+    return " ".join(_CANDIDATES.sub(_replace, text).split())[:MAX_PATTERN_CHARS]
+
+
+def fingerprint(pattern: str) -> str:
+    """Short stable hash of a normalised error pattern."""
+    return hashlib.sha1(pattern.encode("utf-8")).hexdigest()[:12]
+
+
+def integration_name(item: Dict[str, Any]) -> str:
+    value = item.get("integrationInstance") or item.get("integration") or item.get("integrationName") or ""
+    return str(value).split("|", 1)[0]
+
+
+def cluster_errors(
+    items: Iterable[Dict[str, Any]],
+    max_examples: int = DEFAULT_MAX_EXAMPLES,
+    max_clusters: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Cluster errored instances by (integration, errorCode, fingerprint).
+
+    Returns {"totalInstances", "clusterCount", "clusters": [...]} with clusters sorted by
+    count (largest first); each cluster has integration, errorCode, fingerprint, pattern,
+    count, recoverable, environments ({env: count}, if items are tagged), firstSeen,
+    lastSeen and exampleIds.
+    """
+    patterns: Dict[str, Tuple[str, str]] = {}
+    clusters: Dict[Tuple[str, str, str], Dict[str, Any]] = {}
+    total = 0
+
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        total += 1
+        text = error_text(item)
+        normalized = patterns.get(text)
+        if normalized is None:
+            pattern = normalize_error_message(text)
+            normalized = patterns[text] = (pattern, fingerprint(pattern))
+        pattern, print_ = normalized
+
+        error_code = str(item.get("errorCode") or "")
+        key = (integration_name(item), error_code, print_)
+        cluster = clusters.get(key)
+        if cluster is None:
+            cluster = clusters[key] = {
+                "integration": key[0],
+                "errorCode": error_code,
+                "fingerprint": print_,
+                "pattern": pattern,
+                "count": 0,
+                "recoverable": 0,
+                "environments": {},
+                "firstSeen": None,
+                "lastSeen": None,
+                "exampleIds": [],
+            }
+        cluster["count"] += 1
+        if item.get("recoverable"):
+            cluster["recoverable"] += 1
+        environment = item.get("environment")
+        if environment:
+            cluster["environments"][environment] = cluster["environments"].get(environment, 0) + 1
+        # OIC timestamps of one format compare correctly as strings
+        created = item.get("creationDate")
+        if created:
+            if cluster["firstSeen"] is None or created < cluster["firstSeen"]:
+                cluster["firstSeen"] = created
+            if cluster["lastSeen"] is None or created > cluster["lastSeen"]:
+                cluster["lastSeen"] = created
+        instance_id = item.get("id") or item.get("instanceId")
+        if instance_id and len(cluster["exampleIds"]) < max_examples:
+            cluster["exampleIds"].append(instance_id)
+
+    ordered = sorted(clusters.values(), key=lambda c: (-c["count"], c["integration"], c["errorCode"]))
+    for cluster in ordered:
+        if not cluster["environments"]:
+            del cluster["environments"]
+    if max_clusters is not None and len(ordered) > max_clusters:
+        ordered = ordered[:max_clusters]
+    return {"totalInstances": total, "clusterCount": len(clusters), "clusters": ordered}
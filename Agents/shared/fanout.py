@@ -0,0 +1,205 @@
+"""
+Multi-Environment Fan-Out
+
+Runs one MCP tool against several OIC environments concurrently (threads for the sync
+client, asyncio.gather for the async one) and merges the per-environment results, so
+"check all environments" is one tool call whose wall-clock time is about that of the
+slowest environment instead of the sum of all of them.
+
+Merged result:
+
+    environments    {env: {count, elapsedSeconds, ...scalar fields of that result}}
+    items           Every item, tagged with its "environment"
+    totalItems      Number of merged items
+    succeeded       Environments that answered
+    failed          {env: error message} for environments that failed
+    partialFailure  True if some (but not all) environments failed
+    elapsedSeconds  Wall-clock time of the whole fan-out
+
+If every environment fails the result is {"isError": True, ...} like a single call.
+"""
+
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from .state_store import get_state_store
+from .tracing import with_current_context
+
+logger = logging.getLogger(__name__)
+
+ENVIRONMENTS = ("dev", "qa3", "prod1", "prod3")
+
+
+def resolve_environments(environments: Optional[Union[str, Iterable[str]]] = None) -> List[str]:
+    """Normalise an environment list; None, 'all' or an empty list means every environment."""
+    if isinstance(environments, str):
+        environments = [env for env in environments.replace(" ", "").split(",") if env]
+    envs = [env.strip().lower() for env in environments or [] if env and env.strip()]
+    if not envs or "all" in envs:
+        return list(ENVIRONMENTS)
+    return list(dict.fromkeys(envs))
+
+
+def merge_environment_results(
+    results: List[Tuple[str, Dict[str, Any], float]],
+    elapsed: float,
+    list_key: str = "items"
+) -> Dict[str, Any]:
+    """Merge (environment, result, elapsedSeconds) tuples into one tagged result."""
+    merged: Dict[str, Any] = {
+        "environments": {},
+        list_key: [],
+        "totalItems": 0,
+        "succeeded": [],
+        "failed": {},
+    }
+    for environment, result, env_elapsed in results:
+        if not isinstance(result, dict) or result.get("isError"):
+            error = result.get("error") if isinstance(result, dict) else str(result)
+            merged["failed"][environment] = error
+            continue
+        items = result.get(list_key) or []
+        merged["environments"][environment] = {
+            **{key: value for key, value in result.items() if not isinstance(value, (list, dict))},
+            "count": len(items),
+            "elapsedSeconds": round(env_elapsed, 3),
+        }
+        merged[list_key].extend(
+            {**item, "environment": environment} if isinstance(item, dict) else {"value": item, "environment": environment}
+            for item in items
+        )
+        merged["succeeded"].append(environment)
+
+    merged["totalItems"] = len(merged[list_key])
+    merged["partialFailure"] = bool(merged["failed"]) and bool(merged["succeeded"])
+    merged["elapsedSeconds"] = round(elapsed, 3)
+    if merged["failed"] and not merged["succeeded"]:
+        return {
+            "isError": True,
+            "error": "; ".join(f"{env}: {error}" for env, error in merged["failed"].items()),
+            "failed": merged["failed"],
+        }
+    return merged
+
+
+def fan_out(
+    client,
+    tool_name: str,
+    environments: Optional[Union[str, Iterable[str]]],
+    arguments: Dict[str, Any],
+    list_key: str = "items"
+) -> Dict[str, Any]:
+    """Call tool_name for every environment concurrently through an MCPClient."""
+    envs = resolve_environments(environments)
+    start = time.perf_counter()
+
+    def call(environment: str) -> Tuple[str, Dict[str, Any], float]:
+        env_start = time.perf_counter()
+        result = client.call_tool(tool_name, {**arguments, "environment": environment})
+        return environment, result, time.perf_counter() - env_start
+
+    with ThreadPoolExecutor(max_workers=len(envs)) as pool:
+        results = list(pool.map(with_current_context(call), envs))
+    return merge_environment_results(results, time.perf_counter() - start, list_key)
+
+
+async def fan_out_async(
+    client,
+    tool_name: str,
+    environments: Optional[Union[str, Iterable[str]]],
+    arguments: Dict[str, Any],
+    list_key: str = "items"
+) -> Dict[str, Any]:
+    """Call tool_name for every environment concurrently through an AsyncMCPClient."""
+    envs = resolve_environments(environments)
+    start = time.perf_counter()
+
+    async def call(environment: str) -> Tuple[str, Dict[str, Any], float]:
+        env_start = time.perf_counter()
+        result = await client.call_tool(tool_name, {**arguments, "environment": environment})
+        return environment, result, time.perf_counter() - env_start
+
+    results = await asyncio.gather(*(call(env) for env in envs))
+    return merge_environment_results(list(results), time.perf_counter() - start, list_key)
+
+
+def items_by_environment(merged: Dict[str, Any], list_key: str = "items") -> Dict[str, List[Dict[str, Any]]]:
+    """Group the tagged items of a merged result back by environment."""
+    grouped: Dict[str, List[Dict[str, Any]]] = {env: [] for env in merged.get("succeeded", [])}
+    for item in merged.get(list_key, []):
+        grouped.setdefault(item.get("environment"), []).append(item)
+    return grouped
+
+
+# Shared state key with the errored instance IDs of the last scan of each environment:
+# {env: {"instanceIds": [...], "count": n}}
+ERRORED_IDS_BY_ENVIRONMENT_KEY = "errored_instance_ids_by_environment"
+
+
+def errored_ids_by_environment(merged: Dict[str, Any]) -> Dict[str, List[str]]:
+    """Instance IDs of a merged errored-instances result, per environment."""
+    by_env = {}
+    for environment, items in items_by_environment(merged).items():
+        ids = [item.get("id") or item.get("instanceId") for item in items]
+        by_env[environment] = [instance_id for instance_id in ids if instance_id]
+    return by_env
+
+
+def set_errored_ids(
+    by_environment: Optional[Dict[str, Any]],
+    ids_by_environment: Dict[str, List[str]],
+    merge: bool = False
+) -> Dict[str, Dict[str, Any]]:
+    """Copy of the per-environment ID map with the given environments' IDs replaced (or merged in)."""
+    by_environment = dict(by_environment or {})
+    for environment, instance_ids in ids_by_environment.items():
+        if merge:
+            previous = (by_environment.get(environment) or {}).get("instanceIds") or []
+            instance_ids = list(dict.fromkeys([*previous, *instance_ids]))
+        by_environment[environment] = {"instanceIds": list(instance_ids), "count": len(instance_ids)}
+    return by_environment
+
+
+def save_errored_ids(ids_by_environment: Dict[str, List[str]], merge: bool = False) -> None:
+    """Atomically replace (or merge into) the saved errored IDs of the given environments."""
+    try:
+        get_state_store().update_key(
+            ERRORED_IDS_BY_ENVIRONMENT_KEY, lambda by_env: set_errored_ids(by_env, ids_by_environment, merge), {}
+        )
+    except Exception as e:
+        logger.warning(f"Could not save errored instance IDs: {e}")
+
+
+def remove_errored_ids(environment: str, instance_ids: List[str]) -> None:
+    """Drop instance IDs (e.g. the ones a resubmit accepted) from an environment's saved IDs."""
+    if not instance_ids:
+        return
+    done = set(instance_ids)
+
+    def remove(by_environment):
+        by_environment = dict(by_environment or {})
+        entry = by_environment.get(environment)
+        if entry:
+            remaining = [i for i in entry.get("instanceIds") or [] if i not in done]
+            by_environment[environment] = {"instanceIds": remaining, "count": len(remaining)}
+        return by_environment
+
+    try:
+        get_state_store().update_key(ERRORED_IDS_BY_ENVIRONMENT_KEY, remove, {})
+    except Exception as e:
+        logger.warning(f"Could not update saved errored instance IDs: {e}")
+
+
+def resolve_errored_ids(state: Dict[str, Any], environment: str) -> Tuple[str, List[str]]:
+    """
+    Environment and saved errored instance IDs to resubmit when the caller gave none.
+
+    Only the IDs saved for the requested environment (the last environment in state if
+    none was requested) are used, so a resubmit never picks up another environment's IDs.
+    """
+    environment = environment or state.get("environment") or "qa3"
+    by_environment = state.get(ERRORED_IDS_BY_ENVIRONMENT_KEY) or {}
+    return environment, list((by_environment.get(environment) or {}).get("instanceIds") or [])
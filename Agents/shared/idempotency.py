@@ -0,0 +1,279 @@
+"""
+Idempotent Requests
+
+Runs a non-idempotent operation (a bulk resubmission) at most once per request key
+within a time window, across threads, event loops and agent processes:
+
+    - A completed request's result is stored under its key; an identical request within
+      IDEMPOTENCY_TTL_SECONDS gets that result back (marked "idempotentReplay": true)
+      instead of running again - e.g. a retried A2A request, or the Coordinator and
+      ResubmitErrorsAgent resubmitting the same IDs from shared state.
+    - Concurrent identical requests are coalesced: one runs, the others wait for its
+      result. In one process they share a future; across processes the first one
+      claims the key in shared state ("status": "pending") and the others poll it.
+    - A claim older than IDEMPOTENCY_WAIT_SECONDS is treated as abandoned (its process
+      died) and taken over.
+    - Failed or partly failed results (isError, failedBatches) are not stored, so a
+      retry runs again.
+
+Keys and results live in shared state under "idempotent_requests"; the newest
+IDEMPOTENCY_MAX_ENTRIES entries are kept. Each write call of a request also carries its
+own idempotency key (call_key) to the MCP server, which lets the MCP clients retry it
+safely after a transient failure.
+
+Configuration:
+
+    IDEMPOTENCY_TTL_SECONDS    How long a result is replayed; 0 disables (default: 600)
+    IDEMPOTENCY_WAIT_SECONDS   Longest wait for an identical request in flight (default: 120)
+    IDEMPOTENCY_MAX_ENTRIES    Results kept (default: 100)
+"""
+
+import asyncio
+import copy
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from .state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+STATE_KEY = "idempotent_requests"
+POLL_INTERVAL = 0.25
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def request_key(operation: str, environment: str, instance_ids: Iterable[str]) -> str:
+    """Key of a request: the operation, environment and the sorted set of instance IDs."""
+    digest = hashlib.sha256()
+    digest.update(f"{operation}\n{environment}\n".encode("utf-8"))
+    digest.update("\n".join(sorted(set(instance_ids))).encode("utf-8"))
+    return f"{operation}:{environment}:{digest.hexdigest()[:32]}"
+
+
+def call_key(operation: str, environment: str, instance_ids: Iterable[str]) -> str:
+    """
+    Idempotency key of one write call, sent to the MCP server (see shared.retry): the
+    request key plus a random suffix, so retries of this call share it but a later
+    identical request does not.
+    """
+    return f"{request_key(operation, environment, instance_ids)}:{uuid.uuid4().hex[:12]}"
+
+
+def _replay(result: Dict[str, Any], key: str) -> Dict[str, Any]:
+    replayed = copy.deepcopy(result)
+    replayed["idempotentReplay"] = True
+    replayed["requestKey"] = key
+    return replayed
+
+
+class IdempotentRequests:
+    """Stored results and in-flight claims of idempotent requests."""
+
+    def __init__(self, ttl: Optional[float] = None, wait: Optional[float] = None, max_entries: Optional[int] = None):
+        self.ttl = max(0.0, ttl if ttl is not None else _env_float("IDEMPOTENCY_TTL_SECONDS", 600))
+        self.wait = max(POLL_INTERVAL, wait if wait is not None else _env_float("IDEMPOTENCY_WAIT_SECONDS", 120))
+        self.max_entries = max(1, max_entries or int(_env_float("IDEMPOTENCY_MAX_ENTRIES", 100)))
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self.replays = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    def _prune(self, entries: Dict[str, Any], now: float) -> Dict[str, Any]:
+        live = {
+            key: entry for key, entry in entries.items()
+            if (entry.get("status") == "done" and now - entry.get("completedAt", 0) < self.ttl)
+            or (entry.get("status") == "pending" and now - entry.get("startedAt", 0) < self.wait)
+        }
+        if len(live) > self.max_entries:
+            newest = sorted(live, key=lambda k: live[k].get("completedAt") or live[k].get("startedAt", 0))
+            live = {key: live[key] for key in newest[-self.max_entries:]}
+        return live
+
+    def _claim(self, key: str, token: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """Returns ("done", result), ("pending", None) or ("claimed", None)."""
+        outcome: Dict[str, Any] = {}
+
+        def claim(entries):
+            now = time.time()
+            entries = self._prune(dict(entries or {}), now)
+            entry = entries.get(key)
+            if entry and entry.get("status") == "done":
+                outcome["state"], outcome["result"] = "done", entry.get("result")
+            elif entry and entry.get("status") == "pending":
+                outcome["state"] = "pending"
+            else:
+                entries[key] = {"status": "pending", "owner": token, "startedAt": now}
+                outcome["state"] = "claimed"
+            return entries
+
+        get_state_store().update_key(STATE_KEY, claim, {})
+        return outcome["state"], outcome.get("result")
+
+    def _complete(self, key: str, token: str, result: Optional[Dict[str, Any]]) -> None:
+        def complete(entries):
+            entries = dict(entries or {})
+            entry = entries.get(key)
+            if entry and entry.get("owner") != token:
+                return entries
+            if result is None or result.get("isError") or result.get("failedBatches"):
+                entries.pop(key, None)
+            else:
+                entries[key] = {"status": "done", "owner": token, "completedAt": time.time(), "result": result}
+            return entries
+
+        try:
+            get_state_store().update_key(STATE_KEY, complete, {})
+        except Exception as e:
+            logger.warning(f"Could not store the result of request {key}: {e}")
+
+    def _poll_state(self, key: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        entry = (get_state_store().get(STATE_KEY, {}) or {}).get(key)
+        if not entry:
+            return "missing", None
+        return entry.get("status", "missing"), entry.get("result")
+
+    def _begin(self, key: str) -> Tuple[Future, bool]:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _end(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def run(self, key: str, function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run function at most once for key within the TTL; identical requests get its result."""
+        if not self.enabled:
+            return function()
+        future, owner = self._begin(key)
+        if not owner:
+            return _replay(future.result(), key)
+        try:
+            result = self._run_claimed(key, function)
+        except BaseException as e:
+            self._end(key, future, error=e)
+            raise
+        self._end(key, future, result)
+        return result
+
+    def _run_claimed(self, key: str, function: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait
+        while True:
+            try:
+                state, stored = self._claim(key, token)
+            except Exception as e:
+                logger.warning(f"Could not claim request {key}, running it unguarded: {e}")
+                return function()
+            if state == "done":
+                self.replays += 1
+                return _replay(stored, key)
+            if state == "claimed":
+                break
+            # Another process runs the same request: wait for its result
+            while time.monotonic() < deadline:
+                time.sleep(POLL_INTERVAL)
+                state, stored = self._poll_state(key)
+                if state != "pending":
+                    break
+            if state == "done":
+                self.replays += 1
+                return _replay(stored, key)
+            deadline = time.monotonic() + self.wait
+
+        result = None
+        try:
+            result = function()
+            return result
+        finally:
+            self._complete(key, token, result)
+
+    async def run_async(self, key: str, function: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Async twin of run() for coroutine functions."""
+        if not self.enabled:
+            return await function()
+        future, owner = self._begin(key)
+        if not owner:
+            return _replay(await asyncio.wrap_future(future), key)
+        try:
+            result = await self._run_claimed_async(key, function)
+        except BaseException as e:
+            self._end(key, future, error=e)
+            raise
+        self._end(key, future, result)
+        return result
+
+    async def _run_claimed_async(self, key: str, function: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        # The shared state calls block (BEGIN IMMEDIATE waits up to the busy timeout), so
+        # they run in a worker thread instead of stalling the event loop
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.wait
+        while True:
+            try:
+                state, stored = await asyncio.to_thread(self._claim, key, token)
+            except Exception as e:
+                logger.warning(f"Could not claim request {key}, running it unguarded: {e}")
+                return await function()
+            if state == "done":
+                self.replays += 1
+                return _replay(stored, key)
+            if state == "claimed":
+                break
+            while time.monotonic() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+                state, stored = await asyncio.to_thread(self._poll_state, key)
+                if state != "pending":
+                    break
+            if state == "done":
+                self.replays += 1
+                return _replay(stored, key)
+            deadline = time.monotonic() + self.wait
+
+        result = None
+        try:
+            result = await function()
+            return result
+        finally:
+            await asyncio.to_thread(self._complete, key, token, result)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"ttlSeconds": self.ttl, "replays": self.replays, "coalesced": self.coalesced,
+                "inFlight": len(self._inflight)}
+
+
+_requests: Optional[IdempotentRequests] = None
+_requests_lock = threading.Lock()
+
+
+def get_idempotent_requests() -> IdempotentRequests:
+    """Return the process-wide idempotent request tracker."""
+    global _requests
+    if _requests is None:
+        with _requests_lock:
+            if _requests is None:
+                _requests = IdempotentRequests()
+    return _requests
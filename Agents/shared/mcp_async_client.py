@@ -0,0 +1,278 @@
+"""
+Async MCP Client
+
+asyncio counterpart of shared.mcp_client built on httpx.AsyncClient. The agents register
+async tool functions that await this client, so the ADK runner and the uvicorn-hosted
+A2A apps created by to_a2a can serve many sessions concurrently from one event loop
+instead of blocking it (or a thread) for every in-flight /stream request.
+
+Pool size, keep-alive and timeouts use the same environment variables as the sync
+client (MCP_POOL_SIZE, MCP_KEEPALIVE, MCP_CONNECT_TIMEOUT, MCP_READ_TIMEOUT,
+MCP_HEALTH_TIMEOUT). One client is kept per (event loop, MCP endpoint).
+"""
+
+import asyncio
+import json
+import weakref
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+
+from .mcp_client import (
+    Timeout,
+    _env_bool,
+    _env_float,
+    _env_int,
+    build_tool_call,
+    call_error,
+    connection_error,
+    extract_tool_result,
+    get_mcp_server_url,
+    health_result,
+)
+from .circuit_breaker import get_circuit_breaker
+from .metrics import CallRecorder, error_type, record_cache_hit
+from .projection import get_projection_stats
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+from .retry import (
+    RetryPolicy,
+    budget_timeout,
+    deadline_exceeded,
+    get_retry_policy,
+    is_transient,
+    note_retry,
+    remaining_budget,
+)
+from .sse_stream import STREAM_CHUNK_SIZE, no_response_error, read_jsonrpc_response_async
+
+
+class AsyncMCPClient:
+    """Pooled async HTTP client for a single MCP server endpoint."""
+
+    def __init__(
+        self,
+        server_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        keepalive: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        health_timeout: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.server_url = get_mcp_server_url(server_url)
+        self.pool_size = pool_size or _env_int("MCP_POOL_SIZE", 10)
+        self.keepalive = _env_bool("MCP_KEEPALIVE", True) if keepalive is None else keepalive
+        self.connect_timeout = connect_timeout or _env_float("MCP_CONNECT_TIMEOUT", 5.0)
+        self.read_timeout = read_timeout or _env_float("MCP_READ_TIMEOUT", 60.0)
+        self.health_timeout = health_timeout or _env_float("MCP_HEALTH_TIMEOUT", 5.0)
+        self.cache = cache or get_response_cache()
+        self.limiter = limiter or get_rate_limiter()
+        self.breaker = get_circuit_breaker(self.server_url)
+        self.retry = retry or get_retry_policy()
+
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=self.pool_size,
+                max_keepalive_connections=self.pool_size if self.keepalive else 0,
+            ),
+            timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json, text/event-stream",
+                "Connection": "keep-alive" if self.keepalive else "close",
+            },
+        )
+
+    @property
+    def stream_endpoint(self) -> str:
+        return f"{self.server_url}/stream"
+
+    @property
+    def health_endpoint(self) -> str:
+        return f"{self.server_url}/health"
+
+    def _timeout(self, timeout: Optional[Timeout]) -> httpx.Timeout:
+        if timeout is None:
+            return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+        if isinstance(timeout, tuple):
+            return httpx.Timeout(timeout[1], connect=timeout[0])
+        return httpx.Timeout(timeout, connect=min(self.connect_timeout, timeout))
+
+    async def call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        timeout: Optional[Timeout] = None,
+        use_cache: bool = True,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Call an MCP tool without blocking the event loop.
+
+        Args:
+            tool_name: Name of the MCP tool (e.g. 'monitoringErroredInstances')
+            arguments: Tool arguments
+            timeout: Per-call timeout in seconds, or a (connect, read) tuple
+            use_cache: Serve read-only tools from the response cache when possible
+            idempotency_key: Key of a write (shared.idempotency.request_key); sent to the
+                server, and lets the write be retried on transient failures
+
+        Returns:
+            Decoded tool output, or {"isError": True, "error": ...} on failure.
+        """
+        if use_cache:
+            cached = await self.cache.get_async(self.server_url, tool_name, arguments)
+            if cached is not None:
+                record_cache_hit(tool_name, arguments)
+                return cached
+
+        attempts = self.retry.attempts_for(tool_name, idempotency_key)
+        for attempt in range(attempts):
+            result = self.breaker.before_call(tool_name, arguments)
+            if result is not None:
+                break
+            result = await self.limiter.acquire_async(tool_name, arguments, remaining_budget())
+            if result is not None:
+                self.breaker.cancel()
+                break
+            remaining = remaining_budget()
+            if remaining is not None and remaining <= 0:
+                self.breaker.cancel()
+                result = deadline_exceeded(tool_name, arguments)
+                break
+
+            result, error = await self._call_tool(
+                tool_name, arguments, budget_timeout(timeout, remaining), idempotency_key
+            )
+            if attempt + 1 >= attempts or not is_transient(result, error):
+                break
+            delay = self.retry.delay(attempt)
+            remaining = remaining_budget()
+            if remaining is not None and delay >= remaining:
+                break
+            note_retry(tool_name, arguments, error)
+            await asyncio.sleep(delay)
+
+        if use_cache:
+            self.cache.put(self.server_url, tool_name, arguments, result)
+        # A failed write may still have reached OIC, so writes always invalidate
+        await self.cache.invalidate_for_write_async(tool_name, arguments)
+        return result
+
+    async def _call_tool(self, tool_name: str, arguments: Dict[str, Any], timeout: Optional[Timeout],
+                         idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Send one tool call; returns (result, transport error type or None if the server answered)."""
+        mcp_message = build_tool_call(tool_name, arguments)
+        recorder = CallRecorder(tool_name, arguments)
+        headers = recorder.trace_headers()
+        if headers:
+            # Trace context for the MCP server, in the HTTP headers and the JSON-RPC _meta
+            mcp_message["params"]["_meta"] = dict(headers)
+        if idempotency_key:
+            mcp_message["params"].setdefault("_meta", {})["idempotencyKey"] = idempotency_key
+        body = json.dumps(mcp_message).encode("utf-8")
+        recorder.request_bytes = len(body)
+        try:
+            async with self.client.stream(
+                "POST",
+                self.stream_endpoint,
+                content=body,
+                headers=headers,
+                timeout=self._timeout(timeout)
+            ) as response:
+                response.raise_for_status()
+                message = await read_jsonrpc_response_async(
+                    recorder.count_async(response.aiter_bytes(STREAM_CHUNK_SIZE)),
+                    mcp_message["id"],
+                    response.headers.get("Content-Type", "")
+                )
+            if message is None:
+                recorder.finish(error="no_response")
+                self.breaker.record("no_response")
+                return no_response_error(mcp_message["id"]), "no_response"
+            result = extract_tool_result(message)
+            recorder.finish(result)
+            self.breaker.record(None)
+            return result, None
+
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            recorder.finish(error=error_type(e))
+            self.breaker.record("connection")
+            return connection_error(self.server_url), "connection"
+        except Exception as e:
+            error = error_type(e)
+            recorder.finish(error=error)
+            self.breaker.record(error)
+            return call_error(e), error
+
+    async def health(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Check the MCP server /health endpoint."""
+        recorder = CallRecorder("health")
+        try:
+            response = await self.client.get(
+                self.health_endpoint, timeout=timeout or self.health_timeout, headers=recorder.trace_headers()
+            )
+            recorder.response_bytes = len(response.content)
+            response.raise_for_status()
+            result = health_result(self.server_url, response.json())
+            recorder.finish()
+            result["response_cache"] = self.cache.stats()
+            result["tool_output"] = get_projection_stats()
+            result["rate_limiter"] = self.limiter.stats()
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+        except (httpx.ConnectError, httpx.ConnectTimeout) as e:
+            recorder.finish(error=error_type(e))
+            result = health_result(self.server_url, connection_failed=True)
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+        except Exception as e:
+            recorder.finish(error=error_type(e))
+            result = health_result(self.server_url, error=e)
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+# httpx connection pools are bound to the event loop that created them, so clients
+# are cached per running loop and dropped with it.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, AsyncMCPClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_mcp_client(mcp_server_url: Optional[str] = None) -> AsyncMCPClient:
+    """Return the shared async client for an MCP endpoint on the running event loop."""
+    server_url = get_mcp_server_url(mcp_server_url)
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(server_url)
+    if client is None:
+        client = AsyncMCPClient(server_url)
+        clients[server_url] = client
+    return client
+
+
+async def close_async_mcp_clients() -> None:
+    """Close every async client created on the running event loop."""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.aclose()
+
+
+async def check_mcp_server_health_async(mcp_server_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Check if the OIC Monitor MCP server is running and healthy.
+
+    Args:
+        mcp_server_url: URL of the MCP server (optional)
+
+    Returns:
+        dict: Dictionary containing server health status
+    """
+    return await get_async_mcp_client(mcp_server_url).health()
@@ -0,0 +1,414 @@
+"""
+Shared MCP Client
+
+Pooled, keep-alive HTTP client for the OIC Monitor MCP server. Every agent calls its
+MCP tools through this module so that repeated tool calls reuse TCP connections to
+MCP_SERVER_URL/stream instead of opening a new connection for each request.
+
+One client (and one requests.Session) is kept per MCP endpoint. Pool size, keep-alive
+and timeouts can be configured with environment variables:
+
+    MCP_POOL_SIZE        Maximum pooled connections per endpoint (default: 10)
+    MCP_KEEPALIVE        Keep connections open between calls (default: true)
+    MCP_CONNECT_TIMEOUT  Seconds to wait for a TCP connection (default: 5)
+    MCP_READ_TIMEOUT     Seconds to wait for a tool response (default: 60)
+    MCP_HEALTH_TIMEOUT   Seconds to wait for the /health endpoint (default: 5)
+
+Read-only tools are served through the response cache in shared.response_cache
+(per-tool TTLs, LRU eviction, invalidated by write tools); pass use_cache=False to
+call_tool to force a round-trip. Calls that go to the server first take a token from the
+per-environment rate limiter in shared.rate_limiter (read and write tools separately),
+and fail immediately while the endpoint's circuit breaker (shared.circuit_breaker) is open.
+
+Responses are read incrementally (stream=True) with shared.sse_stream, which stops at
+the JSON-RPC response matching the request id and keeps memory bounded.
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+
+from .circuit_breaker import get_circuit_breaker
+from .metrics import CallRecorder, error_type, record_cache_hit
+from .projection import get_projection_stats
+from .rate_limiter import RateLimiter, get_rate_limiter
+from .response_cache import ResponseCache, get_response_cache
+from .retry import (
+    RetryPolicy,
+    budget_timeout,
+    deadline_exceeded,
+    get_retry_policy,
+    is_transient,
+    note_retry,
+    remaining_budget,
+)
+from .sse_stream import STREAM_CHUNK_SIZE, no_response_error, read_jsonrpc_response
+
+DEFAULT_MCP_SERVER_URL = "http://localhost:3000"
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_mcp_server_url(mcp_server_url: Optional[str] = None) -> str:
+    """Resolve the MCP server URL from the argument or the MCP_SERVER_URL env var."""
+    url = mcp_server_url or os.environ.get("MCP_SERVER_URL", DEFAULT_MCP_SERVER_URL)
+    return url.rstrip("/")
+
+
+def build_tool_call(tool_name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a JSON-RPC tools/call message for the MCP server."""
+    return {
+        "jsonrpc": "2.0",
+        "id": str(uuid.uuid4()),
+        "method": "tools/call",
+        "params": {
+            "name": tool_name,
+            "arguments": arguments
+        }
+    }
+
+
+def extract_tool_result(payload: Any) -> Dict[str, Any]:
+    """
+    Unwrap the text content of an MCP tools/call response.
+
+    The MCP server returns the tool output as JSON text inside result.content.
+    That text is decoded and returned; non-JSON text is returned as {"raw": text}.
+    """
+    if not isinstance(payload, dict):
+        return {"raw": payload}
+
+    if "error" in payload and "result" not in payload:
+        error = payload["error"]
+        message = error.get("message") if isinstance(error, dict) else str(error)
+        return {"isError": True, "error": message}
+
+    container = payload.get("result", payload)
+    if isinstance(container, dict):
+        for item in container.get("content", []) or []:
+            if item.get("type") == "text":
+                text_content = item.get("text", "{}")
+                try:
+                    data = json.loads(text_content)
+                except json.JSONDecodeError:
+                    return {"raw": text_content}
+                if isinstance(data, dict):
+                    if container.get("isError") and "isError" not in data:
+                        data["isError"] = True
+                    return data
+                return {"items": data} if isinstance(data, list) else {"raw": data}
+    return payload
+
+
+def connection_error(server_url: str) -> Dict[str, Any]:
+    return {
+        "isError": True,
+        "error": f"Cannot connect to OIC Monitor MCP server at {server_url}. Make sure the server is running."
+    }
+
+
+def call_error(e: Exception) -> Dict[str, Any]:
+    return {
+        "isError": True,
+        "error": f"Error calling MCP server: {str(e)}"
+    }
+
+
+def health_result(server_url: str, health_data: Any = None, error: Optional[Exception] = None,
+                  connection_failed: bool = False) -> Dict[str, Any]:
+    """Build the check_mcp_server_health response dictionary."""
+    if connection_failed:
+        return {
+            "status": "unhealthy",
+            "server_url": server_url,
+            "server_type": "oic-monitor-mcp",
+            "error_message": f"Cannot connect to OIC Monitor MCP server at {server_url}. Make sure the server is running."
+        }
+    if error is not None:
+        return {
+            "status": "error",
+            "server_url": server_url,
+            "server_type": "oic-monitor-mcp",
+            "error_message": f"Error checking server health: {str(error)}"
+        }
+    return {
+        "status": "healthy",
+        "server_url": server_url,
+        "server_type": "oic-monitor-mcp",
+        "health_check": health_data
+    }
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """HTTPAdapter that enables TCP keep-alive probes on pooled sockets."""
+
+    def __init__(self, keepalive: bool = True, **kwargs):
+        self._keepalive = keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._keepalive:
+            kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+                (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+            ]
+        super().init_poolmanager(*args, **kwargs)
+
+
+class MCPClient:
+    """Pooled HTTP client for a single MCP server endpoint."""
+
+    def __init__(
+        self,
+        server_url: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        keepalive: Optional[bool] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        health_timeout: Optional[float] = None,
+        cache: Optional[ResponseCache] = None,
+        limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        self.server_url = get_mcp_server_url(server_url)
+        self.pool_size = pool_size or _env_int("MCP_POOL_SIZE", 10)
+        self.keepalive = _env_bool("MCP_KEEPALIVE", True) if keepalive is None else keepalive
+        self.connect_timeout = connect_timeout or _env_float("MCP_CONNECT_TIMEOUT", 5.0)
+        self.read_timeout = read_timeout or _env_float("MCP_READ_TIMEOUT", 60.0)
+        self.health_timeout = health_timeout or _env_float("MCP_HEALTH_TIMEOUT", 5.0)
+        self.cache = cache or get_response_cache()
+        self.limiter = limiter or get_rate_limiter()
+        self.breaker = get_circuit_breaker(self.server_url)
+        self.retry = retry or get_retry_policy()
+
+        self.session = requests.Session()
+        adapter = _KeepAliveAdapter(
+            keepalive=self.keepalive,
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "application/json, text/event-stream",
+            "Connection": "keep-alive" if self.keepalive else "close",
+        })
+
+    @property
+    def stream_endpoint(self) -> str:
+        return f"{self.server_url}/stream"
+
+    @property
+    def health_endpoint(self) -> str:
+        return f"{self.server_url}/health"
+
+    def _timeout(self, timeout: Optional[Timeout]) -> Tuple[float, float]:
+        if timeout is None:
+            return (self.connect_timeout, self.read_timeout)
+        if isinstance(timeout, tuple):
+            return timeout
+        return (min(self.connect_timeout, timeout), timeout)
+
+    def call_tool(
+        self,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        timeout: Optional[Timeout] = None,
+        use_cache: bool = True,
+        idempotency_key: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Call an MCP tool over the pooled session.
+
+        Args:
+            tool_name: Name of the MCP tool (e.g. 'monitoringErroredInstances')
+            arguments: Tool arguments
+            timeout: Per-call timeout in seconds, or a (connect, read) tuple
+            use_cache: Serve read-only tools from the response cache when possible
+            idempotency_key: Key of a write (shared.idempotency.request_key); sent to the
+                server, and lets the write be retried on transient failures
+
+        Returns:
+            Decoded tool output, or {"isError": True, "error": ...} on failure.
+        """
+        if use_cache:
+            cached = self.cache.get(self.server_url, tool_name, arguments)
+            if cached is not None:
+                record_cache_hit(tool_name, arguments)
+                return cached
+
+        attempts = self.retry.attempts_for(tool_name, idempotency_key)
+        for attempt in range(attempts):
+            result = self.breaker.before_call(tool_name, arguments)
+            if result is not None:
+                break
+            result = self.limiter.acquire(tool_name, arguments, remaining_budget())
+            if result is not None:
+                self.breaker.cancel()
+                break
+            remaining = remaining_budget()
+            if remaining is not None and remaining <= 0:
+                self.breaker.cancel()
+                result = deadline_exceeded(tool_name, arguments)
+                break
+
+            result, error = self._call_tool(
+                tool_name, arguments, budget_timeout(timeout, remaining), idempotency_key
+            )
+            if attempt + 1 >= attempts or not is_transient(result, error):
+                break
+            delay = self.retry.delay(attempt)
+            remaining = remaining_budget()
+            if remaining is not None and delay >= remaining:
+                break
+            note_retry(tool_name, arguments, error)
+            time.sleep(delay)
+
+        if use_cache:
+            self.cache.put(self.server_url, tool_name, arguments, result)
+        # A failed write may still have reached OIC, so writes always invalidate
+        self.cache.invalidate_for_write(tool_name, arguments)
+        return result
+
+    def _call_tool(self, tool_name: str, arguments: Dict[str, Any], timeout: Optional[Timeout],
+                   idempotency_key: Optional[str] = None) -> Tuple[Dict[str, Any], Optional[str]]:
+        """Send one tool call; returns (result, transport error type or None if the server answered)."""
+        mcp_message = build_tool_call(tool_name, arguments)
+        recorder = CallRecorder(tool_name, arguments)
+        headers = recorder.trace_headers()
+        if headers:
+            # Trace context for the MCP server, in the HTTP headers and the JSON-RPC _meta
+            mcp_message["params"]["_meta"] = dict(headers)
+        if idempotency_key:
+            mcp_message["params"].setdefault("_meta", {})["idempotencyKey"] = idempotency_key
+        body = json.dumps(mcp_message).encode("utf-8")
+        recorder.request_bytes = len(body)
+        try:
+            with self.session.post(
+                self.stream_endpoint,
+                data=body,
+                headers=headers,
+                timeout=self._timeout(timeout),
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                message = read_jsonrpc_response(
+                    recorder.count(response.iter_content(chunk_size=STREAM_CHUNK_SIZE)),
+                    mcp_message["id"],
+                    response.headers.get("Content-Type", "")
+                )
+            if message is None:
+                recorder.finish(error="no_response")
+                self.breaker.record("no_response")
+                return no_response_error(mcp_message["id"]), "no_response"
+            result = extract_tool_result(message)
+            recorder.finish(result)
+            self.breaker.record(None)
+            return result, None
+
+        except requests.exceptions.ConnectionError as e:
+            recorder.finish(error=error_type(e))
+            self.breaker.record("connection")
+            return connection_error(self.server_url), "connection"
+        except Exception as e:
+            error = error_type(e)
+            recorder.finish(error=error)
+            self.breaker.record(error)
+            return call_error(e), error
+
+    def health(self, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Check the MCP server /health endpoint."""
+        recorder = CallRecorder("health")
+        try:
+            response = self.session.get(
+                self.health_endpoint, timeout=timeout or self.health_timeout, headers=recorder.trace_headers()
+            )
+            recorder.response_bytes = len(response.content)
+            response.raise_for_status()
+            result = health_result(self.server_url, response.json())
+            recorder.finish()
+            result["response_cache"] = self.cache.stats()
+            result["tool_output"] = get_projection_stats()
+            result["rate_limiter"] = self.limiter.stats()
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+        except requests.exceptions.ConnectionError as e:
+            recorder.finish(error=error_type(e))
+            result = health_result(self.server_url, connection_failed=True)
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+        except Exception as e:
+            recorder.finish(error=error_type(e))
+            result = health_result(self.server_url, error=e)
+            result["circuit_breaker"] = self.breaker.stats()
+            return result
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_clients: Dict[str, MCPClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_mcp_client(mcp_server_url: Optional[str] = None) -> MCPClient:
+    """Return the shared pooled client for an MCP endpoint, creating it on first use."""
+    server_url = get_mcp_server_url(mcp_server_url)
+    client = _clients.get(server_url)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(server_url)
+            if client is None:
+                client = MCPClient(server_url)
+                _clients[server_url] = client
+    return client
+
+
+def close_mcp_clients() -> None:
+    """Close every pooled client (used on shutdown and in benchmarks)."""
+    with _clients_lock:
+        for client in _clients.values():
+            client.close()
+        _clients.clear()
+
+
+def check_mcp_server_health(mcp_server_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Check if the OIC Monitor MCP server is running and healthy.
+
+    Args:
+        mcp_server_url: URL of the MCP server (optional)
+
+    Returns:
+        dict: Dictionary containing server health status
+    """
+    return get_mcp_client(mcp_server_url).health()
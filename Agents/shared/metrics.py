@@ -0,0 +1,350 @@
+"""
+Prometheus Metrics
+
+In-process metrics for the MCP calls the agents make, exposed in the Prometheus text
+format (version 0.0.4) at /metrics on every A2A server (see mount_metrics). Both MCP
+clients record every tool call and health check, labelled by agent, tool and
+environment:
+
+    oic_agent_mcp_call_duration_seconds   histogram  Round-trip time of calls sent to the MCP server
+    oic_agent_mcp_calls_total             counter    Calls sent to the MCP server
+    oic_agent_mcp_errors_total            counter    Failed calls, by type (connection, timeout,
+                                                     http_<status>, json_decode, too_large,
+                                                     no_response, tool_error, other, and
+                                                     circuit_open / deadline_exceeded for
+                                                     calls refused without sending)
+    oic_agent_mcp_retries_total           counter    Calls retried after a transient failure, by
+                                                     the failure's type (see shared.retry)
+    oic_agent_mcp_request_bytes_total     counter    JSON-RPC request bytes sent
+    oic_agent_mcp_response_bytes_total    counter    Response body bytes received
+    oic_agent_mcp_cache_hits_total        counter    Calls answered by the response cache
+    oic_agent_mcp_rate_limit_wait_seconds histogram  Time calls waited for the rate limiter
+                                                     (see shared.rate_limiter), by tool class
+    oic_agent_mcp_rate_limited_total      counter    Calls that had to wait, or were rejected
+                                                     (outcome="delayed" / "rejected")
+
+Health checks use tool="health". The agent label comes from the A2A request being
+served (mount_metrics installs a middleware that sets it), falling back to the
+AGENT_NAME environment variable or "unknown" outside a request - so agents hosted
+together by a2a_host.py keep separate series.
+
+Configuration:
+
+    METRICS_ENABLED  Set to false to stop recording (default: true)
+"""
+
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional, Tuple
+
+from .tracing import SPAN_KIND_CLIENT, start_span, trace_headers
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LABELS = ("agent", "tool", "environment")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_agent: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("oic_agent_name", default=None)
+
+
+def current_agent() -> str:
+    return _current_agent.get() or os.environ.get("AGENT_NAME", "unknown")
+
+
+def _enabled() -> bool:
+    return os.environ.get("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """Monotonic counter with labels."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: Tuple[str, ...]) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in values]
+
+
+class Histogram:
+    """Cumulative-bucket histogram with labels."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 buckets: Tuple[float, ...] = DURATION_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., count in +Inf only, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            series = self._values.get(labels)
+            if series is None:
+                series = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((labels, list(series)) for labels, series in self._values.items())
+        lines = []
+        for labels, series in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1]):
+                cumulative += count
+                le = 'le="%s"' % _format_value(bound)
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {_format_value(cumulative)}")
+        return lines
+
+
+class MetricsRegistry:
+    """The process's metrics, rendered together for /metrics."""
+
+    def __init__(self):
+        self.call_duration = Histogram(
+            "oic_agent_mcp_call_duration_seconds", "Round-trip time of MCP calls sent to the server", LABELS)
+        self.calls = Counter("oic_agent_mcp_calls_total", "MCP calls sent to the server", LABELS)
+        self.errors = Counter("oic_agent_mcp_errors_total", "Failed MCP calls by error type", LABELS + ("type",))
+        self.request_bytes = Counter("oic_agent_mcp_request_bytes_total", "JSON-RPC request bytes sent", LABELS)
+        self.response_bytes = Counter("oic_agent_mcp_response_bytes_total", "MCP response body bytes received", LABELS)
+        self.cache_hits = Counter("oic_agent_mcp_cache_hits_total", "MCP calls answered by the response cache", LABELS)
+        self.rate_limit_wait = Histogram(
+            "oic_agent_mcp_rate_limit_wait_seconds", "Time MCP calls waited for the rate limiter", LABELS + ("class",))
+        self.rate_limited = Counter(
+            "oic_agent_mcp_rate_limited_total", "MCP calls delayed or rejected by the rate limiter",
+            LABELS + ("class", "outcome"))
+        self.retries = Counter(
+            "oic_agent_mcp_retries_total", "MCP calls retried after a transient failure", LABELS + ("type",))
+        self.metrics = [
+            self.call_duration, self.calls, self.errors, self.request_bytes, self.response_bytes, self.cache_hits,
+            self.rate_limit_wait, self.rate_limited, self.retries,
+        ]
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_registry: Optional[MetricsRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = MetricsRegistry()
+    return _registry
+
+
+def render_metrics() -> str:
+    """All metrics in the Prometheus text exposition format."""
+    return get_metrics_registry().render()
+
+
+def _labels(tool_name: str, arguments: Optional[Dict[str, Any]]) -> Tuple[str, str, str]:
+    environment = (arguments or {}).get("environment") or ""
+    return current_agent(), tool_name, str(environment)
+
+
+def error_type(error: BaseException) -> str:
+    """Metric error type of an exception raised by requests/httpx or the stream reader."""
+    from .sse_stream import ResponseTooLarge
+
+    if isinstance(error, ResponseTooLarge):
+        return "too_large"
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if status:
+        return f"http_{status}"
+    name = type(error).__name__
+    if "Timeout" in name:
+        return "timeout"
+    if "Connect" in name:
+        return "connection"
+    if isinstance(error, ValueError):
+        return "json_decode"
+    return "other"
+
+
+def result_error_type(result: Any) -> Optional[str]:
+    """Metric error type of a decoded tool result, or None if it succeeded."""
+    if not isinstance(result, dict):
+        return None
+    if "raw" in result and len(result) == 1:
+        return "json_decode"
+    if result.get("isError"):
+        return "tool_error"
+    return None
+
+
+class CallRecorder:
+    """
+    Measures one MCP call: starts its trace span (see shared.tracing), counts the
+    response body through count()/count_async() and records the metrics on finish().
+    """
+
+    def __init__(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None, request_bytes: int = 0):
+        self.labels = _labels(tool_name, arguments)
+        self.request_bytes = request_bytes
+        self.response_bytes = 0
+        self.span = start_span(f"mcp {tool_name}", SPAN_KIND_CLIENT, {
+            "rpc.system": "jsonrpc",
+            "rpc.method": "tools/call" if tool_name != "health" else "health",
+            "mcp.tool": tool_name,
+            "oic.environment": self.labels[2],
+            "agent": self.labels[0],
+        })
+        self.start = time.perf_counter()
+
+    def trace_headers(self) -> Dict[str, str]:
+        """Trace context to send with the request (empty when tracing is off)."""
+        return trace_headers(self.span) if self.span else {}
+
+    def count(self, chunks: Iterable[bytes]) -> Iterable[bytes]:
+        for chunk in chunks:
+            self.response_bytes += len(chunk)
+            yield chunk
+
+    async def count_async(self, chunks: AsyncIterable[bytes]) -> AsyncIterable[bytes]:
+        async for chunk in chunks:
+            self.response_bytes += len(chunk)
+            yield chunk
+
+    def finish(self, result: Any = None, error: Optional[str] = None) -> None:
+        error = error or result_error_type(result)
+        if self.span is not None:
+            self.span.set_attribute("http.request.body.size", self.request_bytes)
+            self.span.set_attribute("http.response.body.size", self.response_bytes)
+            if error:
+                message = result.get("error") if isinstance(result, dict) else None
+                self.span.set_error(error, str(message) if message else "")
+            self.span.end()
+        if not _enabled():
+            return
+        try:
+            registry = get_metrics_registry()
+            registry.call_duration.observe(self.labels, time.perf_counter() - self.start)
+            registry.calls.inc(self.labels)
+            registry.request_bytes.inc(self.labels, self.request_bytes)
+            registry.response_bytes.inc(self.labels, self.response_bytes)
+            if error:
+                registry.errors.inc(self.labels + (error,))
+        except Exception as e:
+            logger.warning(f"Could not record MCP call metrics: {e}")
+
+
+def record_cache_hit(tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> None:
+    if _enabled():
+        get_metrics_registry().cache_hits.inc(_labels(tool_name, arguments))
+
+
+def record_circuit_rejected(tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> None:
+    if _enabled():
+        get_metrics_registry().errors.inc(_labels(tool_name, arguments) + ("circuit_open",))
+
+
+def record_deadline_exceeded(tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> None:
+    if _enabled():
+        get_metrics_registry().errors.inc(_labels(tool_name, arguments) + ("deadline_exceeded",))
+
+
+def record_retry(tool_name: str, arguments: Optional[Dict[str, Any]], error: str) -> None:
+    if _enabled():
+        get_metrics_registry().retries.inc(_labels(tool_name, arguments) + (error,))
+
+
+def record_rate_limit(tool_name: str, arguments: Optional[Dict[str, Any]], tool_class: str, wait: float,
+                      rejected: bool = False) -> None:
+    if not _enabled():
+        return
+    registry = get_metrics_registry()
+    labels = _labels(tool_name, arguments) + (tool_class,)
+    if rejected:
+        registry.rate_limited.inc(labels + ("rejected",))
+        return
+    registry.rate_limit_wait.observe(labels, wait)
+    if wait > 0:
+        registry.rate_limited.inc(labels + ("delayed",))
+
+
+class AgentLabelMiddleware:
+    """ASGI middleware that labels the metrics of every request with one agent."""
+
+    def __init__(self, app: Any, agent: str):
+        self.app = app
+        self.agent = agent
+
+    async def __call__(self, scope, receive, send):
+        token = _current_agent.set(self.agent)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_agent.reset(token)
+
+
+def mount_metrics(app: Any, agent: str, path: str = "/metrics") -> Any:
+    """Add the /metrics endpoint and agent labelling to a Starlette app (e.g. from to_a2a)."""
+    from starlette.responses import Response
+
+    async def metrics_endpoint(request):
+        return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+    app.add_route(path, metrics_endpoint, methods=["GET"])
+    app.add_middleware(AgentLabelMiddleware, agent=agent)
+    return app
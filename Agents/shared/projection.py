@@ -0,0 +1,205 @@
+"""
+Tool Output Projection
+
+Agent tools used to return json.dumps(result, indent=2) of the full MCP payload, so
+every LLM turn paid for indentation and for fields no prompt uses. render_tool_output
+is what the tools return instead:
+
+    - list payloads are projected to the fields their agent prompts need
+      (PROJECTIONS, e.g. id / integrationInstance / creationDate / errorCode /
+      recoverable for errored instances)
+    - output is compact JSON (no indentation or spaces)
+    - when the output would exceed the token budget, the item list is truncated and
+      replaced by a summary (totals plus counts by a few key fields) and a
+      "moreAvailable" cursor; calling the tool again with that cursor returns the next
+      page (the MCP response itself is served from the response cache)
+    - bytes before (the old indented full payload) and after are counted per call and
+      per projection; see get_projection_stats() (also reported by
+      check_mcp_server_health)
+
+Configuration:
+
+    TOOL_OUTPUT_TOKEN_BUDGET     Approximate token budget per tool result (default: 4000)
+    TOOL_OUTPUT_CHARS_PER_TOKEN  Characters per token used for the estimate (default: 4)
+    TOOL_OUTPUT_COMPACT          Set to false to return the full indented payload (default: true)
+"""
+
+import json
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# projection name -> list key, item fields to keep (None keeps every field) and the
+# fields summarised when a result is truncated
+PROJECTIONS: Dict[str, Dict[str, Any]] = {
+    "errored_instances": {
+        "list_key": "items",
+        "fields": ("id", "integrationInstance", "creationDate", "errorCode", "recoverable", "environment"),
+        "summarize": ("environment", "errorCode", "integrationInstance"),
+    },
+    "instances": {
+        "list_key": "items",
+        "fields": ("id", "integration", "integrationName", "status", "mepType", "creationDate", "dataFetchTime",
+                   "trackings", "environment"),
+        "summarize": ("environment", "integration", "integrationName", "status", "mepType"),
+    },
+    "queued_instances": {
+        "list_key": "instances",
+        "fields": None,
+        "summarize": ("integration",),
+    },
+    "error_clusters": {
+        "list_key": "clusters",
+        "fields": None,
+        "summarize": ("integration", "errorCode"),
+    },
+    "recovery_jobs": {
+        "list_key": "items",
+        "fields": ("id", "status", "creationDate", "lastUpdatedDate", "successCount", "failedCount",
+                   "resubmittedCount"),
+        "summarize": ("status",),
+    },
+}
+
+# Room kept free for digits added to the counters and cursor of a truncated result
+_CURSOR_RESERVE_CHARS = 32
+_SUMMARY_TOP_VALUES = 10
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def _compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _budget_chars(token_budget: Optional[int]) -> int:
+    budget = token_budget or int(os.environ.get("TOOL_OUTPUT_TOKEN_BUDGET", 4000))
+    chars_per_token = float(os.environ.get("TOOL_OUTPUT_CHARS_PER_TOKEN", 4))
+    return max(1, int(budget * chars_per_token))
+
+
+def _record(projection: str, bytes_before: int, bytes_after: int, truncated: bool) -> None:
+    with _stats_lock:
+        stats = _stats.setdefault(projection, {
+            "calls": 0, "bytesBefore": 0, "bytesAfter": 0, "truncated": 0
+        })
+        stats["calls"] += 1
+        stats["bytesBefore"] += bytes_before
+        stats["bytesAfter"] += bytes_after
+        stats["truncated"] += int(truncated)
+    logger.debug(f"Tool output [{projection}]: {bytes_before} -> {bytes_after} bytes"
+                 f"{' (truncated)' if truncated else ''}")
+
+
+def get_projection_stats() -> Dict[str, Dict[str, Any]]:
+    """Bytes before/after projection per projection name since process start."""
+    with _stats_lock:
+        return {
+            name: {
+                **stats,
+                "reduction": round(1 - stats["bytesAfter"] / stats["bytesBefore"], 4) if stats["bytesBefore"] else 0.0,
+            }
+            for name, stats in _stats.items()
+        }
+
+
+def project_items(items: List[Any], fields: Optional[tuple]) -> List[Any]:
+    if fields is None:
+        return list(items)
+    return [
+        {field: item[field] for field in fields if field in item} if isinstance(item, dict) else item
+        for item in items
+    ]
+
+
+def _summary(items: List[Any], fields: tuple) -> Dict[str, Dict[str, int]]:
+    counts = {}
+    for field in fields:
+        counter = Counter(
+            str(item.get(field)) for item in items if isinstance(item, dict) and item.get(field) is not None
+        )
+        if counter:
+            counts[field] = dict(counter.most_common(_SUMMARY_TOP_VALUES))
+    return counts
+
+
+def render_tool_output(
+    result: Any,
+    projection: Optional[str] = None,
+    cursor: Optional[str] = None,
+    token_budget: Optional[int] = None
+) -> str:
+    """
+    Render a tool result for the model.
+
+    Args:
+        result: Decoded MCP tool output (or any JSON-serialisable tool result)
+        projection: Key of PROJECTIONS for list payloads; None only compacts the result
+        cursor: "moreAvailable.cursor" of a previous truncated call (item offset)
+        token_budget: Approximate token budget (default: TOOL_OUTPUT_TOKEN_BUDGET)
+
+    Returns:
+        JSON string.
+    """
+    name = projection or "default"
+    full = json.dumps(result, indent=2)
+    if os.environ.get("TOOL_OUTPUT_COMPACT", "true").strip().lower() in ("0", "false", "no", "off"):
+        _record(name, len(full), len(full), False)
+        return full
+
+    spec = PROJECTIONS.get(projection) if projection else None
+    items = result.get(spec["list_key"]) if spec and isinstance(result, dict) else None
+    if not isinstance(items, list) or result.get("isError"):
+        text = _compact(result)
+        _record(name, len(full), len(text), False)
+        return text
+
+    list_key = spec["list_key"]
+    try:
+        offset = max(0, int(cursor)) if cursor else 0
+    except ValueError:
+        offset = 0
+
+    output = {key: value for key, value in result.items() if key != list_key}
+    page = project_items(items[offset:], spec["fields"])
+    if offset:
+        output["offset"] = offset
+    output[list_key] = page
+    text = _compact(output)
+    budget = _budget_chars(token_budget)
+    if len(text) <= budget:
+        _record(name, len(full), len(text), False)
+        return text
+
+    # Keep as many whole items as fit next to the summary and cursor
+    output[list_key] = []
+    output["truncated"] = True
+    output["summary"] = {
+        "totalItems": len(items),
+        "returnedItems": 0,
+        "countsByField": _summary(items[offset:], spec["summarize"]),
+    }
+    output["moreAvailable"] = {"cursor": str(len(items)), "remainingItems": len(items)}
+    used = len(_compact(output)) + _CURSOR_RESERVE_CHARS
+    count = 0
+    for item in page:
+        used += len(_compact(item)) + 1
+        # Always return one item, so paging with the cursor makes progress
+        if used > budget and count:
+            break
+        count += 1
+
+    output[list_key] = page[:count]
+    output["summary"]["returnedItems"] = count
+    output["moreAvailable"] = {
+        "cursor": str(offset + count),
+        "remainingItems": len(items) - offset - count,
+    }
+    text = _compact(output)
+    _record(name, len(full), len(text), True)
+    return text
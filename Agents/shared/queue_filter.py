@@ -0,0 +1,165 @@
+"""
+Queue Age Filter
+
+Deterministic version of the filtering MonitorQueueRequestAgent used to ask the model
+to do: keep the monitoringInstances items that are still queued (status IN_PROGRESS,
+mepType ASYNC_ONE_WAY) and have waited longer than a threshold, measured as
+dataFetchTime - creationDate, and convert their creation time to MST for display.
+
+OIC timestamps (2025-11-21T04:33:10.496+0000) are parsed with fixed-position slicing
+rather than strptime, and each distinct string is parsed once per batch - all items of
+one fetch share the same dataFetchTime. Only the matching instances, reduced to the
+fields the agent reports, are returned.
+
+Defaults can be changed with environment variables:
+
+    QUEUE_MIN_AGE_MINUTES    Minimum time in queue (default: 15)
+    QUEUE_MEP_TYPES          Comma-separated mepTypes to keep (default: ASYNC_ONE_WAY)
+    QUEUE_STATUSES           Comma-separated statuses to keep (default: IN_PROGRESS)
+    QUEUE_DISPLAY_UTC_OFFSET Display timezone offset in hours (default: -7)
+    QUEUE_DISPLAY_TZ_NAME    Display timezone label (default: MST)
+"""
+
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+MAX_TRACKING_CHARS = 200
+
+
+def _env_list(name: str, default: str) -> List[str]:
+    return [value.strip().upper() for value in os.environ.get(name, default).split(",") if value.strip()]
+
+
+def parse_oic_timestamp(value: Optional[str]) -> Optional[float]:
+    """
+    Parse an OIC timestamp into epoch seconds.
+
+    Handles 2025-11-21T04:33:10.496+0000 directly and falls back to
+    datetime.fromisoformat for other ISO 8601 variants (Z, +00:00, no fraction).
+    Returns None for missing or unparseable values.
+    """
+    if not value:
+        return None
+    try:
+        if len(value) == 28 and value[19] == "." and value[23] in "+-":
+            # Fast path: YYYY-MM-DDTHH:MM:SS.fff+HHMM
+            dt = datetime(
+                int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                int(value[11:13]), int(value[14:16]), int(value[17:19]),
+                int(value[20:23]) * 1000, tzinfo=timezone.utc
+            )
+            offset = int(value[24:26]) * 3600 + int(value[26:28]) * 60
+            return dt.timestamp() - (offset if value[23] == "+" else -offset)
+        text = value.replace("Z", "+00:00")
+        if len(text) >= 5 and text[-5] in "+-" and text[-3] != ":":
+            text = text[:-2] + ":" + text[-2:]
+        dt = datetime.fromisoformat(text)
+        if dt.tzinfo is None:
+            dt = dt.replace(tzinfo=timezone.utc)
+        return dt.timestamp()
+    except ValueError:
+        return None
+
+
+def format_timestamp(epoch_seconds: float, utc_offset_hours: float, tz_name: str) -> str:
+    tz = timezone(timedelta(hours=utc_offset_hours), tz_name)
+    return datetime.fromtimestamp(epoch_seconds, tz).strftime(f"%Y-%m-%d %H:%M:%S {tz_name}")
+
+
+def _tracking_text(item: Dict[str, Any], max_chars: int) -> str:
+    trackings = item.get("trackings") or item.get("trackingVariables") or []
+    if isinstance(trackings, list):
+        pairs = [
+            f"{t.get('name') or t.get('primaryName')}={t.get('value') or t.get('primaryValue')}"
+            for t in trackings if isinstance(t, dict)
+        ]
+        text = ", ".join(pairs)
+    else:
+        text = str(trackings)
+    if not text and item.get("primaryValue"):
+        text = f"{item.get('primaryName', 'primary')}={item['primaryValue']}"
+    return text[:max_chars]
+
+
+def filter_queued_instances(
+    items: Iterable[Dict[str, Any]],
+    min_age_minutes: Optional[float] = None,
+    mep_types: Optional[Iterable[str]] = None,
+    statuses: Optional[Iterable[str]] = None,
+    utc_offset_hours: Optional[float] = None,
+    tz_name: Optional[str] = None,
+    now: Optional[float] = None,
+) -> Dict[str, Any]:
+    """
+    Return the instances that have been queued longer than min_age_minutes.
+
+    Args:
+        items: monitoringInstances items
+        min_age_minutes: Minimum dataFetchTime - creationDate in minutes
+        mep_types: mepTypes to keep (case-insensitive); empty keeps every mepType
+        statuses: Statuses to keep (case-insensitive); empty keeps every status
+        utc_offset_hours / tz_name: Display timezone for the creation time
+        now: Epoch seconds used when an item has no dataFetchTime (default: current time)
+
+    Returns:
+        {"count", "scanned", "minAgeMinutes", "mepTypes", "statuses", "timezone", "instances"}
+        with instances sorted oldest first.
+    """
+    if min_age_minutes is None:
+        min_age_minutes = float(os.environ.get("QUEUE_MIN_AGE_MINUTES", 15))
+    mep_set = {m.upper() for m in mep_types} if mep_types is not None else set(
+        _env_list("QUEUE_MEP_TYPES", "ASYNC_ONE_WAY"))
+    status_set = {s.upper() for s in statuses} if statuses is not None else set(
+        _env_list("QUEUE_STATUSES", "IN_PROGRESS"))
+    if utc_offset_hours is None:
+        utc_offset_hours = float(os.environ.get("QUEUE_DISPLAY_UTC_OFFSET", -7))
+    tz_name = tz_name or os.environ.get("QUEUE_DISPLAY_TZ_NAME", "MST")
+    now = time.time() if now is None else now
+    min_age_seconds = min_age_minutes * 60
+
+    parsed: Dict[str, Optional[float]] = {}
+
+    def parse(value: Optional[str]) -> Optional[float]:
+        if value not in parsed:
+            parsed[value] = parse_oic_timestamp(value)
+        return parsed[value]
+
+    matches = []
+    scanned = 0
+    for item in items:
+        scanned += 1
+        if mep_set and str(item.get("mepType", "")).upper() not in mep_set:
+            continue
+        if status_set and str(item.get("status", "")).upper() not in status_set:
+            continue
+        created = parse(item.get("creationDate") or item.get("creation-date"))
+        if created is None:
+            continue
+        fetched = parse(item.get("dataFetchTime")) or now
+        age = fetched - created
+        if age <= min_age_seconds:
+            continue
+        matches.append((created, age, item))
+
+    matches.sort(key=lambda match: match[0])
+    return {
+        "count": len(matches),
+        "scanned": scanned,
+        "minAgeMinutes": min_age_minutes,
+        "mepTypes": sorted(mep_set),
+        "statuses": sorted(status_set),
+        "timezone": tz_name,
+        "instances": [
+            {
+                "instanceId": item.get("id") or item.get("instanceId"),
+                "integration": item.get("integrationName") or item.get("integration") or item.get("integrationId"),
+                "integrationVersion": item.get("integrationVersion"),
+                "created": format_timestamp(created, utc_offset_hours, tz_name),
+                "queuedMinutes": round(age / 60, 1),
+                "tracking": _tracking_text(item, MAX_TRACKING_CHARS),
+            }
+            for created, age, item in matches
+        ],
+    }
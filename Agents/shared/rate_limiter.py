@@ -0,0 +1,337 @@
+"""
+MCP Rate Limiter
+
+Client-side token buckets in front of the OIC monitoring API. Fan-out, recovery job
+polling and bulk resubmission together can send more requests than OIC accepts, so every
+MCP tool call that goes to the server (not cache hits) first takes a token from the
+bucket of its (environment, tool class):
+
+    - read   every tool that does not change OIC
+    - write  resubmit, discard and abort (the tools in WRITE_TOOL_INVALIDATES)
+
+A bucket holds up to "burst" tokens and refills at "rate" tokens per second. A call that
+finds the bucket empty reserves the next token and sleeps until it is due, so waiting
+callers are served in arrival order; a call that would have to wait longer than
+RATE_LIMIT_MAX_WAIT_SECONDS, or than what is left of its deadline budget (see
+shared.retry), is not sent and returns {"isError": true, "error": ...}.
+
+The buckets live in a SQLite table (WAL mode, one short BEGIN IMMEDIATE transaction per
+call, run off the event loop by the async client), so the limits hold across every
+agent process when the A2A servers run separately. With RATE_LIMIT_SHARED=false, or if the database cannot be used, each
+process keeps its own buckets.
+
+Time spent waiting is exported as oic_agent_mcp_rate_limit_wait_seconds and
+oic_agent_mcp_rate_limited_total (see shared.metrics); check_mcp_server_health reports
+the limits and counters.
+
+Configuration:
+
+    RATE_LIMIT_ENABLED           Enable the limiter (default: true)
+    RATE_LIMIT_READ_RATE         Read calls per second per environment; 0 = unlimited (default: 10)
+    RATE_LIMIT_READ_BURST        Read calls allowed at once (default: 20)
+    RATE_LIMIT_WRITE_RATE        Write calls per second per environment; 0 = unlimited (default: 2)
+    RATE_LIMIT_WRITE_BURST       Write calls allowed at once (default: 4)
+    RATE_LIMIT_OVERRIDES         Per-environment limits as rate/burst, e.g.
+                                 "prod1.read=5/10,prod1.write=1/2,dev.read=0"
+    RATE_LIMIT_MAX_WAIT_SECONDS  Longest wait for a token before the call fails (default: 30)
+    RATE_LIMIT_SHARED            Share the buckets between processes (default: true)
+    RATE_LIMIT_PATH              SQLite file (default: rate_limits.db next to the shared
+                                 state store)
+"""
+
+import asyncio
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from .metrics import record_rate_limit
+from .response_cache import WRITE_TOOL_INVALIDATES
+from .state_store import AGENTS_DIR
+
+logger = logging.getLogger(__name__)
+
+TOOL_CLASSES = ("read", "write")
+DEFAULT_LIMITS: Dict[str, Tuple[float, float]] = {"read": (10.0, 20.0), "write": (2.0, 4.0)}
+
+# (rate per second, burst)
+Limit = Tuple[float, float]
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def tool_class(tool_name: str) -> str:
+    """Tool class of an MCP tool: write for tools that change OIC, read for everything else."""
+    return "write" if tool_name in WRITE_TOOL_INVALIDATES else "read"
+
+
+def default_limiter_path() -> Path:
+    state_path = os.environ.get("AGENT_STATE_PATH")
+    directory = Path(state_path).parent if state_path else AGENTS_DIR
+    return directory / "rate_limits.db"
+
+
+def _parse_limit(value: str, default_burst: float) -> Limit:
+    rate, _, burst = value.partition("/")
+    rate_value = float(rate)
+    return rate_value, float(burst) if burst else max(default_burst, rate_value)
+
+
+def _parse_overrides(spec: Optional[str], defaults: Dict[str, Limit]) -> Dict[Tuple[str, str], Limit]:
+    overrides: Dict[Tuple[str, str], Limit] = {}
+    for part in (spec or "").split(","):
+        name, sep, value = part.partition("=")
+        environment, _, kind = name.strip().rpartition(".")
+        if not sep or kind not in TOOL_CLASSES or not environment:
+            if part.strip():
+                logger.warning(f"Ignoring invalid RATE_LIMIT_OVERRIDES entry: {part!r}")
+            continue
+        try:
+            overrides[(environment, kind)] = _parse_limit(value.strip(), defaults[kind][1])
+        except ValueError:
+            logger.warning(f"Ignoring invalid RATE_LIMIT_OVERRIDES entry: {part!r}")
+    return overrides
+
+
+class _LocalBuckets:
+    """Token buckets of this process only."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        with self._lock:
+            now = time.time()
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            wait = max(0.0, (1.0 - tokens) / rate)
+            if wait > max_wait:
+                return None
+            self._buckets[key] = (tokens - 1.0, now)
+            return wait
+
+
+class _SQLiteBuckets:
+    """Token buckets shared by every process using the same SQLite file."""
+
+    def __init__(self, path: Path, timeout: float = 30.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " key TEXT PRIMARY KEY,"
+                " tokens REAL NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def reserve(self, key: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        with self._transaction() as conn:
+            # Wall-clock time: the buckets are shared with other processes
+            now = time.time()
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            wait = max(0.0, (1.0 - tokens) / rate)
+            if wait > max_wait:
+                return None
+            conn.execute(
+                "INSERT INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated_at = excluded.updated_at",
+                (key, tokens - 1.0, now)
+            )
+            return wait
+
+
+class RateLimiter:
+    """Per (environment, tool class) token buckets for MCP tool calls."""
+
+    def __init__(
+        self,
+        enabled: Optional[bool] = None,
+        limits: Optional[Dict[str, Limit]] = None,
+        overrides: Optional[Dict[Tuple[str, str], Limit]] = None,
+        max_wait: Optional[float] = None,
+        shared: Optional[bool] = None,
+        path: Optional[Path] = None
+    ):
+        self.enabled = _env_bool("RATE_LIMIT_ENABLED", True) if enabled is None else enabled
+        self.limits = limits or {
+            kind: (
+                _env_float(f"RATE_LIMIT_{kind.upper()}_RATE", rate),
+                _env_float(f"RATE_LIMIT_{kind.upper()}_BURST", burst),
+            )
+            for kind, (rate, burst) in DEFAULT_LIMITS.items()
+        }
+        self.overrides = overrides if overrides is not None else _parse_overrides(
+            os.environ.get("RATE_LIMIT_OVERRIDES"), self.limits)
+        self.max_wait = max(0.0, max_wait if max_wait is not None else _env_float("RATE_LIMIT_MAX_WAIT_SECONDS", 30))
+        self.shared = _env_bool("RATE_LIMIT_SHARED", True) if shared is None else shared
+        self.path = Path(path or os.environ.get("RATE_LIMIT_PATH") or default_limiter_path())
+        self._buckets: Optional[Any] = None
+        self._buckets_lock = threading.Lock()
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._stats_lock = threading.Lock()
+
+    def limit(self, environment: str, kind: str) -> Limit:
+        return self.overrides.get((environment, kind)) or self.limits[kind]
+
+    def _backend(self) -> Any:
+        if self._buckets is None:
+            with self._buckets_lock:
+                if self._buckets is None:
+                    buckets: Any = _LocalBuckets()
+                    if self.shared:
+                        try:
+                            buckets = _SQLiteBuckets(self.path)
+                        except sqlite3.Error as e:
+                            logger.warning(f"Rate limits are per process, cannot open {self.path}: {e}")
+                    self._buckets = buckets
+        return self._buckets
+
+    def _max_wait(self, budget: Optional[float]) -> float:
+        """Longest wait for a token, cut to the time left in the caller's deadline budget."""
+        return self.max_wait if budget is None else max(0.0, min(self.max_wait, budget))
+
+    def _reserve(self, environment: str, kind: str, max_wait: float) -> Optional[float]:
+        rate, burst = self.limit(environment, kind)
+        if rate <= 0:
+            return 0.0
+        key = f"{environment}:{kind}"
+        burst = max(1.0, burst)
+        try:
+            return self._backend().reserve(key, rate, burst, max_wait)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared rate limiter failed, limiting per process: {e}")
+            with self._buckets_lock:
+                self._buckets = _LocalBuckets()
+            return self._buckets.reserve(key, rate, burst, max_wait)
+
+    def _record(self, tool_name: str, arguments: Dict[str, Any], environment: str, kind: str,
+                wait: Optional[float], max_wait: float) -> Optional[Dict[str, Any]]:
+        rejected = wait is None
+        with self._stats_lock:
+            stats = self._stats.setdefault((environment, kind), {
+                "calls": 0, "delayed": 0, "rejected": 0, "waitSeconds": 0.0, "maxWaitSeconds": 0.0})
+            if rejected:
+                stats["rejected"] += 1
+            else:
+                stats["calls"] += 1
+                if wait > 0:
+                    stats["delayed"] += 1
+                    stats["waitSeconds"] += wait
+                    stats["maxWaitSeconds"] = max(stats["maxWaitSeconds"], wait)
+        try:
+            record_rate_limit(tool_name, arguments, kind, wait or 0.0, rejected)
+        except Exception as e:
+            logger.warning(f"Could not record rate limiter metrics: {e}")
+        if rejected:
+            return {
+                "isError": True,
+                "error": f"Rate limit for {kind} calls to {environment or 'the MCP server'} exceeded: "
+                         f"no capacity within {max_wait:g}s. Try again later."
+            }
+        return None
+
+    def _key(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple[str, str]:
+        return str((arguments or {}).get("environment") or ""), tool_class(tool_name)
+
+    def acquire(self, tool_name: str, arguments: Dict[str, Any],
+                budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Wait for a token; returns None when the call may go ahead, else the error result.
+
+        budget is the time left in the caller's deadline budget (shared.retry.remaining_budget);
+        a call that would wait longer fails at once.
+        """
+        if not self.enabled:
+            return None
+        environment, kind = self._key(tool_name, arguments)
+        max_wait = self._max_wait(budget)
+        wait = self._reserve(environment, kind, max_wait)
+        if wait:
+            time.sleep(wait)
+        return self._record(tool_name, arguments, environment, kind, wait, max_wait)
+
+    async def acquire_async(self, tool_name: str, arguments: Dict[str, Any],
+                            budget: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Async twin of acquire(); waits without blocking the event loop."""
+        if not self.enabled:
+            return None
+        environment, kind = self._key(tool_name, arguments)
+        max_wait = self._max_wait(budget)
+        # The shared buckets are SQLite (BEGIN IMMEDIATE with a busy timeout): reserve in a worker thread
+        wait = await asyncio.to_thread(self._reserve, environment, kind, max_wait)
+        if wait:
+            await asyncio.sleep(wait)
+        return self._record(tool_name, arguments, environment, kind, wait, max_wait)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            buckets = {
+                f"{environment or 'default'}:{kind}": dict(stats, waitSeconds=round(stats["waitSeconds"], 3),
+                                                           maxWaitSeconds=round(stats["maxWaitSeconds"], 3))
+                for (environment, kind), stats in sorted(self._stats.items())
+            }
+        return {
+            "enabled": self.enabled,
+            "shared": isinstance(self._buckets, _SQLiteBuckets) if self._buckets is not None else self.shared,
+            "limits": {kind: {"rate": rate, "burst": burst} for kind, (rate, burst) in self.limits.items()},
+            "overrides": {f"{environment}.{kind}": {"rate": rate, "burst": burst}
+                          for (environment, kind), (rate, burst) in self.overrides.items()},
+            "maxWaitSeconds": self.max_wait,
+            "buckets": buckets,
+        }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide MCP rate limiter."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter()
+    return _limiter
@@ -0,0 +1,318 @@
+"""
+Recovery Job Watcher
+
+Tracks every open error recovery job and polls monitoringErrorRecoveryJobDetails for
+all of them concurrently until each reaches a terminal status or a deadline passes.
+This replaces repeated LLM round-trips that only exist to ask "is it done yet?".
+
+Polling is adaptive: each job has its own interval which starts at
+RECOVERY_POLL_INITIAL_INTERVAL seconds (default: 2), grows by RECOVERY_POLL_MULTIPLIER
+(default: 2) while the job reports no progress, is capped at RECOVERY_POLL_MAX_INTERVAL
+(default: 30), resets when the job's status or counts change, and is randomised by
++/- RECOVERY_POLL_JITTER (default: 0.2) so polls from many jobs do not line up.
+
+Open jobs are kept in shared state under "open_recovery_jobs" ({jobId: environment});
+save_resubmit_result registers new jobs there and the watcher removes them once they
+finish. A job whose status cannot be read (unknown ID, wrong environment, ...) in
+RECOVERY_JOB_MAX_FAILED_POLLS (default: 5) watches in a row is dropped from the open
+jobs too, so it is not polled again on every later status check; failures of the MCP
+server itself (transient errors, open circuit, exhausted deadline) do not count. The
+latest status of every watched job is kept under "recovery_job_status".
+"""
+
+import asyncio
+import logging
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from .retry import is_transient
+from .state_store import get_state_store
+from .tracing import with_current_context
+
+logger = logging.getLogger(__name__)
+
+RECOVERY_JOB_TOOL = "monitoringErrorRecoveryJobDetails"
+
+# Number of job statuses kept under "recovery_job_status" (most recent first)
+MAX_TRACKED_JOB_STATUSES = 200
+# {jobId: watches in a row whose last poll of the job failed}
+POLL_FAILURES_KEY = "recovery_job_poll_failures"
+
+TERMINAL_STATUSES = {
+    "COMPLETED",
+    "FAILED",
+    "ABORTED",
+    "CANCELLED",
+    "CANCELED",
+    "PARTIALLY_COMPLETED",
+    "COMPLETED_WITH_ERRORS",
+    "ERROR",
+}
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def job_status(details: Dict[str, Any]) -> Optional[str]:
+    """Return the normalised status of a recovery job details payload."""
+    status = details.get("status") or details.get("state")
+    return str(status).upper() if status else None
+
+
+def is_terminal(details: Dict[str, Any]) -> bool:
+    return job_status(details) in TERMINAL_STATUSES
+
+
+def _is_job_failure(result: Dict[str, Any]) -> bool:
+    """Whether a failed poll points at the job itself rather than at the MCP server."""
+    if not result.get("isError") or result.get("circuitOpen") or result.get("deadlineExceeded"):
+        return False
+    return not is_transient(result, None)
+
+
+def _progress_key(details: Dict[str, Any]) -> Any:
+    """Fields whose change counts as progress (resets the poll interval)."""
+    return (
+        job_status(details),
+        details.get("successCount"),
+        details.get("failedCount"),
+        details.get("resubmittedCount"),
+        details.get("processedCount"),
+    )
+
+
+def register_open_jobs(job_ids: List[str], environment: str) -> None:
+    """Add recovery jobs to the set of jobs the watcher tracks."""
+    if not job_ids:
+        return
+
+    def add(open_jobs):
+        open_jobs = dict(open_jobs or {})
+        for job_id in job_ids:
+            open_jobs[job_id] = environment
+        return open_jobs
+
+    try:
+        get_state_store().update_key("open_recovery_jobs", add, {})
+    except Exception as e:
+        logger.warning(f"Could not register open recovery jobs: {e}")
+
+
+def resolve_recovery_jobs(environment: str, job_ids: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Return the jobs to watch as {jobId: environment}.
+
+    Explicit job IDs use the given environment. Otherwise every job from the last
+    resubmission plus every still-open job in shared state is returned.
+    """
+    if job_ids:
+        return {job_id: environment for job_id in job_ids}
+    store = get_state_store()
+    last_environment = store.get("environment", environment)
+    jobs = {job_id: last_environment for job_id in store.get("last_recovery_job_ids", []) or []}
+    jobs.update(get_open_jobs())
+    return jobs
+
+
+def get_open_jobs(environment: Optional[str] = None) -> Dict[str, str]:
+    """Return open recovery jobs ({jobId: environment}), optionally for one environment."""
+    open_jobs = get_state_store().get("open_recovery_jobs", {}) or {}
+    if environment:
+        return {job_id: env for job_id, env in open_jobs.items() if env == environment}
+    return dict(open_jobs)
+
+
+class RecoveryJobWatcher:
+    """Poll schedule and results for a set of recovery jobs (transport independent)."""
+
+    def __init__(
+        self,
+        jobs: Dict[str, str],
+        initial_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        multiplier: Optional[float] = None,
+        jitter: Optional[float] = None,
+    ):
+        self.initial_interval = initial_interval or _env_float("RECOVERY_POLL_INITIAL_INTERVAL", 2.0)
+        self.max_interval = max_interval or _env_float("RECOVERY_POLL_MAX_INTERVAL", 30.0)
+        self.multiplier = multiplier or _env_float("RECOVERY_POLL_MULTIPLIER", 2.0)
+        self.jitter = _env_float("RECOVERY_POLL_JITTER", 0.2) if jitter is None else jitter
+        self.max_failed_polls = max(1, int(_env_float("RECOVERY_JOB_MAX_FAILED_POLLS", 5)))
+
+        self.jobs = dict(jobs)
+        self.details: Dict[str, Dict[str, Any]] = {}
+        self.open = set(self.jobs)
+        self.polls = 0
+        self._interval = {job_id: self.initial_interval for job_id in self.jobs}
+        self._next_poll = {job_id: 0.0 for job_id in self.jobs}
+        self._progress: Dict[str, Any] = {}
+        self.expired: List[str] = []
+
+    def due(self, now: float) -> List[str]:
+        return [job_id for job_id in self.open if self._next_poll[job_id] <= now]
+
+    def next_wake(self) -> Optional[float]:
+        if not self.open:
+            return None
+        return min(self._next_poll[job_id] for job_id in self.open)
+
+    def record(self, job_id: str, result: Dict[str, Any], now: float) -> None:
+        """Record a poll result and schedule the job's next poll."""
+        self.polls += 1
+        self.details[job_id] = result
+        if not result.get("isError") and is_terminal(result):
+            self.open.discard(job_id)
+            return
+
+        progress = None if result.get("isError") else _progress_key(result)
+        if progress is not None and progress != self._progress.get(job_id):
+            self._interval[job_id] = self.initial_interval
+        else:
+            self._interval[job_id] = min(self._interval[job_id] * self.multiplier, self.max_interval)
+        if progress is not None:
+            self._progress[job_id] = progress
+
+        delay = self._interval[job_id] * random.uniform(1 - self.jitter, 1 + self.jitter)
+        self._next_poll[job_id] = now + delay
+
+    def persist(self) -> None:
+        """Drop finished (and expired) jobs from open_recovery_jobs and store the latest statuses."""
+        finished = [job_id for job_id in self.jobs if job_id not in self.open]
+        failed = [job_id for job_id in self.open if _is_job_failure(self.details.get(job_id, {}))]
+        answered = [job_id for job_id, details in self.details.items() if not details.get("isError")]
+        now = time.time()
+        statuses = {
+            job_id: {
+                "environment": self.jobs[job_id],
+                "status": job_status(details) if not details.get("isError") else None,
+                "error": details.get("error") if details.get("isError") else None,
+                "updatedAt": now,
+            }
+            for job_id, details in self.details.items()
+        }
+
+        def merge_statuses(current):
+            merged = {**(current or {}), **statuses}
+            newest = sorted(merged.items(), key=lambda item: item[1].get("updatedAt", 0), reverse=True)
+            return dict(newest[:MAX_TRACKED_JOB_STATUSES])
+
+        def count_failures(failures):
+            failures = {k: v for k, v in (failures or {}).items() if k not in answered and k not in finished}
+            for job_id in failed:
+                failures[job_id] = failures.get(job_id, 0) + 1
+            self.expired = [job_id for job_id in failed if failures[job_id] >= self.max_failed_polls]
+            for job_id in self.expired:
+                del failures[job_id]
+            return failures
+
+        try:
+            store = get_state_store()
+            if failed or answered or finished:
+                store.update_key(POLL_FAILURES_KEY, count_failures, {})
+            if self.expired:
+                logger.warning(f"Giving up on recovery jobs whose status cannot be read: {', '.join(self.expired)}")
+            dropped = set(finished) | set(self.expired)
+            if dropped:
+                store.update_key(
+                    "open_recovery_jobs",
+                    lambda open_jobs: {k: v for k, v in (open_jobs or {}).items() if k not in dropped},
+                    {}
+                )
+            store.update_key("recovery_job_status", merge_statuses, {})
+        except Exception as e:
+            logger.warning(f"Could not persist recovery job status: {e}")
+
+    def summary(self, elapsed: float, timed_out: bool) -> Dict[str, Any]:
+        status_counts: Dict[str, int] = {}
+        for job_id in self.jobs:
+            details = self.details.get(job_id, {})
+            status = "ERROR_POLLING" if details.get("isError") else (job_status(details) or "UNKNOWN")
+            status_counts[status] = status_counts.get(status, 0) + 1
+        return {
+            "jobs": {
+                job_id: {"environment": env, **self.details.get(job_id, {})}
+                for job_id, env in self.jobs.items()
+            },
+            "statusCounts": status_counts,
+            "openJobIds": sorted(self.open),
+            **({"expiredJobIds": sorted(self.expired)} if self.expired else {}),
+            "allDone": not self.open,
+            "timedOut": timed_out,
+            "polls": self.polls,
+            "elapsedSeconds": round(elapsed, 2),
+        }
+
+
+def watch_recovery_jobs(
+    client,
+    jobs: Dict[str, str],
+    timeout: float = 0.0,
+    max_workers: int = 8,
+    **watcher_options
+) -> Dict[str, Any]:
+    """
+    Poll recovery jobs through an MCPClient until all are terminal or timeout passes.
+
+    timeout=0 polls every job exactly once.
+    """
+    watcher = RecoveryJobWatcher(jobs, **watcher_options)
+    start = time.monotonic()
+    deadline = start + max(timeout, 0.0)
+
+    def poll(job_id: str) -> Dict[str, Any]:
+        return client.call_tool(RECOVERY_JOB_TOOL, {"environment": jobs[job_id], "id": job_id})
+
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs) or 1))) as pool:
+        while True:
+            now = time.monotonic()
+            due = watcher.due(now)
+            for job_id, result in zip(due, pool.map(with_current_context(poll), due)):
+                watcher.record(job_id, result, time.monotonic())
+            next_wake = watcher.next_wake()
+            if next_wake is None or next_wake >= deadline:
+                break
+            time.sleep(max(0.0, next_wake - time.monotonic()))
+
+    watcher.persist()
+    return watcher.summary(time.monotonic() - start, timed_out=bool(watcher.open) and timeout > 0)
+
+
+async def watch_recovery_jobs_async(
+    client,
+    jobs: Dict[str, str],
+    timeout: float = 0.0,
+    **watcher_options
+) -> Dict[str, Any]:
+    """
+    Poll recovery jobs through an AsyncMCPClient until all are terminal or timeout passes.
+
+    timeout=0 polls every job exactly once.
+    """
+    watcher = RecoveryJobWatcher(jobs, **watcher_options)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    deadline = start + max(timeout, 0.0)
+
+    async def poll(job_id: str) -> Dict[str, Any]:
+        return await client.call_tool(RECOVERY_JOB_TOOL, {"environment": jobs[job_id], "id": job_id})
+
+    while True:
+        due = watcher.due(loop.time())
+        results = await asyncio.gather(*(poll(job_id) for job_id in due))
+        for job_id, result in zip(due, results):
+            watcher.record(job_id, result, loop.time())
+        next_wake = watcher.next_wake()
+        if next_wake is None or next_wake >= deadline:
+            break
+        await asyncio.sleep(max(0.0, next_wake - loop.time()))
+
+    # persist() runs shared state transactions (SQLite): keep them off the event loop
+    await asyncio.to_thread(watcher.persist)
+    return watcher.summary(loop.time() - start, timed_out=bool(watcher.open) and timeout > 0)
@@ -0,0 +1,272 @@
+"""
+MCP Response Cache
+
+Read-through cache in front of the read-only OIC Monitor MCP tools. Operators and the
+Coordinator repeat the same monitoringErroredInstances / monitoringInstances query for
+the same (environment, duration, status) many times a minute; with the cache only the
+first of those goes to the MCP server (and through the paginated OIC API calls).
+
+    - Entries are keyed by (MCP endpoint, tool name, canonical JSON arguments).
+    - Every cacheable tool has its own TTL (READ_TOOL_TTLS); tools not listed there,
+      including every write tool, are never cached.
+    - The cache is bounded (LRU eviction once MCP_CACHE_MAX_ENTRIES is reached).
+    - Error responses are never cached.
+    - Write tools (resubmit, discard, abort) invalidate the cached reads they affect for
+      the same environment, in this process and - through the shared state key
+      "mcp_cache_invalidated" ({environment: timestamp}) - in every other agent process.
+    - Hits, misses, evictions, expirations and invalidations are counted; see
+      get_cache_stats() (also reported by check_mcp_server_health).
+
+The invalidation marks live in the shared state store (SQLite), so the async client uses
+get_async / invalidate_for_write_async, which read and publish them in a worker thread.
+
+Configuration:
+
+    MCP_CACHE_ENABLED      Enable the cache (default: true)
+    MCP_CACHE_MAX_ENTRIES  Maximum cached responses per process (default: 256)
+    MCP_CACHE_TTLS         Per-tool TTL overrides in seconds, e.g.
+                           "monitoringErroredInstances=10,monitoringInstances=5"
+                           (a TTL of 0 disables caching for that tool)
+"""
+
+import asyncio
+import copy
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from .state_store import get_state_store
+
+logger = logging.getLogger(__name__)
+
+# Default TTL (seconds) per read-only tool. Recovery job details are deliberately not
+# cached: the recovery watcher polls them to see status changes.
+READ_TOOL_TTLS: Dict[str, float] = {
+    "monitoringErroredInstances": 30,
+    "monitoringErroredInstanceDetails": 30,
+    "monitoringInstances": 30,
+    "monitoringInstanceDetails": 30,
+    "monitoringMessageCountSummary": 30,
+    "monitoringErrorRecoveryJobs": 15,
+    "monitoringIntegrations": 300,
+    "monitoringIntegrationDetails": 300,
+    "monitoringAgentGroups": 300,
+    "monitoringAgentGroupDetails": 300,
+    "monitoringAgentsInGroup": 300,
+    "monitoringAgentDetails": 300,
+}
+
+_INSTANCE_READS = (
+    "monitoringErroredInstances",
+    "monitoringErroredInstanceDetails",
+    "monitoringInstances",
+    "monitoringInstanceDetails",
+    "monitoringMessageCountSummary",
+)
+
+# Write tool -> cached read tools whose results it changes (within one environment)
+WRITE_TOOL_INVALIDATES: Dict[str, Tuple[str, ...]] = {
+    "monitoringResubmitErroredInstances": _INSTANCE_READS + ("monitoringErrorRecoveryJobs",),
+    "monitoringResubmitErroredInstance": _INSTANCE_READS + ("monitoringErrorRecoveryJobs",),
+    "monitoringDiscardErroredInstances": _INSTANCE_READS,
+    "monitoringDiscardErroredInstance": _INSTANCE_READS,
+    "monitoringAbortInstance": _INSTANCE_READS,
+}
+
+INVALIDATION_STATE_KEY = "mcp_cache_invalidated"
+
+CacheKey = Tuple[str, str, str]
+
+
+def _parse_ttls(spec: Optional[str]) -> Dict[str, float]:
+    ttls: Dict[str, float] = {}
+    for part in (spec or "").split(","):
+        name, sep, value = part.partition("=")
+        if not sep:
+            continue
+        try:
+            ttls[name.strip()] = float(value)
+        except ValueError:
+            logger.warning(f"Ignoring invalid MCP_CACHE_TTLS entry: {part!r}")
+    return ttls
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of MCP tool responses with per-tool TTLs."""
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttls: Optional[Dict[str, float]] = None,
+        enabled: Optional[bool] = None,
+        shared_invalidation: bool = True,
+    ):
+        if enabled is None:
+            enabled = os.environ.get("MCP_CACHE_ENABLED", "true").strip().lower() in ("1", "true", "yes", "on")
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries or int(os.environ.get("MCP_CACHE_MAX_ENTRIES", 256)))
+        self.ttls = {**READ_TOOL_TTLS, **_parse_ttls(os.environ.get("MCP_CACHE_TTLS")), **(ttls or {})}
+        self.shared_invalidation = shared_invalidation
+
+        # key -> (expires_at, created_at, environment, value)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, float, Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ttl(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, 0)
+
+    def cacheable(self, tool_name: str) -> bool:
+        return self.enabled and self.ttl(tool_name) > 0
+
+    @staticmethod
+    def key(server_url: str, tool_name: str, arguments: Dict[str, Any]) -> CacheKey:
+        return (server_url, tool_name, json.dumps(arguments, sort_keys=True, default=str))
+
+    def _invalidated_at(self, environment: Optional[str]) -> float:
+        if not self.shared_invalidation:
+            return 0.0
+        try:
+            marks = get_state_store().get(INVALIDATION_STATE_KEY, {}) or {}
+        except Exception as e:
+            logger.warning(f"Could not read cache invalidation marks: {e}")
+            return 0.0
+        return max(marks.get(environment or "", 0.0), marks.get("*", 0.0))
+
+    def get(self, server_url: str, tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached response, or None (counted as a miss)."""
+        if not self.cacheable(tool_name):
+            return None
+        key = self.key(server_url, tool_name, arguments)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+        if entry is not None and entry[1] <= self._invalidated_at(entry[2]):
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self.invalidations += 1
+            entry = None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(entry[3])
+
+    async def get_async(self, server_url: str, tool_name: str, arguments: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Async twin of get(); checks the shared invalidation marks in a worker thread."""
+        if not self.cacheable(tool_name):
+            return None
+        if not self.shared_invalidation:
+            return self.get(server_url, tool_name, arguments)
+        return await asyncio.to_thread(self.get, server_url, tool_name, arguments)
+
+    def put(self, server_url: str, tool_name: str, arguments: Dict[str, Any], value: Dict[str, Any]) -> None:
+        """Cache a successful response of a cacheable tool."""
+        if not self.cacheable(tool_name) or not isinstance(value, dict) or value.get("isError"):
+            return
+        key = self.key(server_url, tool_name, arguments)
+        now = time.time()
+        entry = (now + self.ttl(tool_name), now, arguments.get("environment"), copy.deepcopy(value))
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, environment: Optional[str] = None, tools: Optional[Tuple[str, ...]] = None) -> int:
+        """Drop cached entries for an environment (None = all) and tools (None = all)."""
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if (environment is None or entry[2] == environment) and (tools is None or key[1] in tools)
+            ]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_for_write(self, tool_name: str, arguments: Dict[str, Any]) -> None:
+        """Invalidate the reads affected by a write tool, locally and for other agent processes."""
+        tools = WRITE_TOOL_INVALIDATES.get(tool_name)
+        if tools is None:
+            return
+        environment = arguments.get("environment")
+        self.invalidate(environment, tools)
+        if self.shared_invalidation:
+            self._publish_invalidation(environment)
+
+    async def invalidate_for_write_async(self, tool_name: str, arguments: Dict[str, Any]) -> None:
+        """Async twin of invalidate_for_write(); publishes the mark in a worker thread."""
+        tools = WRITE_TOOL_INVALIDATES.get(tool_name)
+        if tools is None:
+            return
+        environment = arguments.get("environment")
+        self.invalidate(environment, tools)
+        if self.shared_invalidation:
+            await asyncio.to_thread(self._publish_invalidation, environment)
+
+    def _publish_invalidation(self, environment: Optional[str]) -> None:
+        mark = environment or "*"
+        now = time.time()
+        try:
+            get_state_store().update_key(
+                INVALIDATION_STATE_KEY,
+                lambda marks: {**(marks or {}), mark: now},
+                {}
+            )
+        except Exception as e:
+            logger.warning(f"Could not publish cache invalidation: {e}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the process-wide response cache shared by the sync and async MCP clients."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache()
+    return _cache
+
+
+def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters and size of the process-wide response cache."""
+    return get_response_cache().stats()
@@ -0,0 +1,248 @@
+"""
+Bulk Resubmission
+
+The monitoringResubmitErroredInstances API accepts at most 50 instance IDs per call.
+These helpers split any number of IDs into API-sized batches, send the batches with
+bounded concurrency, and merge the per-batch responses into one bulk result:
+
+    acceptedIds                 All accepted IDs across batches
+    recoveryJobId               First recovery job ID (kept for existing callers)
+    recoveryJobIds              Every recovery job ID, one per successful batch
+    resubmitRequested           True if any batch was accepted
+    resubmittedInstancesCount   Sum over batches
+    resubmittedFailedInstances  Failed instances across batches
+    batchCount                  Number of batches sent
+    failedBatches               Batches whose call failed (IDs + error), if any
+    skippedIds                  IDs not sent because they were resubmitted within the
+                                cool-down (see shared.resubmit_index), if any
+    skippedRecoveryJobIds       Recovery jobs of those earlier resubmissions
+    idempotentReplay            True if this is the stored result of an identical earlier
+                                (or concurrent) request (see shared.idempotency)
+
+Batch size and concurrency are configurable with MCP_RESUBMIT_BATCH_SIZE (default: 50)
+and MCP_RESUBMIT_CONCURRENCY (default: 4).
+"""
+
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .fanout import remove_errored_ids
+from .idempotency import call_key, get_idempotent_requests, request_key
+from .recovery_watcher import register_open_jobs
+from .resubmit_index import get_resubmit_index
+from .state_store import update_shared_state
+from .tracing import with_current_context
+
+logger = logging.getLogger(__name__)
+
+RESUBMIT_TOOL = "monitoringResubmitErroredInstances"
+MAX_RESUBMIT_BATCH_SIZE = 50
+
+
+def _batch_size(batch_size: Optional[int]) -> int:
+    size = batch_size or int(os.environ.get("MCP_RESUBMIT_BATCH_SIZE", MAX_RESUBMIT_BATCH_SIZE))
+    return max(1, min(size, MAX_RESUBMIT_BATCH_SIZE))
+
+
+def _concurrency(concurrency: Optional[int]) -> int:
+    return max(1, concurrency or int(os.environ.get("MCP_RESUBMIT_CONCURRENCY", 4)))
+
+
+def chunk_ids(instance_ids: List[str], batch_size: Optional[int] = None) -> List[List[str]]:
+    """De-duplicate instance IDs (keeping order) and split them into API-sized batches."""
+    unique_ids = list(dict.fromkeys(instance_ids))
+    size = _batch_size(batch_size)
+    return [unique_ids[i:i + size] for i in range(0, len(unique_ids), size)]
+
+
+def merge_resubmit_results(batches: List[List[str]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-batch resubmit responses into a single bulk result."""
+    merged: Dict[str, Any] = {
+        "acceptedIds": [],
+        "recoveryJobId": None,
+        "recoveryJobIds": [],
+        "resubmitRequested": False,
+        "resubmittedInstancesCount": 0,
+        "resubmittedFailedInstances": [],
+        "batchCount": len(batches),
+    }
+    failed_batches = []
+
+    for batch, result in zip(batches, results):
+        if result.get("isError"):
+            failed_batches.append({"instanceIds": batch, "error": result.get("error")})
+            continue
+        merged["acceptedIds"].extend(result.get("acceptedIds", []))
+        if result.get("recoveryJobId"):
+            merged["recoveryJobIds"].append(result["recoveryJobId"])
+        merged["resubmitRequested"] = merged["resubmitRequested"] or bool(result.get("resubmitRequested"))
+        merged["resubmittedInstancesCount"] += result.get("resubmittedInstancesCount", 0) or 0
+        merged["resubmittedFailedInstances"].extend(result.get("resubmittedFailedInstances", []))
+
+    if merged["recoveryJobIds"]:
+        merged["recoveryJobId"] = merged["recoveryJobIds"][0]
+    if failed_batches:
+        merged["failedBatches"] = failed_batches
+        if len(failed_batches) == len(batches):
+            return {
+                "isError": True,
+                "error": failed_batches[0]["error"],
+                "failedBatches": failed_batches
+            }
+    return merged
+
+
+def skip_recently_resubmitted(environment: str, instance_ids: List[str]) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+    """Drop IDs resubmitted within the cool-down; returns (IDs to send, {skipped ID: earlier resubmission})."""
+    try:
+        return get_resubmit_index().filter(environment, instance_ids)
+    except Exception as e:
+        logger.warning(f"Could not check the resubmitted instance index: {e}")
+        return list(instance_ids), {}
+
+
+def record_resubmitted(environment: str, batches: List[List[str]], results: List[Dict[str, Any]]) -> None:
+    """Add the instances every successful batch resubmitted to the index."""
+    try:
+        index = get_resubmit_index()
+        for batch, result in zip(batches, results):
+            if not result.get("isError"):
+                accepted = result.get("acceptedIds")
+                index.record(environment, accepted if accepted is not None else batch, result.get("recoveryJobId"))
+    except Exception as e:
+        logger.warning(f"Could not update the resubmitted instance index: {e}")
+
+
+def _with_skipped(result: Dict[str, Any], skipped: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    if skipped:
+        result["skippedIds"] = list(skipped)
+        result["skippedRecoveryJobIds"] = list(dict.fromkeys(
+            entry["recoveryJobId"] for entry in skipped.values() if entry.get("recoveryJobId")
+        ))
+    return result
+
+
+def resubmit_in_batches(
+    client,
+    environment: str,
+    instance_ids: List[str],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    skip_recent: bool = True,
+    idempotent: bool = True
+) -> Dict[str, Any]:
+    """
+    Resubmit any number of instance IDs through an MCPClient, batch by batch.
+
+    With skip_recent, IDs resubmitted within the cool-down are not sent again. With
+    idempotent, an identical request (same environment and ID set) made recently or
+    still in flight returns that request's result instead of resubmitting again.
+    """
+    def run() -> Dict[str, Any]:
+        return _resubmit_in_batches(client, environment, instance_ids, batch_size, concurrency, skip_recent)
+
+    if not idempotent:
+        return run()
+    return get_idempotent_requests().run(request_key(RESUBMIT_TOOL, environment, instance_ids), run)
+
+
+def _resubmit_in_batches(
+    client,
+    environment: str,
+    instance_ids: List[str],
+    batch_size: Optional[int],
+    concurrency: Optional[int],
+    skip_recent: bool
+) -> Dict[str, Any]:
+    skipped: Dict[str, Dict[str, Any]] = {}
+    if skip_recent:
+        instance_ids, skipped = skip_recently_resubmitted(environment, instance_ids)
+    batches = chunk_ids(instance_ids, batch_size)
+
+    def send(batch: List[str]) -> Dict[str, Any]:
+        return client.call_tool(RESUBMIT_TOOL, {"environment": environment, "instanceIds": batch},
+                                idempotency_key=call_key(RESUBMIT_TOOL, environment, batch))
+
+    if len(batches) <= 1:
+        results = [send(batch) for batch in batches]
+    else:
+        with ThreadPoolExecutor(max_workers=min(_concurrency(concurrency), len(batches))) as pool:
+            results = list(pool.map(with_current_context(send), batches))
+    record_resubmitted(environment, batches, results)
+    return _with_skipped(merge_resubmit_results(batches, results), skipped)
+
+
+async def resubmit_in_batches_async(
+    client,
+    environment: str,
+    instance_ids: List[str],
+    batch_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    skip_recent: bool = True,
+    idempotent: bool = True
+) -> Dict[str, Any]:
+    """
+    Resubmit any number of instance IDs through an AsyncMCPClient, batch by batch.
+
+    With skip_recent, IDs resubmitted within the cool-down are not sent again. With
+    idempotent, an identical request (same environment and ID set) made recently or
+    still in flight returns that request's result instead of resubmitting again.
+    """
+    async def run() -> Dict[str, Any]:
+        return await _resubmit_in_batches_async(client, environment, instance_ids, batch_size, concurrency, skip_recent)
+
+    if not idempotent:
+        return await run()
+    return await get_idempotent_requests().run_async(request_key(RESUBMIT_TOOL, environment, instance_ids), run)
+
+
+async def _resubmit_in_batches_async(
+    client,
+    environment: str,
+    instance_ids: List[str],
+    batch_size: Optional[int],
+    concurrency: Optional[int],
+    skip_recent: bool
+) -> Dict[str, Any]:
+    # The index is SQLite (with a busy timeout): keep its calls off the event loop
+    skipped: Dict[str, Dict[str, Any]] = {}
+    if skip_recent:
+        instance_ids, skipped = await asyncio.to_thread(skip_recently_resubmitted, environment, instance_ids)
+    batches = chunk_ids(instance_ids, batch_size)
+    semaphore = asyncio.Semaphore(_concurrency(concurrency))
+
+    async def send(batch: List[str]) -> Dict[str, Any]:
+        async with semaphore:
+            return await client.call_tool(RESUBMIT_TOOL, {"environment": environment, "instanceIds": batch},
+                                          idempotency_key=call_key(RESUBMIT_TOOL, environment, batch))
+
+    results = list(await asyncio.gather(*(send(batch) for batch in batches)))
+    await asyncio.to_thread(record_resubmitted, environment, batches, results)
+    return _with_skipped(merge_resubmit_results(batches, results), skipped)
+
+
+def save_resubmit_result(result: Dict[str, Any], environment: str) -> None:
+    """Save a (merged) bulk resubmit result to shared state and register its recovery jobs as open."""
+    if result.get("isError"):
+        return
+    recovery_job_ids = result.get("recoveryJobIds") or (
+        [result["recoveryJobId"]] if result.get("recoveryJobId") else []
+    )
+    update_shared_state({
+        "resubmit_result": {
+            "acceptedIds": result.get("acceptedIds", []),
+            "recoveryJobId": result.get("recoveryJobId"),
+            "recoveryJobIds": recovery_job_ids,
+            "resubmitRequested": result.get("resubmitRequested", False),
+            "resubmittedInstancesCount": result.get("resubmittedInstancesCount", 0),
+            "resubmittedFailedInstances": result.get("resubmittedFailedInstances", []),
+        },
+        "last_recovery_job_ids": recovery_job_ids,
+        "environment": environment
+    })
+    register_open_jobs(recovery_job_ids, environment)
+    # Accepted (or recently resubmitted) IDs are no longer waiting for a resubmit
+    remove_errored_ids(environment, [*result.get("acceptedIds", []), *result.get("skippedIds", [])])
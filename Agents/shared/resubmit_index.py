@@ -0,0 +1,202 @@
+"""
+Resubmitted Instance Index
+
+Persistent record of the errored instances that were already resubmitted, so that
+overlapping monitoring windows (or the Coordinator and ResubmitErrorsAgent both acting
+on the same shared state) do not resubmit the same instance again and again.
+
+Every accepted instance is stored with its environment, recovery job ID and time of
+resubmission. resubmit_in_batches filters the IDs it is given through the index before
+any monitoringResubmitErroredInstances call: instances resubmitted less than
+RESUBMIT_COOLDOWN_SECONDS ago are skipped and reported as skippedIds.
+
+The index is a SQLite table (WAL mode, shared by every agent process) keyed by
+(environment, instanceId), so each lookup is a primary-key probe regardless of its
+size. It expires itself: entries older than RESUBMIT_INDEX_TTL_SECONDS are deleted on
+write, and once RESUBMIT_INDEX_MAX_ENTRIES is exceeded the oldest entries are evicted.
+
+Configuration:
+
+    RESUBMIT_COOLDOWN_SECONDS    Skip instances resubmitted this recently; 0 disables the
+                                 filter (default: 3600)
+    RESUBMIT_INDEX_TTL_SECONDS   Age at which entries expire (default: 86400, never below
+                                 the cool-down)
+    RESUBMIT_INDEX_MAX_ENTRIES   Maximum entries kept (default: 100000)
+    RESUBMIT_INDEX_PATH          SQLite file (default: resubmit_index.db next to the
+                                 shared state store)
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .state_store import AGENTS_DIR
+
+logger = logging.getLogger(__name__)
+
+# SQLite limits the number of bound parameters per statement
+_LOOKUP_CHUNK = 500
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def default_index_path() -> Path:
+    state_path = os.environ.get("AGENT_STATE_PATH")
+    directory = Path(state_path).parent if state_path else AGENTS_DIR
+    return directory / "resubmit_index.db"
+
+
+class ResubmitIndex:
+    """Instances already resubmitted, per environment, with cool-down filtering."""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        cooldown: Optional[float] = None,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        timeout: float = 30.0
+    ):
+        self.path = Path(path or os.environ.get("RESUBMIT_INDEX_PATH") or default_index_path())
+        self.cooldown = max(0.0, cooldown if cooldown is not None else _env_float("RESUBMIT_COOLDOWN_SECONDS", 3600))
+        self.ttl = max(self.cooldown, ttl if ttl is not None else _env_float("RESUBMIT_INDEX_TTL_SECONDS", 86400))
+        self.max_entries = max(1, max_entries or int(_env_float("RESUBMIT_INDEX_MAX_ENTRIES", 100000)))
+        self.timeout = timeout
+        self._local = threading.local()
+        self.skipped = 0
+        self.recorded = 0
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resubmitted ("
+                " environment TEXT NOT NULL,"
+                " instance_id TEXT NOT NULL,"
+                " recovery_job_id TEXT,"
+                " resubmitted_at REAL NOT NULL,"
+                " PRIMARY KEY (environment, instance_id))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS resubmitted_at_idx ON resubmitted (resubmitted_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def lookup(self, environment: str, instance_ids: Iterable[str], since: float = 0.0) -> Dict[str, Dict[str, Any]]:
+        """{instanceId: {recoveryJobId, resubmittedAt}} of the given IDs resubmitted at or after since."""
+        ids = list(dict.fromkeys(instance_ids))
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._connect()
+        for i in range(0, len(ids), _LOOKUP_CHUNK):
+            chunk = ids[i:i + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                "SELECT instance_id, recovery_job_id, resubmitted_at FROM resubmitted"
+                f" WHERE environment = ? AND resubmitted_at >= ? AND instance_id IN ({','.join('?' * len(chunk))})",
+                [environment, since, *chunk]
+            ).fetchall()
+            for instance_id, job_id, resubmitted_at in rows:
+                found[instance_id] = {"recoveryJobId": job_id, "resubmittedAt": resubmitted_at}
+        return found
+
+    def filter(self, environment: str, instance_ids: List[str]) -> Tuple[List[str], Dict[str, Dict[str, Any]]]:
+        """Split instance IDs into (IDs to resubmit, {skipped ID: previous resubmission})."""
+        if not self.cooldown or not instance_ids:
+            return list(instance_ids), {}
+        recent = self.lookup(environment, instance_ids, time.time() - self.cooldown)
+        if recent:
+            self.skipped += len(recent)
+        return [instance_id for instance_id in instance_ids if instance_id not in recent], recent
+
+    def record(self, environment: str, instance_ids: List[str], recovery_job_id: Optional[str] = None) -> None:
+        """Add resubmitted instances, then expire old entries and enforce the size bound."""
+        if not instance_ids:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO resubmitted (environment, instance_id, recovery_job_id, resubmitted_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(environment, instance_id) DO UPDATE SET "
+                "recovery_job_id = excluded.recovery_job_id, resubmitted_at = excluded.resubmitted_at",
+                [(environment, instance_id, recovery_job_id, now) for instance_id in instance_ids]
+            )
+            conn.execute("DELETE FROM resubmitted WHERE resubmitted_at < ?", (now - self.ttl,))
+            excess = conn.execute("SELECT COUNT(*) FROM resubmitted").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM resubmitted WHERE rowid IN "
+                    "(SELECT rowid FROM resubmitted ORDER BY resubmitted_at LIMIT ?)",
+                    (excess,)
+                )
+        self.recorded += len(instance_ids)
+
+    def forget(self, environment: str, instance_ids: Optional[List[str]] = None) -> None:
+        """Remove instances (or a whole environment) so they can be resubmitted right away."""
+        with self._transaction() as conn:
+            if instance_ids is None:
+                conn.execute("DELETE FROM resubmitted WHERE environment = ?", (environment,))
+            else:
+                conn.executemany(
+                    "DELETE FROM resubmitted WHERE environment = ? AND instance_id = ?",
+                    [(environment, instance_id) for instance_id in instance_ids]
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            entries = self._connect().execute("SELECT COUNT(*) FROM resubmitted").fetchone()[0]
+        except sqlite3.Error as e:
+            return {"error": str(e)}
+        return {
+            "entries": entries,
+            "maxEntries": self.max_entries,
+            "cooldownSeconds": self.cooldown,
+            "ttlSeconds": self.ttl,
+            "skipped": self.skipped,
+            "recorded": self.recorded,
+        }
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_index: Optional[ResubmitIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_resubmit_index() -> ResubmitIndex:
+    """Return the process-wide resubmitted instance index."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = ResubmitIndex()
+    return _index
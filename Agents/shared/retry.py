@@ -0,0 +1,176 @@
+"""
+MCP Call Retries and Deadline Budgets
+
+Transient failures (connection resets, timeouts, HTTP 5xx from the MCP server and
+429/5xx or network errors the server reports from OIC) are retried inside the MCP
+clients, so they cost a short backoff instead of a model turn:
+
+    - Read tools are retried up to MCP_RETRY_ATTEMPTS attempts in total, with full-jitter
+      exponential backoff: a random delay in [0, min(MCP_RETRY_MAX_DELAY,
+      MCP_RETRY_BASE_DELAY * 2 ** retry)].
+    - Write tools (resubmit, discard, abort) are retried only when the caller passes an
+      idempotency key (see shared.idempotency.request_key). The key is sent in the
+      JSON-RPC _meta, and the MCP server answers a repeated key with the response of
+      the first call, so a retry after a lost response does not repeat the write.
+    - Calls refused by the circuit breaker or the rate limiter are not retried.
+
+A deadline budget bounds the total time of a workflow run rather than of one call:
+
+    with deadline_budget(120):
+        run the workflow
+
+Every MCP call made inside the block (including from fan-out threads that copy the
+context, see shared.tracing.with_current_context) has its timeout capped to the time
+left, backoffs that would pass the deadline are not taken, and calls made after it
+return {"isError": true, "deadlineExceeded": true, ...} without being sent. Budgets nest;
+an inner budget can only shorten the outer one.
+
+LLM agents get one budget per invocation from invocation_budget, whose callbacks are
+passed as the agent's ADK before_agent_callback / after_agent_callback:
+
+    open_budget, close_budget = invocation_budget(600)
+    Agent(..., before_agent_callback=open_budget, after_agent_callback=close_budget)
+
+Retries are counted as oic_agent_mcp_retries_total and refused calls as
+oic_agent_mcp_errors_total{type="deadline_exceeded"} (see shared.metrics).
+
+Configuration:
+
+    MCP_RETRY_ATTEMPTS      Attempts per call, including the first; 1 disables retries (default: 3)
+    MCP_RETRY_BASE_DELAY    Backoff before the first retry, in seconds (default: 0.25)
+    MCP_RETRY_MAX_DELAY     Longest backoff, in seconds (default: 5)
+"""
+
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+from .circuit_breaker import is_endpoint_failure
+from .metrics import record_deadline_exceeded, record_retry
+from .rate_limiter import tool_class
+
+Timeout = Union[float, Tuple[float, float]]
+
+# Errors the MCP server passes on from OIC that are worth retrying
+_TRANSIENT_TOOL_ERROR = re.compile(
+    r"(?:HTTP |: |\()(?:429|5\d\d)\b|Network error|ECONNRESET|ETIMEDOUT|socket hang up"
+)
+
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("mcp_deadline", default=None)
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class RetryPolicy:
+    """Attempts and full-jitter exponential backoff of MCP calls."""
+
+    def __init__(self, attempts: Optional[int] = None, base_delay: Optional[float] = None,
+                 max_delay: Optional[float] = None):
+        self.attempts = max(1, attempts or int(_env_float("MCP_RETRY_ATTEMPTS", 3)))
+        self.base_delay = max(0.0, base_delay if base_delay is not None else _env_float("MCP_RETRY_BASE_DELAY", 0.25))
+        self.max_delay = max(0.0, max_delay if max_delay is not None else _env_float("MCP_RETRY_MAX_DELAY", 5.0))
+
+    def attempts_for(self, tool_name: str, idempotency_key: Optional[str]) -> int:
+        """Writes are only retried under an idempotency key."""
+        if tool_class(tool_name) == "write" and not idempotency_key:
+            return 1
+        return self.attempts
+
+    def delay(self, retry: int) -> float:
+        """Backoff before retry number retry (0 = first retry)."""
+        return random.uniform(0.0, min(self.max_delay, self.base_delay * (2 ** retry)))
+
+
+def is_transient(result: Dict[str, Any], error: Optional[str]) -> bool:
+    """Whether a failed call is worth retrying; error is the transport error type, if any."""
+    if error:
+        return is_endpoint_failure(error)
+    if not isinstance(result, dict) or result.get("circuitOpen") or result.get("deadlineExceeded"):
+        return False
+    message = result.get("error") if result.get("isError") else result.get("raw")
+    return isinstance(message, str) and bool(_TRANSIENT_TOOL_ERROR.search(message))
+
+
+@contextmanager
+def deadline_budget(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """Limit every MCP call in the block to a shared deadline seconds from now (None/0: no limit)."""
+    deadline = _deadline.get()
+    if seconds and seconds > 0:
+        own = time.monotonic() + seconds
+        deadline = own if deadline is None else min(deadline, own)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def invocation_budget(seconds: Optional[float]) -> Tuple[Callable[[Any], None], Callable[[Any], None]]:
+    """ADK before/after_agent_callback pair giving each agent invocation a deadline budget of seconds.
+
+    The budget is set in the invocation's context, so the agent's tool calls (and the
+    tasks and threads they start) see it; the after callback clears it again.
+    """
+    def open_budget(callback_context: Any) -> None:
+        _deadline.set(time.monotonic() + seconds if seconds and seconds > 0 else None)
+        return None
+
+    def close_budget(callback_context: Any) -> None:
+        _deadline.set(None)
+        return None
+
+    return open_budget, close_budget
+
+
+def remaining_budget() -> Optional[float]:
+    """Seconds left in the current deadline budget, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def budget_timeout(timeout: Optional[Timeout], remaining: Optional[float]) -> Optional[Timeout]:
+    """Cap a call timeout to the time left in the budget."""
+    if remaining is None:
+        return timeout
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return (min(timeout[0], remaining), min(timeout[1], remaining))
+    return min(timeout, remaining)
+
+
+def deadline_exceeded(tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    record_deadline_exceeded(tool_name, arguments)
+    return {
+        "isError": True,
+        "deadlineExceeded": True,
+        "error": f"Deadline budget of the workflow run exhausted before calling {tool_name}."
+    }
+
+
+def note_retry(tool_name: str, arguments: Dict[str, Any], error: Optional[str]) -> None:
+    record_retry(tool_name, arguments, error or "tool_error")
+
+
+_policy: Optional[RetryPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_retry_policy() -> RetryPolicy:
+    """Return the process-wide retry policy."""
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = RetryPolicy()
+    return _policy
@@ -0,0 +1,100 @@
+"""
+Agent Runtime Initialisation
+
+Start-up steps every agent needs, made idempotent and cheap to call repeatedly:
+
+    load_environment()  Load the central .env file and point GOOGLE_APPLICATION_CREDENTIALS
+                        at the central service_account.json (the agents' tool modules
+                        call this on import; it does not touch any Google SDK)
+    init_vertexai()     Import and initialise Vertex AI. The agents pass
+                        init_vertexai_before_model as the ADK before_model_callback, so
+                        this happens on the first model call instead of at import time
+
+Importing an agent's tools, running its health check or starting its A2A server no
+longer pays for the cloud SDK start-up. Every agent package keeps to that layout:
+
+    tools.py            The tool functions. Imports only the shared helpers, never
+                        google-adk or vertexai. Each tool has a sync and an async twin
+                        (the latter decorated with async_twin) around shared helpers
+    agent.py            Builds the ADK agent (root_agent) from the tools
+    __init__.py         __getattr__ = lazy_root_agent(__name__): importing the package,
+                        e.g. for <Agent>.tools, does not build the agent
+"""
+
+import importlib
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional, TypeVar
+
+# Capstone root (central location of .env and service_account.json)
+CAPSTONE_ROOT = Path(__file__).parent.parent.parent.parent
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_environment_loaded = False
+_vertexai_initialized = False
+_init_lock = threading.Lock()
+
+
+def load_environment() -> None:
+    """Load the central .env file and service account (once per process)."""
+    global _environment_loaded
+    if _environment_loaded:
+        return
+    with _init_lock:
+        if _environment_loaded:
+            return
+        try:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=CAPSTONE_ROOT / '.env')
+        except ImportError:
+            logger.debug("python-dotenv not installed; using the process environment only")
+
+        service_account_path = CAPSTONE_ROOT / 'service_account.json'
+        if service_account_path.exists():
+            os.environ["GOOGLE_APPLICATION_CREDENTIALS"] = str(service_account_path.absolute())
+        _environment_loaded = True
+
+
+def init_vertexai() -> None:
+    """Initialise Vertex AI with credentials from environment variables (once per process)."""
+    global _vertexai_initialized
+    if _vertexai_initialized:
+        return
+    load_environment()
+    with _init_lock:
+        if _vertexai_initialized:
+            return
+        import vertexai
+        vertexai.init(
+            project=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+            location=os.environ.get("GOOGLE_CLOUD_LOCATION", "us-central1"),
+        )
+        _vertexai_initialized = True
+
+
+def init_vertexai_before_model(callback_context: Any, llm_request: Any) -> Optional[Any]:
+    """ADK before_model_callback: initialise Vertex AI before the first model call."""
+    init_vertexai()
+    return None
+
+
+def async_twin(sync_tool: Callable[..., Any]) -> Callable[[F], F]:
+    """Give the async twin of a tool the sync tool's docstring, which ADK shows the model."""
+    def decorate(async_tool: F) -> F:
+        async_tool.__doc__ = sync_tool.__doc__
+        return async_tool
+    return decorate
+
+
+def lazy_root_agent(package: str) -> Callable[[str], Any]:
+    """Module __getattr__ for an agent package: import .agent only when root_agent is requested."""
+    def __getattr__(name: str) -> Any:
+        if name == "root_agent":
+            return importlib.import_module(".agent", package).root_agent
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+    return __getattr__
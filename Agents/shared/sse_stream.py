@@ -0,0 +1,210 @@
+"""
+Streaming MCP Response Reader
+
+The MCP server answers POST /stream either with a single JSON body or with a
+text/event-stream (SSE) body whose "data:" events carry JSON-RPC messages. Instead of
+buffering the whole body (response.text) and splitting it into lines, the clients feed
+the body to JsonRpcStreamReader chunk by chunk as it arrives (stream=True) and stop
+reading as soon as the JSON-RPC response with the request's id has been received.
+
+Only the event currently being received is held in memory; events that are not the
+matching response (notifications, progress messages, other ids) are decoded and
+dropped. A single message larger than MCP_MAX_MESSAGE_BYTES (default: 64 MiB) aborts
+the read with ResponseTooLarge instead of growing without bound.
+"""
+
+import json
+import os
+from typing import Any, AsyncIterable, Dict, Iterable, List, Optional
+
+STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ResponseTooLarge(ValueError):
+    """A single MCP response message exceeded MCP_MAX_MESSAGE_BYTES."""
+
+
+def _max_message_bytes(max_message_bytes: Optional[int]) -> int:
+    if max_message_bytes:
+        return max_message_bytes
+    try:
+        return int(os.environ.get("MCP_MAX_MESSAGE_BYTES", DEFAULT_MAX_MESSAGE_BYTES))
+    except ValueError:
+        return DEFAULT_MAX_MESSAGE_BYTES
+
+
+class SSEDecoder:
+    """Incremental text/event-stream decoder: feed bytes, get the data of completed events."""
+
+    def __init__(self, max_event_bytes: Optional[int] = None):
+        self.max_event_bytes = _max_message_bytes(max_event_bytes)
+        self._line = bytearray()
+        self._data: List[bytes] = []
+        self._data_size = 0
+
+    def _check_size(self) -> None:
+        if self._data_size + len(self._line) > self.max_event_bytes:
+            raise ResponseTooLarge(f"MCP response event exceeds {self.max_event_bytes} bytes")
+
+    def _line_complete(self, line: bytes) -> Optional[str]:
+        if line.endswith(b"\r"):
+            line = line[:-1]
+        if not line:
+            # Blank line dispatches the event
+            if not self._data:
+                return None
+            data = b"\n".join(self._data).decode("utf-8")
+            self._data = []
+            self._data_size = 0
+            return data
+        if line.startswith(b"data:"):
+            value = line[5:]
+            if value.startswith(b" "):
+                value = value[1:]
+            self._data.append(value)
+            self._data_size += len(value) + 1
+        # Comments (":...") and event:/id:/retry: fields carry nothing we need
+        return None
+
+    def feed(self, chunk: bytes) -> List[str]:
+        """Consume a chunk of the body and return the data of every event it completed."""
+        events = []
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                self._line += chunk[start:]
+                self._check_size()
+                return events
+            if self._line:
+                self._line += chunk[start:end]
+                line = bytes(self._line)
+                self._line.clear()
+            else:
+                line = chunk[start:end]
+            data = self._line_complete(line)
+            self._check_size()
+            if data is not None:
+                events.append(data)
+            start = end + 1
+
+    def close(self) -> List[str]:
+        """Flush an event left unterminated at the end of the stream."""
+        events = self.feed(b"\n") if self._line else []
+        data = self._line_complete(b"")
+        if data is not None:
+            events.append(data)
+        return events
+
+
+def _matches(message: Any, request_id: Any) -> bool:
+    return (
+        isinstance(message, dict)
+        and message.get("id") == request_id
+        and ("result" in message or "error" in message)
+    )
+
+
+class JsonRpcStreamReader:
+    """
+    Find the JSON-RPC response for one request in a streamed /stream body.
+
+    Call feed() with each chunk until it returns True (response found), then close();
+    message holds the matching response. If the stream ends without a message carrying
+    the request id, the first JSON-RPC response seen is used (servers that do not echo
+    ids), otherwise message stays None.
+    """
+
+    def __init__(self, request_id: Any, content_type: str = "", max_message_bytes: Optional[int] = None):
+        self.request_id = request_id
+        self.is_sse = "text/event-stream" in (content_type or "")
+        self.max_message_bytes = _max_message_bytes(max_message_bytes)
+        self.message: Any = None
+        self.done = False
+        self._fallback: Any = None
+        self._decoder = SSEDecoder(self.max_message_bytes) if self.is_sse else None
+        self._body = bytearray()
+
+    def _consider(self, data: str) -> None:
+        try:
+            message = json.loads(data)
+        except json.JSONDecodeError:
+            return
+        for candidate in message if isinstance(message, list) else [message]:
+            if _matches(candidate, self.request_id):
+                self.message = candidate
+                self.done = True
+                return
+            if self._fallback is None and isinstance(candidate, dict) and (
+                "result" in candidate or "error" in candidate
+            ):
+                self._fallback = candidate
+
+    def feed(self, chunk: bytes) -> bool:
+        if self.done or not chunk:
+            return self.done
+        if self._decoder is None:
+            # Plain JSON has to be complete before it can be decoded
+            self._body += chunk
+            if len(self._body) > self.max_message_bytes:
+                raise ResponseTooLarge(f"MCP response exceeds {self.max_message_bytes} bytes")
+            return False
+        for data in self._decoder.feed(chunk):
+            self._consider(data)
+            if self.done:
+                break
+        return self.done
+
+    def close(self) -> Any:
+        """Finish the stream and return the JSON-RPC message (or {"raw": text} for non-JSON bodies)."""
+        if self.done:
+            return self.message
+        if self._decoder is not None:
+            for data in self._decoder.close():
+                self._consider(data)
+                if self.done:
+                    return self.message
+            return self._fallback
+        body = bytes(self._body)
+        self._body = bytearray()
+        try:
+            self.message = json.loads(body)
+        except ValueError:
+            self.message = {"raw": body.decode("utf-8", errors="replace")}
+        return self.message
+
+
+def read_jsonrpc_response(
+    chunks: Iterable[bytes],
+    request_id: Any,
+    content_type: str = "",
+    max_message_bytes: Optional[int] = None
+) -> Any:
+    """Read a streamed body until the response to request_id arrives (remaining chunks are not read)."""
+    reader = JsonRpcStreamReader(request_id, content_type, max_message_bytes)
+    for chunk in chunks:
+        if reader.feed(chunk):
+            break
+    return reader.close()
+
+
+async def read_jsonrpc_response_async(
+    chunks: AsyncIterable[bytes],
+    request_id: Any,
+    content_type: str = "",
+    max_message_bytes: Optional[int] = None
+) -> Any:
+    """Async counterpart of read_jsonrpc_response."""
+    reader = JsonRpcStreamReader(request_id, content_type, max_message_bytes)
+    async for chunk in chunks:
+        if reader.feed(chunk):
+            break
+    return reader.close()
+
+
+def no_response_error(request_id: Any) -> Dict[str, Any]:
+    return {
+        "isError": True,
+        "error": f"MCP server closed the stream without a response to request {request_id}"
+    }
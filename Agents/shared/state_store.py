@@ -0,0 +1,296 @@
+"""
+Shared State Store
+
+Transactional key-value store for the state the agents hand to each other
+(last_errored_instance_ids, last_recovery_job_ids, resubmit_result, ...).
+
+Updates are atomic and key-level: writing one key never rewrites the others, so the
+cost of an update is O(changed keys) and concurrent agents no longer lose each other's
+writes. The backend is pluggable and selected with environment variables:
+
+    AGENT_STATE_BACKEND  'sqlite' (default) or 'json'
+    AGENT_STATE_PATH     Path of the store (default: Agents/shared_state.db for sqlite,
+                         Agents/shared_state.json for json)
+
+The SQLite backend runs in WAL mode: any number of readers proceed concurrently with a
+single writer, across processes. The JSON backend keeps the legacy shared_state.json
+format and serialises writers with an exclusive lock file.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+AGENTS_DIR = Path(__file__).parent.parent
+LEGACY_STATE_PATH = AGENTS_DIR / 'shared_state.json'
+DEFAULT_SQLITE_PATH = AGENTS_DIR / 'shared_state.db'
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """Interface implemented by every shared-state backend."""
+
+    def get(self, key: str, default: Any = None) -> Any:
+        raise NotImplementedError
+
+    def get_all(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def update(self, updates: Dict[str, Any]) -> None:
+        """Atomically set several keys, leaving every other key untouched."""
+        raise NotImplementedError
+
+    def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    def update_key(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        """
+        Atomically read-modify-write a single key.
+
+        fn receives the current value (or default) and returns the new value, which is
+        stored and returned. No other writer can interleave between the read and write.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteStateStore(StateStore):
+    """SQLite (WAL mode) backend: one row per key, JSON-encoded values."""
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = 30.0):
+        self.path = Path(path or DEFAULT_SQLITE_PATH)
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._transaction() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            empty = conn.execute("SELECT 1 FROM state LIMIT 1").fetchone() is None
+            if empty:
+                self._import_legacy(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.path), timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA busy_timeout={int(self.timeout * 1000)}")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock up front, so read-modify-write
+        # sequences cannot interleave with another writer.
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """Seed an empty database from the legacy shared_state.json file."""
+        try:
+            with open(LEGACY_STATE_PATH, 'r') as f:
+                legacy = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(legacy, dict):
+            now = time.time()
+            conn.executemany(
+                "INSERT OR IGNORE INTO state (key, value, updated_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(value), now) for key, value in legacy.items()]
+            )
+
+    def get(self, key: str, default: Any = None) -> Any:
+        row = self._connect().execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def get_all(self) -> Dict[str, Any]:
+        rows = self._connect().execute("SELECT key, value FROM state").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def update(self, updates: Dict[str, Any]) -> None:
+        if not updates:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                [(key, json.dumps(value), now) for key, value in updates.items()]
+            )
+
+    def delete(self, *keys: str) -> None:
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM state WHERE key = ?", [(key,) for key in keys])
+
+    def update_key(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+            value = fn(json.loads(row[0]) if row else default)
+            conn.execute(
+                "INSERT INTO state (key, value, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at",
+                (key, json.dumps(value), time.time())
+            )
+        return value
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class JsonFileStateStore(StateStore):
+    """
+    Legacy shared_state.json backend.
+
+    Writers hold an exclusive lock on a sidecar .lock file and replace the JSON file
+    atomically, so concurrent agents no longer lose each other's updates. Every write
+    still rewrites the whole file; use the SQLite backend for large ID lists.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or LEGACY_STATE_PATH)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self._thread_lock = threading.Lock()
+
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        with self._thread_lock:
+            self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a+') as lock_file:
+                _lock_file(lock_file)
+                try:
+                    yield
+                finally:
+                    _unlock_file(lock_file)
+
+    def _read(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r') as f:
+                state = json.load(f)
+            return state if isinstance(state, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.path.with_name(self.path.name + f'.{os.getpid()}.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self._read().get(key, default)
+
+    def get_all(self) -> Dict[str, Any]:
+        return self._read()
+
+    def update(self, updates: Dict[str, Any]) -> None:
+        if not updates:
+            return
+        with self._locked():
+            state = self._read()
+            state.update(updates)
+            self._write(state)
+
+    def delete(self, *keys: str) -> None:
+        with self._locked():
+            state = self._read()
+            for key in keys:
+                state.pop(key, None)
+            self._write(state)
+
+    def update_key(self, key: str, fn: Callable[[Any], Any], default: Any = None) -> Any:
+        with self._locked():
+            state = self._read()
+            value = fn(state.get(key, default))
+            state[key] = value
+            self._write(state)
+        return value
+
+
+try:
+    import fcntl
+
+    def _lock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f) -> None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+except ImportError:  # Windows
+    import msvcrt
+
+    def _lock_file(f) -> None:
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                time.sleep(0.05)
+
+    def _unlock_file(f) -> None:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+BACKENDS: Dict[str, Callable[[Optional[Path]], StateStore]] = {
+    "sqlite": SQLiteStateStore,
+    "json": JsonFileStateStore,
+}
+
+_store: Optional[StateStore] = None
+_store_lock = threading.Lock()
+
+
+def get_state_store() -> StateStore:
+    """Return the process-wide state store selected by AGENT_STATE_BACKEND."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                backend = os.environ.get("AGENT_STATE_BACKEND", "sqlite").lower()
+                if backend not in BACKENDS:
+                    raise ValueError(f"Unknown AGENT_STATE_BACKEND: {backend}")
+                path = os.environ.get("AGENT_STATE_PATH")
+                _store = BACKENDS[backend](Path(path) if path else None)
+    return _store
+
+
+def get_shared_state() -> Dict[str, Any]:
+    """Read the whole shared state."""
+    try:
+        return get_state_store().get_all()
+    except Exception as e:
+        logger.warning(f"Could not read shared state: {e}")
+        return {}
+
+
+def update_shared_state(updates: Dict[str, Any]) -> None:
+    """Atomically update the given shared state keys."""
+    try:
+        get_state_store().update(updates)
+    except Exception as e:
+        logger.warning(f"Could not update shared state: {e}")
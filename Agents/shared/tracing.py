@@ -0,0 +1,293 @@
+"""
+Trace Spans
+
+Lightweight tracing for the agent workflow, with no dependency on an OpenTelemetry SDK:
+
+    traced          Decorator that wraps a tool function (sync or async) in a span; the
+                    Coordinator tools use it, so a run shows monitor_errors,
+                    resubmit_errors, get_recovery_job_status, ... as separate steps
+    start_span      Child span of the current span; both MCP clients open one per HTTP
+                    call (see shared.metrics.CallRecorder)
+    trace_headers   W3C trace context for the current/given span. MCP calls send it as
+                    the "traceparent" HTTP header and in the JSON-RPC params._meta, so
+                    the MCP server can continue the trace
+
+Time between the tool spans of one trace is time the model spent thinking.
+
+Finished spans are batched and appended as OTLP/JSON lines (one ExportTraceServiceRequest
+per line, the format the OpenTelemetry Collector's otlpjsonfile receiver reads) to
+TRACE_EXPORT_PATH. Nothing is sent over the network, so this works fully offline.
+
+Configuration:
+
+    TRACING_ENABLED        Record spans (default: false)
+    TRACE_EXPORT_PATH      OTLP/JSON lines file (default: Agents/traces/traces.jsonl)
+    TRACE_BATCH_SIZE       Spans buffered before they are written (default: 64)
+    TRACE_FLUSH_INTERVAL   Seconds between background flushes (default: 2)
+    OTEL_SERVICE_NAME      service.name resource attribute (default: oic-agentops)
+"""
+
+import asyncio
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_PATH = Path(__file__).parent.parent / "traces" / "traces.jsonl"
+
+# OTLP span kinds and status codes
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+_current_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar("oic_current_span", default=None)
+_random = random.SystemRandom()
+
+
+def tracing_enabled() -> bool:
+    return os.environ.get("TRACING_ENABLED", "false").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """One timed operation of a trace."""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None,
+                 kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = f"{_random.getrandbits(64):016x}"
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.status_code = STATUS_OK
+        self.status_message = ""
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_error(self, error_type: str, message: str = "") -> None:
+        self.status_code = STATUS_ERROR
+        self.status_message = message or error_type
+        self.attributes["error.type"] = error_type
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            get_exporter().export(self)
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": self.status_code, **({"message": self.status_message} if self.status_message else {})},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, kind: int = SPAN_KIND_INTERNAL, attributes: Optional[Dict[str, Any]] = None) -> Optional[Span]:
+    """Start a child of the current span (or a new trace); returns None when tracing is off."""
+    if not tracing_enabled():
+        return None
+    parent = _current_span.get()
+    trace_id = parent.trace_id if parent else f"{_random.getrandbits(128):032x}"
+    return Span(name, trace_id, parent.span_id if parent else None, kind, attributes)
+
+
+def trace_headers(span: Optional[Span] = None) -> Dict[str, str]:
+    """W3C trace context headers for span (default: the current span); empty without one."""
+    span = span or _current_span.get()
+    return {"traceparent": span.traceparent} if span else {}
+
+
+def with_current_context(function: Callable) -> Callable:
+    """
+    Bind function to a snapshot of the current context, for thread pools: each call runs
+    in its own copy, so spans (and metric labels) started in worker threads join the
+    caller's trace.
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+    return run
+
+
+def _tool_attributes(function: Callable, kwargs: Dict[str, Any]) -> Dict[str, Any]:
+    attributes: Dict[str, Any] = {"code.function": function.__name__}
+    try:
+        from .metrics import current_agent
+        attributes["agent"] = current_agent()
+    except Exception:
+        pass
+    for key, value in kwargs.items():
+        if isinstance(value, (str, int, float, bool)):
+            attributes[f"tool.arg.{key}"] = value
+        elif isinstance(value, (list, tuple)):
+            attributes[f"tool.arg.{key}.count"] = len(value)
+    return attributes
+
+
+def _record_result(span: Span, result: Any) -> None:
+    if isinstance(result, str):
+        span.set_attribute("tool.output_bytes", len(result))
+        head = result[:256]
+        if '"isError":true' in head or '"isError": true' in head:
+            span.set_error("tool_error")
+
+
+def traced(function: Callable) -> Callable:
+    """Run a tool function (sync or async) inside a span named "tool <function name>"."""
+    name = f"tool {function.__name__}"
+
+    if asyncio.iscoroutinefunction(function):
+        @functools.wraps(function)
+        async def async_wrapper(*args, **kwargs):
+            span = start_span(name, attributes=_tool_attributes(function, kwargs))
+            if span is None:
+                return await function(*args, **kwargs)
+            token = _current_span.set(span)
+            try:
+                result = await function(*args, **kwargs)
+                _record_result(span, result)
+                return result
+            except BaseException as e:
+                span.set_error(type(e).__name__, str(e))
+                raise
+            finally:
+                _current_span.reset(token)
+                span.end()
+        return async_wrapper
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        span = start_span(name, attributes=_tool_attributes(function, kwargs))
+        if span is None:
+            return function(*args, **kwargs)
+        token = _current_span.set(span)
+        try:
+            result = function(*args, **kwargs)
+            _record_result(span, result)
+            return result
+        except BaseException as e:
+            span.set_error(type(e).__name__, str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+    return wrapper
+
+
+class FileSpanExporter:
+    """Buffers finished spans and appends them to an OTLP/JSON lines file."""
+
+    def __init__(self, path: Optional[str] = None, batch_size: Optional[int] = None,
+                 flush_interval: Optional[float] = None):
+        self.path = Path(path or os.environ.get("TRACE_EXPORT_PATH") or DEFAULT_EXPORT_PATH)
+        self.batch_size = batch_size or int(os.environ.get("TRACE_BATCH_SIZE", 64))
+        self.flush_interval = flush_interval or float(os.environ.get("TRACE_FLUSH_INTERVAL", 2.0))
+        self.service_name = os.environ.get("OTEL_SERVICE_NAME", "oic-agentops")
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self.exported = 0
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self._spans.append(span)
+            full = len(self._spans) >= self.batch_size
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name="trace-exporter", daemon=True)
+                self._flusher.start()
+        if full:
+            self.flush()
+
+    def _flush_loop(self) -> None:
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            spans, self._spans = self._spans, []
+        if not spans:
+            return
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": self.service_name}},
+                    {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                ]},
+                "scopeSpans": [{
+                    "scope": {"name": "oic-agentops.shared.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        line = (json.dumps(request, separators=(",", ":")) + "\n").encode("utf-8")
+        try:
+            with self._write_lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # One append per batch keeps lines from several agent processes intact
+                fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                try:
+                    os.write(fd, line)
+                finally:
+                    os.close(fd)
+            self.exported += len(spans)
+        except OSError as e:
+            logger.warning(f"Could not write {len(spans)} spans to {self.path}: {e}")
+
+
+_exporter: Optional[FileSpanExporter] = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter() -> FileSpanExporter:
+    """Return the process-wide span exporter (flushed at exit)."""
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = FileSpanExporter()
+                atexit.register(_exporter.flush)
+    return _exporter
@@ -0,0 +1,418 @@
+"""
+Error Triage Rules
+
+Decides per errored instance whether to resubmit it, discard it or escalate it to a
+human, from a declarative rules file, instead of resubmitting everything that was found
+(including instances OIC reports as not recoverable, which always fail again).
+
+Rules file (JSON, TRIAGE_RULES_PATH, default: Agents/triage_rules.json). Discarding cannot
+be undone, so the shipped rules only escalate; triage_rules.example.json adds sample
+discard rules like the ones below:
+
+    {
+      "default": "resubmit",
+      "rules": [
+        {"name": "not-recoverable", "match": {"recoverable": false}, "action": "escalate"},
+        {"name": "bad-payload", "match": {"fingerprint": "^Invalid payload"}, "action": "discard"},
+        {"name": "prod-auth", "match": {"environment": ["prod1", "prod3"], "errorCode": "401 *"},
+         "action": "escalate"},
+        {"name": "stale", "match": {"minAgeMinutes": 1440}, "action": "discard"}
+      ]
+    }
+
+Rules are tried in order and the first match wins; instances no rule matches get the
+default action. Every field of "match" must hold (omitted fields match anything):
+
+    environment, integration, errorCode   A value or a list of values; * and ? are wildcards.
+                                          integration is the name without its version
+    fingerprint                           Regular expression searched in the normalised error
+                                          pattern (see shared.error_clusters), or a fingerprint
+    recoverable                           true / false; instances without the field
+                                          match neither
+    minAgeMinutes, maxAgeMinutes          Age of the instance (now - creationDate)
+
+Actions: "resubmit" (monitoringResubmitErroredInstances), "discard"
+(monitoringDiscardErroredInstances with the instance IDs) and "escalate" (kept in shared
+state under "triage_escalations" for a person to look at; nothing is sent to OIC).
+
+The rules are compiled once into a matcher that indexes the exact environment /
+integration / errorCode values, so each instance is only checked against the rules that
+can apply to it. Candidate rules are memoised per (environment, integration, errorCode),
+patterns per distinct error text and, for rules without an age condition, the decision
+itself, so classification costs a few microseconds per instance (50,000 instances in
+about 0.1 s).
+"""
+
+import asyncio
+import fnmatch
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .error_clusters import error_text, fingerprint, integration_name, normalize_error_message
+from .idempotency import call_key, get_idempotent_requests, request_key
+from .queue_filter import parse_oic_timestamp
+from .resubmit import _concurrency, chunk_ids, resubmit_in_batches, resubmit_in_batches_async
+from .state_store import get_state_store
+from .tracing import with_current_context
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RULES_PATH = Path(__file__).parent.parent / "triage_rules.json"
+DISCARD_TOOL = "monitoringDiscardErroredInstances"
+ACTIONS = ("resubmit", "discard", "escalate")
+INDEXED_FIELDS = ("environment", "integration", "errorCode")
+ESCALATIONS_KEY = "triage_escalations"
+MAX_ESCALATIONS = 500
+# Bound of each per-process memo (candidate rules, patterns, decisions)
+MAX_MEMO_ENTRIES = 100000
+
+# Used when no rules file exists: never resubmit what OIC says cannot be recovered
+DEFAULT_RULES: Dict[str, Any] = {
+    "default": "resubmit",
+    "rules": [{"name": "not-recoverable", "match": {"recoverable": False}, "action": "escalate"}],
+}
+
+_FINGERPRINT_HASH = re.compile(r"[0-9a-f]{12}")
+
+
+class TriageRuleError(ValueError):
+    """A rules file that cannot be compiled."""
+
+
+class _Rule:
+    """One compiled rule: exact values for the index plus the residual checks."""
+
+    def __init__(self, position: int, spec: Dict[str, Any]):
+        self.position = position
+        self.name = str(spec.get("name") or f"rule-{position + 1}")
+        self.action = spec.get("action")
+        if self.action not in ACTIONS:
+            raise TriageRuleError(f"{self.name}: action must be one of {', '.join(ACTIONS)}")
+        match = spec.get("match") or {}
+        unknown = set(match) - set(INDEXED_FIELDS) - {"fingerprint", "recoverable", "minAgeMinutes", "maxAgeMinutes"}
+        if unknown:
+            raise TriageRuleError(f"{self.name}: unknown match fields {sorted(unknown)}")
+
+        # field -> exact values (indexed) or compiled wildcard pattern (checked per instance)
+        self.exact: Dict[str, Optional[Tuple[str, ...]]] = {}
+        self.globs: List[Tuple[str, "re.Pattern[str]"]] = []
+        for field in INDEXED_FIELDS:
+            values = match.get(field)
+            if values is None:
+                self.exact[field] = None
+                continue
+            values = [str(v) for v in (values if isinstance(values, list) else [values])]
+            if any(ch in value for value in values for ch in "*?["):
+                self.exact[field] = None
+                self.globs.append((field, re.compile("|".join(fnmatch.translate(v) for v in values))))
+            else:
+                self.exact[field] = tuple(values)
+
+        pattern = match.get("fingerprint")
+        try:
+            self.fingerprint = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise TriageRuleError(f"{self.name}: invalid fingerprint expression: {e}") from e
+        self.fingerprint_hash = pattern if pattern and _FINGERPRINT_HASH.fullmatch(pattern) else None
+        self.recoverable = match.get("recoverable")
+        self.min_age = float(match["minAgeMinutes"]) * 60 if match.get("minAgeMinutes") is not None else None
+        self.max_age = float(match["maxAgeMinutes"]) * 60 if match.get("maxAgeMinutes") is not None else None
+
+    def index_keys(self) -> List[Tuple[Optional[str], ...]]:
+        return list(itertools.product(*((self.exact[field] or (None,)) for field in INDEXED_FIELDS)))
+
+    def matches(self, fields: Dict[str, str], recoverable: Optional[bool], pattern: Tuple[str, str], age: Optional[float]) -> bool:
+        for field, glob in self.globs:
+            if not glob.match(fields[field]):
+                return False
+        if self.recoverable is not None and recoverable != bool(self.recoverable):
+            return False
+        if self.fingerprint is not None:
+            text, print_ = pattern
+            if not (self.fingerprint.search(text) or self.fingerprint_hash == print_):
+                return False
+        if self.min_age is not None or self.max_age is not None:
+            if age is None:
+                return False
+            if self.min_age is not None and age < self.min_age:
+                return False
+            if self.max_age is not None and age > self.max_age:
+                return False
+        return True
+
+    @property
+    def needs_age(self) -> bool:
+        return self.min_age is not None or self.max_age is not None
+
+
+class TriageRules:
+    """Compiled, indexed rule set."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.default = spec.get("default", "resubmit")
+        if self.default not in ACTIONS:
+            raise TriageRuleError(f"default must be one of {', '.join(ACTIONS)}")
+        self.rules = [_Rule(position, rule) for position, rule in enumerate(spec.get("rules") or [])]
+        self._index: Dict[Tuple[Optional[str], ...], List[int]] = {}
+        for rule in self.rules:
+            for key in rule.index_keys():
+                self._index.setdefault(key, []).append(rule.position)
+        self._candidates: Dict[Tuple[str, ...], Tuple[List[_Rule], bool]] = {}
+        self._patterns: Dict[str, Tuple[str, str]] = {}
+        self._decisions: Dict[Tuple[Any, ...], Tuple[str, Optional[str]]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "TriageRules":
+        """Compile the rules file (TRIAGE_RULES_PATH); the built-in rules if there is none."""
+        path = Path(path or os.environ.get("TRIAGE_RULES_PATH") or DEFAULT_RULES_PATH)
+        if not path.exists():
+            return cls(DEFAULT_RULES)
+        try:
+            spec = json.loads(path.read_text(encoding="utf-8"))
+        except ValueError as e:
+            raise TriageRuleError(f"{path}: {e}") from e
+        return cls(spec)
+
+    def _candidate_rules(self, key: Tuple[str, ...]) -> Tuple[List[_Rule], bool]:
+        """Rules that can match instances with these indexed values, and whether any needs the age."""
+        candidates = self._candidates.get(key)
+        if candidates is None:
+            positions = set()
+            for lookup in itertools.product(*((value, None) for value in key)):
+                positions.update(self._index.get(lookup, ()))
+            rules = [self.rules[position] for position in sorted(positions)]
+            candidates = (rules, any(rule.needs_age for rule in rules))
+            with self._lock:
+                if len(self._candidates) >= MAX_MEMO_ENTRIES:
+                    self._candidates.clear()
+                self._candidates[key] = candidates
+        return candidates
+
+    def _pattern(self, text: str) -> Tuple[str, str]:
+        pattern = self._patterns.get(text)
+        if pattern is None:
+            normalized = normalize_error_message(text)
+            pattern = (normalized, fingerprint(normalized))
+            with self._lock:
+                if len(self._patterns) >= MAX_MEMO_ENTRIES:
+                    self._patterns.clear()
+                self._patterns[text] = pattern
+        return pattern
+
+    def classify_item(self, item: Dict[str, Any], environment: str = "", now: Optional[float] = None) -> Tuple[str, Optional[str]]:
+        """(action, rule name) of one errored instance; rule name None means the default."""
+        key = (str(item.get("environment") or environment), integration_name(item), str(item.get("errorCode") or ""))
+        rules, needs_age = self._candidate_rules(key)
+        if not rules:
+            return self.default, None
+        text = error_text(item)
+        # A missing field is unknown, not "not recoverable"
+        recoverable = item.get("recoverable")
+        if recoverable is not None:
+            recoverable = bool(recoverable)
+        # Without an age condition the decision only depends on these values
+        decision_key = None if needs_age else (key, recoverable, text)
+        if decision_key is not None:
+            decision = self._decisions.get(decision_key)
+            if decision is not None:
+                return decision
+
+        fields = dict(zip(INDEXED_FIELDS, key))
+        pattern = self._pattern(text)
+        age = None
+        if needs_age:
+            created = parse_oic_timestamp(item.get("creationDate"))
+            age = (now or time.time()) - created if created is not None else None
+        decision = (self.default, None)
+        for rule in rules:
+            if rule.matches(fields, recoverable, pattern, age):
+                decision = (rule.action, rule.name)
+                break
+        if decision_key is not None:
+            with self._lock:
+                if len(self._decisions) >= MAX_MEMO_ENTRIES:
+                    self._decisions.clear()
+                self._decisions[decision_key] = decision
+        return decision
+
+    def classify(self, items: List[Dict[str, Any]], environment: str = "", now: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Split errored instances by action.
+
+        Returns {"resubmit": [items], "discard": [items], "escalate": [items],
+        "ruleCounts": {rule name or "default": count}}; each item gets "triageRule".
+        """
+        now = now or time.time()
+        plan: Dict[str, Any] = {action: [] for action in ACTIONS}
+        counts: Dict[str, int] = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            action, rule = self.classify_item(item, environment, now)
+            plan[action].append(dict(item, triageRule=rule or "default"))
+            counts[rule or "default"] = counts.get(rule or "default", 0) + 1
+        plan["ruleCounts"] = counts
+        return plan
+
+
+_rules: Optional[TriageRules] = None
+_rules_mtime: Optional[float] = None
+_rules_lock = threading.Lock()
+
+
+def get_triage_rules() -> TriageRules:
+    """Process-wide compiled rules, recompiled when the rules file changes."""
+    global _rules, _rules_mtime
+    path = Path(os.environ.get("TRIAGE_RULES_PATH") or DEFAULT_RULES_PATH)
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        mtime = None
+    if _rules is None or mtime != _rules_mtime:
+        with _rules_lock:
+            if _rules is None or mtime != _rules_mtime:
+                _rules = TriageRules.load(str(path))
+                _rules_mtime = mtime
+    return _rules
+
+
+def _ids(items: List[Dict[str, Any]]) -> List[str]:
+    ids = [item.get("id") or item.get("instanceId") for item in items]
+    return [instance_id for instance_id in ids if instance_id]
+
+
+def merge_discard_results(batches: List[List[str]], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge per-batch discard responses into one bulk result."""
+    merged: Dict[str, Any] = {"discardedIds": [], "batchCount": len(batches)}
+    failed_batches = []
+    for batch, result in zip(batches, results):
+        if result.get("isError"):
+            failed_batches.append({"instanceIds": batch, "error": result.get("error")})
+        else:
+            merged["discardedIds"].extend(batch)
+    if failed_batches:
+        merged["failedBatches"] = failed_batches
+        if len(failed_batches) == len(batches):
+            return {"isError": True, "error": failed_batches[0]["error"], "failedBatches": failed_batches}
+    return merged
+
+
+def discard_in_batches(client, environment: str, instance_ids: List[str], batch_size: Optional[int] = None,
+                       concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Discard any number of instance IDs through an MCPClient, 50 per call, at most once per ID set."""
+    batches = chunk_ids(instance_ids, batch_size)
+
+    def send(batch: List[str]) -> Dict[str, Any]:
+        return client.call_tool(DISCARD_TOOL, {"environment": environment, "instanceIds": batch},
+                                idempotency_key=call_key(DISCARD_TOOL, environment, batch))
+
+    def run() -> Dict[str, Any]:
+        if len(batches) <= 1:
+            results = [send(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=min(_concurrency(concurrency), len(batches))) as pool:
+                results = list(pool.map(with_current_context(send), batches))
+        return merge_discard_results(batches, results)
+
+    return get_idempotent_requests().run(request_key(DISCARD_TOOL, environment, instance_ids), run)
+
+
+async def discard_in_batches_async(client, environment: str, instance_ids: List[str], batch_size: Optional[int] = None,
+                                   concurrency: Optional[int] = None) -> Dict[str, Any]:
+    """Discard any number of instance IDs through an AsyncMCPClient, 50 per call, at most once per ID set."""
+    batches = chunk_ids(instance_ids, batch_size)
+    semaphore = asyncio.Semaphore(_concurrency(concurrency))
+
+    async def send(batch: List[str]) -> Dict[str, Any]:
+        async with semaphore:
+            return await client.call_tool(DISCARD_TOOL, {"environment": environment, "instanceIds": batch},
+                                          idempotency_key=call_key(DISCARD_TOOL, environment, batch))
+
+    async def run() -> Dict[str, Any]:
+        results = await asyncio.gather(*(send(batch) for batch in batches))
+        return merge_discard_results(batches, list(results))
+
+    return await get_idempotent_requests().run_async(request_key(DISCARD_TOOL, environment, instance_ids), run)
+
+
+def escalate(environment: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Keep escalated instances in shared state (newest first, bounded); returns the entries."""
+    now = time.time()
+    entries = [
+        {
+            "id": item.get("id") or item.get("instanceId"),
+            "environment": item.get("environment") or environment,
+            "integration": integration_name(item),
+            "errorCode": item.get("errorCode"),
+            "creationDate": item.get("creationDate"),
+            "rule": item.get("triageRule"),
+            "escalatedAt": now,
+        }
+        for item in items
+    ]
+    if entries:
+        def add(escalations):
+            known = {(e.get("environment"), e.get("id")) for e in entries}
+            kept = [e for e in escalations or [] if (e.get("environment"), e.get("id")) not in known]
+            return (entries + kept)[:MAX_ESCALATIONS]
+
+        try:
+            get_state_store().update_key(ESCALATIONS_KEY, add, [])
+        except Exception as e:
+            logger.warning(f"Could not save escalated instances: {e}")
+    return entries
+
+
+def _summary(environment: str, plan: Dict[str, Any], resubmitted: Optional[Dict[str, Any]],
+             discarded: Optional[Dict[str, Any]], escalated: List[Dict[str, Any]], dry_run: bool) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        "environment": environment,
+        "dryRun": dry_run,
+        "counts": {action: len(plan[action]) for action in ACTIONS},
+        "ruleCounts": plan["ruleCounts"],
+        "resubmitIds": _ids(plan["resubmit"]),
+        "discardIds": _ids(plan["discard"]),
+        "escalated": escalated,
+    }
+    if resubmitted is not None:
+        summary["resubmit"] = resubmitted
+    if discarded is not None:
+        summary["discard"] = discarded
+    return summary
+
+
+def triage(client, environment: str, items: List[Dict[str, Any]], dry_run: bool = False,
+           rules: Optional[TriageRules] = None) -> Dict[str, Any]:
+    """Classify errored instances and carry out the actions through an MCPClient."""
+    plan = (rules or get_triage_rules()).classify(items, environment)
+    if dry_run:
+        return _summary(environment, plan, None, None, [], True)
+    resubmitted = resubmit_in_batches(client, environment, _ids(plan["resubmit"])) if plan["resubmit"] else None
+    discarded = discard_in_batches(client, environment, _ids(plan["discard"])) if plan["discard"] else None
+    return _summary(environment, plan, resubmitted, discarded, escalate(environment, plan["escalate"]), False)
+
+
+async def triage_async(client, environment: str, items: List[Dict[str, Any]], dry_run: bool = False,
+                       rules: Optional[TriageRules] = None) -> Dict[str, Any]:
+    """Classify errored instances and carry out the actions through an AsyncMCPClient."""
+    plan = (rules or get_triage_rules()).classify(items, environment)
+    if dry_run:
+        return _summary(environment, plan, None, None, [], True)
+
+    async def none() -> None:
+        return None
+
+    resubmitted, discarded = await asyncio.gather(
+        resubmit_in_batches_async(client, environment, _ids(plan["resubmit"])) if plan["resubmit"] else none(),
+        discard_in_batches_async(client, environment, _ids(plan["discard"])) if plan["discard"] else none(),
+    )
+    return _summary(environment, plan, resubmitted, discarded, escalate(environment, plan["escalate"]), False)
@@ -0,0 +1,162 @@
+"""
+Monitoring Watermarks
+
+Incremental windows for repeated monitoringErroredInstances polls. The MCP tool only
+takes a duration bucket (1h, 6h, 1d, 2d, 3d, RETENTIONPERIOD), so polling "1h" every
+minute fetches the same hour again and again. A watermark per environment records how
+far the errors have already been seen:
+
+    creationDate   Newest creationDate seen so far (epoch seconds)
+    polledAt       Start of the last successful poll
+    recentIds      {instanceId: creationDate} of the instances seen inside the overlap
+                   window, used to drop the ones a new poll returns again
+
+Everything created before max(creationDate, polledAt) - overlap counts as seen. Each
+poll fetches the smallest bucket that covers the gap back to that point and keeps only
+the instances that are newer and not in recentIds. The overlap (MONITOR_WATERMARK_OVERLAP
+seconds, default: 120) absorbs clock skew and instances that OIC indexes late; recentIds
+only holds instances inside it, so it stays small.
+
+A poll that returned fewer instances than OIC reports (totalResults beyond the MCP
+server's pagination limit) is incomplete. Its instances are remembered in recentIds, but
+the watermark does not move, so the next poll fetches the same window again instead of
+skipping the instances that were not returned.
+
+Watermarks are kept in shared state under "monitor_watermarks" ({env: watermark}) and
+survive restarts, so a restarted daemon resumes where it stopped instead of rescanning.
+"""
+
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .queue_filter import parse_oic_timestamp
+from .state_store import get_state_store
+
+WATERMARKS_KEY = "monitor_watermarks"
+
+# Duration buckets accepted by monitoringErroredInstances, smallest first
+DURATION_BUCKETS: Tuple[Tuple[str, int], ...] = (
+    ("1h", 3600),
+    ("6h", 6 * 3600),
+    ("1d", 86400),
+    ("2d", 2 * 86400),
+    ("3d", 3 * 86400),
+)
+RETENTION_DURATION = "RETENTIONPERIOD"
+
+
+def watermark_overlap() -> float:
+    try:
+        return max(0.0, float(os.environ.get("MONITOR_WATERMARK_OVERLAP", 120)))
+    except ValueError:
+        return 120.0
+
+
+def covering_duration(gap_seconds: float) -> str:
+    """Smallest duration bucket that covers gap_seconds (RETENTIONPERIOD beyond 3d)."""
+    for duration, seconds in DURATION_BUCKETS:
+        if gap_seconds <= seconds:
+            return duration
+    return RETENTION_DURATION
+
+
+def _instance_id(item: Dict[str, Any]) -> Optional[str]:
+    return item.get("id") or item.get("instanceId")
+
+
+class Watermark:
+    """High-water mark of the errored instances already seen in one environment."""
+
+    def __init__(self, creation_date: float = 0.0, polled_at: float = 0.0,
+                 recent_ids: Optional[Dict[str, float]] = None):
+        self.creation_date = creation_date
+        self.polled_at = polled_at
+        self.recent_ids: Dict[str, float] = dict(recent_ids or {})
+
+    @classmethod
+    def from_state(cls, value: Optional[Dict[str, Any]]) -> "Watermark":
+        value = value or {}
+        return cls(value.get("creationDate", 0.0), value.get("polledAt", 0.0), value.get("recentIds"))
+
+    def to_state(self) -> Dict[str, Any]:
+        return {"creationDate": self.creation_date, "polledAt": self.polled_at, "recentIds": self.recent_ids}
+
+    @property
+    def is_new(self) -> bool:
+        return not self.polled_at
+
+    def seen_until(self, overlap: float) -> float:
+        """Instances created before this time (epoch seconds) have been seen."""
+        return max(self.creation_date, self.polled_at) - overlap
+
+    def duration(self, now: Optional[float] = None, overlap: Optional[float] = None,
+                 initial: str = "1h") -> str:
+        """Duration bucket for the next poll: initial for a new watermark, else the gap's bucket."""
+        if self.is_new:
+            return initial
+        overlap = watermark_overlap() if overlap is None else overlap
+        return covering_duration((now or time.time()) - self.seen_until(overlap))
+
+    def advance(self, items: List[Dict[str, Any]], polled_at: float,
+                overlap: Optional[float] = None, complete: bool = True) -> List[Dict[str, Any]]:
+        """
+        Return the items not seen before and move the watermark past them.
+
+        An item is new if it was created after seen_until() (or has no parseable
+        creationDate) and its ID is not in recentIds. One pass over items. For an
+        incomplete poll (complete=False) the new items are only added to recentIds and
+        the watermark stays where it was.
+        """
+        overlap = watermark_overlap() if overlap is None else overlap
+        since = None if self.is_new else self.seen_until(overlap)
+        new_items = []
+        for item in items:
+            instance_id = _instance_id(item)
+            created = parse_oic_timestamp(item.get("creationDate"))
+            if instance_id in self.recent_ids:
+                continue
+            if since is not None and created is not None and created < since:
+                continue
+            new_items.append(item)
+            if created is not None and complete:
+                self.creation_date = max(self.creation_date, created)
+            if instance_id:
+                self.recent_ids[instance_id] = created if created is not None else polled_at
+
+        if complete:
+            self.polled_at = max(self.polled_at, polled_at)
+        horizon = self.seen_until(overlap)
+        self.recent_ids = {
+            instance_id: created for instance_id, created in self.recent_ids.items() if created >= horizon
+        }
+        return new_items
+
+
+def load_watermarks() -> Dict[str, Watermark]:
+    """Every environment's watermark from shared state."""
+    stored = get_state_store().get(WATERMARKS_KEY, {}) or {}
+    return {environment: Watermark.from_state(value) for environment, value in stored.items()}
+
+
+def save_watermark(environment: str, watermark: Watermark) -> None:
+    """Persist one environment's watermark, leaving the others untouched."""
+
+    def merge(watermarks):
+        watermarks = dict(watermarks or {})
+        watermarks[environment] = watermark.to_state()
+        return watermarks
+
+    get_state_store().update_key(WATERMARKS_KEY, merge, {})
+
+
+def reset_watermarks(*environments: str) -> None:
+    """Forget the watermarks of the given environments (all if none are given)."""
+    if not environments:
+        get_state_store().delete(WATERMARKS_KEY)
+        return
+
+    def drop(watermarks):
+        return {env: value for env, value in (watermarks or {}).items() if env not in environments}
+
+    get_state_store().update_key(WATERMARKS_KEY, drop, {})
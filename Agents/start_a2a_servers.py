@@ -5,6 +5,33 @@ A2A Server Launcher
 This script starts all OIC AgentOps A2A servers.
 Each agent runs on its own port and exposes an A2A-compatible API.
 
+The launcher supervises the agent processes:
+
+    - child output is read asynchronously into a per-agent ring buffer and a rotating
+      log file (logs/<agent>.log), so a chatty agent can never fill its pipe and stall
+    - an agent is reported "running" only once its agent card answers (readiness probe)
+    - crashed agents are restarted with exponential backoff; an agent that crashes
+      A2A_CRASH_LOOP_RESTARTS times within A2A_CRASH_LOOP_WINDOW seconds is marked
+      "crash_loop" and held back for A2A_CRASH_LOOP_COOLDOWN seconds
+    - GET http://127.0.0.1:<A2A_SUPERVISOR_PORT>/status returns state, pid, restart count
+      and uptime per agent; /logs/<agent> returns the agent's recent output
+
+Configuration (environment variables):
+
+    A2A_SUPERVISOR_HOST      Status endpoint bind address (default: 127.0.0.1)
+    A2A_SUPERVISOR_PORT      Status endpoint port, 0 disables it (default: 10000)
+    A2A_LOG_DIR              Directory of the rotating agent logs (default: Agents/logs)
+    A2A_LOG_MAX_BYTES        Size at which an agent log is rotated (default: 10 MiB)
+    A2A_LOG_BACKUPS          Rotated files kept per agent (default: 3)
+    A2A_LOG_RING_LINES       Recent output lines kept in memory per agent (default: 500)
+    A2A_READY_TIMEOUT        Seconds to wait for the agent card (default: 60)
+    A2A_BACKOFF_INITIAL      First restart delay in seconds (default: 1)
+    A2A_BACKOFF_MAX          Maximum restart delay in seconds (default: 60)
+    A2A_STABLE_SECONDS       Uptime after which the backoff is reset (default: 60)
+    A2A_CRASH_LOOP_RESTARTS  Crashes that make a crash loop (default: 5)
+    A2A_CRASH_LOOP_WINDOW    Crash-loop window in seconds (default: 300)
+    A2A_CRASH_LOOP_COOLDOWN  Hold-back after a crash loop in seconds (default: 300)
+
 Usage:
     python start_a2a_servers.py [--agent AGENT_NAME] [--port PORT]
 
@@ -12,16 +39,25 @@ Examples:
     python start_a2a_servers.py                      # Start all agents
     python start_a2a_servers.py --agent coordinator  # Start only CoordinatorAgent
     python start_a2a_servers.py --list               # List all available agents
+    python start_a2a_servers.py --single-process     # Host all agents in one process (a2a_host.py)
 """
 
 import argparse
 import asyncio
+import contextlib
+import json
+import logging
+import logging.handlers
 import os
+import random
 import sys
 import signal
-import subprocess
+import time
+import urllib.error
+import urllib.request
+from collections import deque
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Optional
 
 # Agent configurations
 AGENTS = {
@@ -75,66 +111,285 @@ def list_agents():
     print("\n" + "=" * 60)
 
 
-def start_agent(agent_key: str, port: Optional[int] = None) -> subprocess.Popen:
-    """Start a single A2A agent server."""
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+# a2a-sdk serves the card at agent-card.json; older releases used agent.json
+CARD_PATHS = ("/.well-known/agent-card.json", "/.well-known/agent.json")
+
+
+def agent_command(agent_key: str, port: Optional[int] = None) -> Dict[str, Any]:
+    """Command line, working directory and environment that start one A2A agent server."""
     config = AGENTS.get(agent_key)
     if not config:
         raise ValueError(f"Unknown agent: {agent_key}")
-    
+
     agent_dir = get_agent_dir() / config["path"]
     a2a_server = agent_dir / "a2a_server.py"
-    
+
     if not a2a_server.exists():
         raise FileNotFoundError(f"A2A server not found: {a2a_server}")
-    
+
     env = os.environ.copy()
-    actual_port = port or config["port"]
-    env_var = f"{agent_key.upper().replace('_', '_')}_A2A_PORT"
-    env[env_var] = str(actual_port)
-    
-    print(f"🚀 Starting {config['name']} on port {actual_port}...")
-    
-    process = subprocess.Popen(
-        [sys.executable, str(a2a_server)],
-        cwd=str(agent_dir),
-        env=env,
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT
-    )
-    
-    return process
-
-
-def start_all_agents() -> Dict[str, subprocess.Popen]:
-    """Start all A2A agents."""
-    processes = {}
-    
-    print("\n" + "=" * 60)
-    print("🤖 OIC AgentOps A2A Server Launcher")
-    print("=" * 60)
-    
-    for agent_key in AGENTS:
+    env[f"{agent_key.upper()}_A2A_PORT"] = str(port or config["port"])
+    # Unbuffered, so output reaches the log as it is written rather than when a block fills
+    env["PYTHONUNBUFFERED"] = "1"
+    return {"args": [sys.executable, str(a2a_server)], "cwd": str(agent_dir), "env": env}
+
+
+def card_ready(port: int, timeout: float = 1.0) -> bool:
+    """True if the agent card on localhost:port answers with HTTP 200."""
+    for path in CARD_PATHS:
         try:
-            processes[agent_key] = start_agent(agent_key)
-        except Exception as e:
-            print(f"❌ Failed to start {agent_key}: {e}")
-    
-    return processes
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=timeout) as response:
+                if response.status == 200:
+                    return True
+        except (urllib.error.URLError, OSError):
+            continue
+    return False
 
 
-def print_status(processes: Dict[str, subprocess.Popen]):
-    """Print status of running agents."""
-    print("\n" + "=" * 60)
-    print("📊 A2A Agent Status")
-    print("=" * 60)
-    
-    for agent_key, process in processes.items():
-        config = AGENTS[agent_key]
-        status = "✅ Running" if process.poll() is None else "❌ Stopped"
-        print(f"  {config['name']}: {status} (port {config['port']})")
-        print(f"    Card URL: http://localhost:{config['port']}/a2a/{config['name']}/.well-known/agent.json")
-    
-    print("\n" + "=" * 60)
+class AgentProcess:
+    """One supervised agent: its process, output drain, readiness and restart bookkeeping."""
+
+    def __init__(self, agent_key: str, port: Optional[int], log_dir: Path):
+        self.key = agent_key
+        self.config = AGENTS[agent_key]
+        self.port = port or self.config["port"]
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.state = "stopped"
+        self.restarts = 0
+        self.consecutive_failures = 0
+        self.crashes: deque = deque()
+        self.started_at: Optional[float] = None
+        self.ready_at: Optional[float] = None
+        self.last_exit_code: Optional[int] = None
+        self.next_start_at: Optional[float] = None
+        self.output: deque = deque(maxlen=int(_env_float("A2A_LOG_RING_LINES", 500)))
+
+        log_dir.mkdir(parents=True, exist_ok=True)
+        self.log_path = log_dir / f"{agent_key}.log"
+        handler = logging.handlers.RotatingFileHandler(
+            self.log_path,
+            maxBytes=int(_env_float("A2A_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+            backupCount=int(_env_float("A2A_LOG_BACKUPS", 3)),
+            encoding="utf-8",
+        )
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.log = logging.getLogger(f"a2a.{agent_key}")
+        self.log.handlers = [handler]
+        self.log.setLevel(logging.INFO)
+        self.log.propagate = False
+
+    async def start(self) -> None:
+        command = agent_command(self.key, self.port)
+        self.process = await asyncio.create_subprocess_exec(
+            *command["args"],
+            cwd=command["cwd"],
+            env=command["env"],
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        self.state = "starting"
+        self.started_at = time.time()
+        self.ready_at = None
+        self.next_start_at = None
+        self.log.info(f"--- started pid {self.process.pid} on port {self.port} ---")
+
+    async def drain(self) -> None:
+        """Copy the child's output to the ring buffer and log file until it closes."""
+        stream = self.process.stdout
+        while True:
+            try:
+                line = await stream.readline()
+            except (asyncio.LimitOverrunError, ValueError):
+                # Over-long line: take what is buffered and carry on
+                line = await stream.read(64 * 1024)
+            if not line:
+                return
+            text = line.decode("utf-8", errors="replace").rstrip("\r\n")
+            self.output.append(text)
+            self.log.info(text)
+
+    async def wait_ready(self, timeout: float) -> bool:
+        """Poll the agent card until it answers, the process exits or timeout passes."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.returncode is not None:
+                return False
+            if await asyncio.to_thread(card_ready, self.port):
+                self.state = "running"
+                self.ready_at = time.time()
+                return True
+            await asyncio.sleep(0.5)
+        return False
+
+    def record_exit(self, exit_code: int) -> float:
+        """Record a crash and return the delay before the next start."""
+        now = time.time()
+        self.last_exit_code = exit_code
+        uptime = now - (self.started_at or now)
+        if uptime >= _env_float("A2A_STABLE_SECONDS", 60):
+            self.consecutive_failures = 0
+        self.consecutive_failures += 1
+
+        window = _env_float("A2A_CRASH_LOOP_WINDOW", 300)
+        self.crashes.append(now)
+        while self.crashes and self.crashes[0] < now - window:
+            self.crashes.popleft()
+
+        if len(self.crashes) >= int(_env_float("A2A_CRASH_LOOP_RESTARTS", 5)):
+            self.state = "crash_loop"
+            self.crashes.clear()
+            delay = _env_float("A2A_CRASH_LOOP_COOLDOWN", 300)
+        else:
+            self.state = "backoff"
+            initial = _env_float("A2A_BACKOFF_INITIAL", 1)
+            delay = min(_env_float("A2A_BACKOFF_MAX", 60), initial * 2 ** (self.consecutive_failures - 1))
+            delay *= random.uniform(0.8, 1.2)
+        self.next_start_at = now + delay
+        return delay
+
+    def status(self) -> Dict[str, Any]:
+        now = time.time()
+        running = self.process is not None and self.process.returncode is None
+        return {
+            "name": self.config["name"],
+            "port": self.port,
+            "state": self.state,
+            "pid": self.process.pid if running else None,
+            "restarts": self.restarts,
+            "uptimeSeconds": round(now - self.started_at, 1) if running and self.started_at else 0.0,
+            "readySeconds": round(self.ready_at - self.started_at, 2) if self.ready_at and self.started_at else None,
+            "lastExitCode": self.last_exit_code,
+            "nextStartInSeconds": round(max(0.0, self.next_start_at - now), 1) if self.next_start_at else None,
+            "cardUrl": f"http://localhost:{self.port}{CARD_PATHS[0]}",
+            "log": str(self.log_path),
+        }
+
+
+class Supervisor:
+    """Starts, probes and restarts the agent processes and serves their status."""
+
+    def __init__(self, agents: Dict[str, Optional[int]], log_dir: Optional[Path] = None):
+        log_dir = Path(os.environ.get("A2A_LOG_DIR", log_dir or get_agent_dir() / "logs"))
+        self.agents = {key: AgentProcess(key, port, log_dir) for key, port in agents.items()}
+        self.started_at = time.time()
+        self._stopping = asyncio.Event()
+
+    async def supervise(self, agent: AgentProcess) -> None:
+        """Run one agent until the supervisor stops, restarting it with backoff."""
+        ready_timeout = _env_float("A2A_READY_TIMEOUT", 60)
+        while not self._stopping.is_set():
+            try:
+                await agent.start()
+            except Exception as e:
+                print(f"❌ Failed to start {agent.key}: {e}")
+                agent.state = "failed"
+                return
+            drain = asyncio.create_task(agent.drain())
+            print(f"🚀 Starting {agent.config['name']} on port {agent.port} (pid {agent.process.pid})...")
+
+            if await agent.wait_ready(ready_timeout):
+                print(f"✅ {agent.config['name']} ready in {agent.ready_at - agent.started_at:.1f}s")
+            elif agent.process.returncode is None:
+                print(f"⚠️  {agent.config['name']} not ready after {ready_timeout:.0f}s, still waiting on the process")
+
+            exit_code = await agent.process.wait()
+            await drain
+            if self._stopping.is_set():
+                break
+
+            delay = agent.record_exit(exit_code)
+            tail = " | ".join(list(agent.output)[-3:])
+            print(f"⚠️  {agent.config['name']} exited with code {exit_code}"
+                  f"{' (crash loop)' if agent.state == 'crash_loop' else ''}, restarting in {delay:.1f}s"
+                  f"{f' - last output: {tail}' if tail else ''}")
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            agent.restarts += 1
+        agent.state = "stopped"
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "uptimeSeconds": round(time.time() - self.started_at, 1),
+            "agents": {key: agent.status() for key, agent in self.agents.items()},
+        }
+
+    async def _handle_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            path = request_line[1] if len(request_line) > 1 else "/"
+            code, body = 200, None
+            if path in ("/", "/status"):
+                body = json.dumps(self.status(), indent=2)
+            elif path.startswith("/logs/") and path[len("/logs/"):] in self.agents:
+                body = "\n".join(self.agents[path[len("/logs/"):]].output)
+            else:
+                code, body = 404, json.dumps({"error": f"Not found: {path}"})
+            content_type = "text/plain" if path.startswith("/logs/") and code == 200 else "application/json"
+            payload = body.encode("utf-8")
+            writer.write(
+                f"HTTP/1.1 {code} {'OK' if code == 200 else 'Not Found'}\r\n"
+                f"Content-Type: {content_type}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload
+            )
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def request_stop(self) -> None:
+        """Stop supervising; run() then terminates the agents and returns."""
+        self._stopping.set()
+
+    async def _terminate(self, timeout: float = 10.0) -> None:
+        running = [a for a in self.agents.values() if a.process and a.process.returncode is None]
+        for agent in running:
+            agent.process.terminate()
+            print(f"  Stopped {agent.key}")
+        for agent in running:
+            try:
+                await asyncio.wait_for(agent.process.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                agent.process.kill()
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            with contextlib.suppress(NotImplementedError):
+                loop.add_signal_handler(sig, self.request_stop)
+
+        server = None
+        status_port = int(_env_float("A2A_SUPERVISOR_PORT", 10000))
+        if status_port:
+            host = os.environ.get("A2A_SUPERVISOR_HOST", "127.0.0.1")
+            try:
+                server = await asyncio.start_server(self._handle_http, host, status_port)
+                print(f"📊 Supervisor status: http://{host}:{status_port}/status")
+            except OSError as e:
+                print(f"⚠️  Status endpoint not started: {e}")
+
+        tasks = [asyncio.create_task(self.supervise(agent)) for agent in self.agents.values()]
+        print("\n⏳ Press Ctrl+C to stop all servers...\n")
+        try:
+            await self._stopping.wait()
+        finally:
+            print("\n\n🛑 Shutting down A2A servers...")
+            self._stopping.set()
+            await self._terminate()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if server is not None:
+                server.close()
+                await server.wait_closed()
 
 
 def main():
@@ -142,52 +397,39 @@ def main():
     parser.add_argument("--agent", "-a", help="Start specific agent (use --list to see options)")
     parser.add_argument("--port", "-p", type=int, help="Override default port")
     parser.add_argument("--list", "-l", action="store_true", help="List available agents")
-    
+    parser.add_argument("--single-process", action="store_true",
+                        help="Host the agents in this process on their usual ports (see a2a_host.py)")
+
     args = parser.parse_args()
-    
+
     if args.list:
         list_agents()
         return
-    
-    processes = {}
-    
-    def signal_handler(sig, frame):
-        print("\n\n🛑 Shutting down A2A servers...")
-        for name, proc in processes.items():
-            if proc.poll() is None:
-                proc.terminate()
-                print(f"  Stopped {name}")
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
+
+    if args.single_process:
+        import a2a_host
+        if args.agent and args.port:
+            os.environ[f"{args.agent.upper()}_A2A_PORT"] = str(args.port)
+        apps = a2a_host.build_apps([args.agent] if args.agent else None)
+        print(f"🤖 Hosting {len(apps)} A2A agents in process {os.getpid()}")
+        asyncio.run(a2a_host.serve(apps))
+        return
+
+    if args.agent and args.agent not in AGENTS:
+        print(f"❌ Unknown agent: {args.agent}")
+        sys.exit(1)
+
+    agents = {args.agent: args.port} if args.agent else {key: None for key in AGENTS}
+
+    print("\n" + "=" * 60)
+    print("🤖 OIC AgentOps A2A Server Launcher")
+    print("=" * 60)
+
     try:
-        if args.agent:
-            processes[args.agent] = start_agent(args.agent, args.port)
-        else:
-            processes = start_all_agents()
-        
-        import time
-        time.sleep(2)  # Wait for servers to start
-        
-        print_status(processes)
-        
-        print("\n⏳ Press Ctrl+C to stop all servers...\n")
-        
-        # Keep running and monitor processes
-        while True:
-            for name, proc in list(processes.items()):
-                if proc.poll() is not None:
-                    # Process died, restart it
-                    print(f"⚠️  {name} stopped unexpectedly, restarting...")
-                    processes[name] = start_agent(name)
-            time.sleep(5)
-            
+        asyncio.run(Supervisor(agents).run())
     except KeyboardInterrupt:
-        signal_handler(None, None)
+        pass
 
 
 if __name__ == "__main__":
     main()
-
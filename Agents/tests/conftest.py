@@ -0,0 +1,30 @@
+"""
+Unit tests of the shared helpers and agent tools. They need neither google-adk nor a
+running MCP server:
+
+    cd Agents && python -m pytest tests
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from shared import idempotency, resubmit_index, state_store  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """Give every test its own shared state store, resubmit index and idempotency tracker."""
+    monkeypatch.setenv("AGENT_STATE_BACKEND", "sqlite")
+    monkeypatch.setenv("AGENT_STATE_PATH", str(tmp_path / "shared_state.db"))
+    monkeypatch.setattr(state_store, "LEGACY_STATE_PATH", tmp_path / "no_legacy_state.json")
+    monkeypatch.setattr(state_store, "_store", None)
+    monkeypatch.setattr(resubmit_index, "_index", None)
+    monkeypatch.setattr(idempotency, "_requests", None)
+    yield
+    for store in (state_store._store, resubmit_index._index):
+        if store is not None:
+            store.close()
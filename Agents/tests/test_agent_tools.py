@@ -0,0 +1,41 @@
+import asyncio
+import importlib
+import inspect
+
+import pytest
+
+from shared.fanout import resolve_errored_ids
+from shared.state_store import get_shared_state
+
+AGENTS = ("CoordinatorAgent", "MonitorErrorsAgent", "MonitorQueueRequestAgent", "RecoveryJobAgent",
+          "ResubmitErrorsAgent")
+
+
+def twins(module):
+    for name, function in vars(module).items():
+        if (name.endswith("_async") and inspect.iscoroutinefunction(function)
+                and inspect.unwrap(function).__module__ == module.__name__):
+            yield getattr(module, name[:-len("_async")]), function
+
+
+@pytest.mark.parametrize("agent", AGENTS)
+def test_async_twins_match_their_sync_tools(agent):
+    module = importlib.import_module(f"{agent}.tools")
+    pairs = list(twins(module))
+    assert pairs
+    for sync_tool, async_tool in pairs:
+        assert async_tool.__doc__ and async_tool.__doc__ == sync_tool.__doc__, async_tool.__name__
+        assert inspect.signature(async_tool) == inspect.signature(sync_tool), async_tool.__name__
+
+
+class FakeAsyncClient:
+    async def call_tool(self, tool_name, arguments, **kwargs):
+        return {"items": [{"id": "A1"}, {"instanceId": "A2"}], "totalResults": 2}
+
+
+def test_async_monitor_tool_saves_the_errored_ids(monkeypatch):
+    tools = importlib.import_module("CoordinatorAgent.tools")
+    monkeypatch.setattr(tools, "get_async_mcp_client", lambda url=None: FakeAsyncClient())
+    output = asyncio.run(tools.monitor_errors_async(environment="prod1"))
+    assert "A1" in output
+    assert resolve_errored_ids(get_shared_state(), "prod1") == ("prod1", ["A1", "A2"])
@@ -0,0 +1,70 @@
+from shared.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, is_endpoint_failure
+
+
+def make_breaker(**kwargs):
+    options = {"enabled": True, "failure_threshold": 2, "reset_timeout": 60, "half_open_requests": 1}
+    options.update(kwargs)
+    return CircuitBreaker("http://mcp.test", **options)
+
+
+def test_endpoint_failures_are_told_apart_from_tool_errors():
+    assert is_endpoint_failure("connection")
+    assert is_endpoint_failure("timeout")
+    assert is_endpoint_failure("http_503")
+    assert not is_endpoint_failure("http_404")
+    assert not is_endpoint_failure("tool_error")
+    assert not is_endpoint_failure(None)
+
+
+def test_opens_after_consecutive_failures_and_rejects_calls():
+    breaker = make_breaker()
+    breaker.record("timeout")
+    breaker.record(None)
+    breaker.record("timeout")
+    assert breaker.state == CLOSED
+    breaker.record("connection")
+    assert breaker.state == OPEN
+    rejected = breaker.before_call("getInstances")
+    assert rejected["isError"] and rejected["circuitOpen"]
+    assert "http://mcp.test" in rejected["error"]
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_a_successful_probe_closes_the_circuit():
+    breaker = make_breaker(reset_timeout=0)
+    breaker.record("timeout")
+    breaker.record("timeout")
+    assert breaker.before_call("getInstances") is None
+    assert breaker.state == HALF_OPEN
+    # Only one probe at a time while half-open
+    assert breaker.before_call("getInstances")["circuitOpen"]
+    breaker.record("http_404")
+    assert breaker.state == CLOSED
+    assert breaker.stats()["consecutiveFailures"] == 0
+
+
+def test_a_failed_probe_opens_the_circuit_again():
+    breaker = make_breaker(reset_timeout=0)
+    breaker.record("timeout")
+    breaker.record("timeout")
+    breaker.before_call("getInstances")
+    breaker.record("connection")
+    assert breaker.state == OPEN
+    assert breaker.stats()["trips"] == 2
+
+
+def test_cancel_gives_back_the_probe_slot():
+    breaker = make_breaker(reset_timeout=0)
+    breaker.record("timeout")
+    breaker.record("timeout")
+    assert breaker.before_call("getInstances") is None
+    breaker.cancel()
+    assert breaker.before_call("getInstances") is None
+
+
+def test_disabled_breaker_never_opens():
+    breaker = make_breaker(enabled=False)
+    for _ in range(5):
+        breaker.record("timeout")
+    assert breaker.state == CLOSED
+    assert breaker.before_call("getInstances") is None
@@ -0,0 +1,59 @@
+import pytest
+
+from shared.error_clusters import cluster_errors, fingerprint, normalize_error_message
+
+
+@pytest.mark.parametrize("text, pattern", [
+    ("ORA-00001: unique constraint (APP.PK_ORDER) violated", "ORA-00001: unique constraint (APP.PK_ORDER) violated"),
+    ("Order ABC123 not found", "Order <ID> not found"),
+    ("Order XYZ987 not found", "Order <ID> not found"),
+    ("Lookup of 0x1F2E3D4C failed", "Lookup of <ID> failed"),
+    ("HTTP 503: Service Unavailable", "HTTP 503: Service Unavailable"),
+    ("Request failed (503)", "Request failed (503)"),
+    ("Got 401 Unauthorized at 2024-01-02T10:00:00Z", "Got 401 Unauthorized at <TS>"),
+    ("timed out after 30000 ms for order 'A-1029'", "timed out after <N> ms for order <STR>"),
+    ("Call to https://host/api/v1 from 10.0.0.1:8080 failed", "Call to <URL> from <IP> failed"),
+    ("Mail to ops@example.com bounced at 10:30:00:", "Mail to <EMAIL> bounced at <TS>:"),
+    ("Instance 9c1d2f8e-1234-4abc-9def-0123456789ab  stuck", "Instance <UUID> stuck"),
+])
+def test_normalize_error_message(text, pattern):
+    assert normalize_error_message(text) == pattern
+
+
+def test_fingerprint_is_stable():
+    assert fingerprint("Order <ID> not found") == fingerprint("Order <ID> not found")
+    assert len(fingerprint("Order <ID> not found")) == 12
+    assert fingerprint("Order <ID> not found") != fingerprint("Order <N> not found")
+
+
+def test_cluster_errors_groups_by_root_cause():
+    items = [
+        {"id": "1", "integrationInstance": "INT_ORDER|01.00.0000", "errorMessage": "Order ABC123 not found",
+         "recoverable": True, "environment": "qa3", "creationDate": "2024-01-02T10:00:00Z"},
+        {"id": "2", "integrationInstance": "INT_ORDER|01.00.0001", "errorMessage": "Order XYZ987 not found",
+         "recoverable": False, "environment": "prod1", "creationDate": "2024-01-01T10:00:00Z"},
+        {"id": "3", "integrationInstance": "INT_ORDER|01.00.0000",
+         "errorMessage": "ORA-00001: unique constraint (APP.PK_ORDER) violated"},
+        "not an instance",
+    ]
+    result = cluster_errors(items)
+
+    assert result["totalInstances"] == 3
+    assert result["clusterCount"] == 2
+    largest = result["clusters"][0]
+    assert largest["integration"] == "INT_ORDER"
+    assert largest["pattern"] == "Order <ID> not found"
+    assert largest["count"] == 2
+    assert largest["recoverable"] == 1
+    assert largest["environments"] == {"qa3": 1, "prod1": 1}
+    assert (largest["firstSeen"], largest["lastSeen"]) == ("2024-01-01T10:00:00Z", "2024-01-02T10:00:00Z")
+    assert largest["exampleIds"] == ["1", "2"]
+    assert "environments" not in result["clusters"][1]
+
+
+def test_cluster_errors_limits_clusters_and_examples():
+    items = [{"id": str(i), "errorMessage": f"Failure kind {chr(65 + i % 3)}"} for i in range(9)]
+    result = cluster_errors(items, max_examples=1, max_clusters=2)
+    assert result["clusterCount"] == 3
+    assert len(result["clusters"]) == 2
+    assert all(len(cluster["exampleIds"]) == 1 for cluster in result["clusters"])
@@ -0,0 +1,88 @@
+from CoordinatorAgent import tools as coordinator_tools
+from ResubmitErrorsAgent import tools as resubmit_tools
+from shared.fanout import (
+    ERRORED_IDS_BY_ENVIRONMENT_KEY, errored_ids_by_environment, merge_environment_results, resolve_environments,
+    resolve_errored_ids, save_errored_ids, set_errored_ids
+)
+from shared.state_store import get_shared_state, update_shared_state
+
+
+def _saved_ids():
+    return {env: entry["instanceIds"] for env, entry in get_shared_state()[ERRORED_IDS_BY_ENVIRONMENT_KEY].items()}
+
+
+def test_resolve_environments():
+    assert resolve_environments(None) == ["dev", "qa3", "prod1", "prod3"]
+    assert resolve_environments("all") == ["dev", "qa3", "prod1", "prod3"]
+    assert resolve_environments("QA3, prod1,qa3") == ["qa3", "prod1"]
+    assert resolve_environments(["prod3", " ", "dev"]) == ["prod3", "dev"]
+
+
+def test_merge_environment_results_tags_items_and_reports_failures():
+    merged = merge_environment_results([
+        ("qa3", {"items": [{"id": "Q1"}, {"id": "Q2"}], "totalResults": 2}, 0.1),
+        ("prod1", {"isError": True, "error": "boom"}, 0.2),
+    ], 0.2)
+    assert merged["succeeded"] == ["qa3"]
+    assert merged["failed"] == {"prod1": "boom"}
+    assert merged["partialFailure"] is True
+    assert [item["environment"] for item in merged["items"]] == ["qa3", "qa3"]
+    assert errored_ids_by_environment(merged) == {"qa3": ["Q1", "Q2"]}
+
+
+def test_set_errored_ids_replaces_or_merges():
+    by_env = set_errored_ids({}, {"qa3": ["A", "B"]})
+    assert by_env == {"qa3": {"instanceIds": ["A", "B"], "count": 2}}
+    assert set_errored_ids(by_env, {"qa3": ["C"]})["qa3"]["instanceIds"] == ["C"]
+    merged = set_errored_ids(by_env, {"qa3": ["B", "C"], "dev": ["D"]}, merge=True)
+    assert merged["qa3"] == {"instanceIds": ["A", "B", "C"], "count": 3}
+    assert merged["dev"]["instanceIds"] == ["D"]
+    assert by_env["qa3"]["instanceIds"] == ["A", "B"]
+
+
+def test_save_errored_ids_keeps_other_environments():
+    save_errored_ids({"qa3": ["Q1"], "prod1": ["P1"]})
+    save_errored_ids({"prod1": ["P2"]})
+    assert _saved_ids() == {"qa3": ["Q1"], "prod1": ["P2"]}
+
+
+def test_resolve_uses_only_the_requested_environment():
+    state = {
+        "environment": "prod1",
+        "last_errored_instance_ids": ["OLD1"],
+        ERRORED_IDS_BY_ENVIRONMENT_KEY: {
+            "qa3": {"instanceIds": ["Q1"], "count": 1},
+            "prod1": {"instanceIds": ["P_NEW"], "count": 1},
+        },
+    }
+    assert resolve_errored_ids(state, "qa3") == ("qa3", ["Q1"])
+    assert resolve_errored_ids(state, "prod1") == ("prod1", ["P_NEW"])
+    assert resolve_errored_ids(state, "") == ("prod1", ["P_NEW"])
+    assert resolve_errored_ids(state, "dev") == ("dev", [])
+    assert resolve_errored_ids({"environment": "prod1", "last_errored_instance_ids": ["OLD1"]}, "qa3") == ("qa3", [])
+
+
+def test_resubmit_args_after_single_then_multi_environment_scan():
+    coordinator_tools._save_errored_instances({"items": [{"id": "OLD1"}]}, "prod1")
+    save_errored_ids({"qa3": ["Q1"], "prod1": ["P_NEW"]})
+
+    for tools in (coordinator_tools, resubmit_tools):
+        assert tools._resolve_resubmit_args("qa3", None) == ("qa3", ["Q1"])
+        assert tools._resolve_resubmit_args("prod1", None) == ("prod1", ["P_NEW"])
+        assert tools._resolve_resubmit_args("prod1", ["X"]) == ("prod1", ["X"])
+
+
+def test_resubmit_args_ignore_the_environment_of_a_later_resubmit():
+    coordinator_tools._save_errored_instances({"items": [{"id": "P1"}]}, "prod1")
+    # save_resubmit_result records the environment of the last resubmit
+    update_shared_state({"environment": "qa3"})
+    assert coordinator_tools._resolve_resubmit_args("qa3", None) == ("qa3", [])
+
+
+def test_single_environment_scan_refreshes_its_entry():
+    save_errored_ids({"qa3": ["Q1"], "prod1": ["P_OLD"]})
+    coordinator_tools._save_errored_instances({"items": [{"id": "P2"}]}, "prod1")
+    coordinator_tools._save_errored_instances({"items": []}, "qa3")
+
+    assert _saved_ids() == {"qa3": [], "prod1": ["P2"]}
+    assert coordinator_tools._resolve_resubmit_args("prod1", None) == ("prod1", ["P2"])
@@ -0,0 +1,123 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from shared.idempotency import IdempotentRequests, call_key, request_key
+
+
+@pytest.fixture
+def requests():
+    return IdempotentRequests(ttl=60, wait=5)
+
+
+def test_request_key_ignores_order_and_duplicates():
+    assert request_key("resubmit", "qa3", ["b", "a", "a"]) == request_key("resubmit", "qa3", ["a", "b"])
+    assert request_key("resubmit", "qa3", ["a"]) != request_key("resubmit", "prod1", ["a"])
+    key = call_key("resubmit", "qa3", ["a"])
+    assert key.startswith(request_key("resubmit", "qa3", ["a"]) + ":")
+    assert key != call_key("resubmit", "qa3", ["a"])
+
+
+def test_completed_request_is_replayed(requests):
+    calls = []
+    first = requests.run("k", lambda: calls.append(1) or {"acceptedIds": ["a"]})
+    second = requests.run("k", lambda: calls.append(1) or {"acceptedIds": ["b"]})
+    assert calls == [1]
+    assert "idempotentReplay" not in first
+    assert second == {"acceptedIds": ["a"], "idempotentReplay": True, "requestKey": "k"}
+    assert requests.replays == 1
+
+
+@pytest.mark.parametrize("result", [{"isError": True, "error": "boom"}, {"acceptedIds": [], "failedBatches": [{}]}])
+def test_failed_results_are_not_stored(requests, result):
+    calls = []
+    requests.run("k", lambda: calls.append(1) or result)
+    requests.run("k", lambda: calls.append(1) or result)
+    assert calls == [1, 1]
+
+
+def test_exceptions_release_the_claim(requests):
+    def fail():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        requests.run("k", fail)
+    assert requests.run("k", lambda: {"ok": True}) == {"ok": True}
+
+
+def test_disabled_requests_always_run():
+    requests = IdempotentRequests(ttl=0)
+    calls = []
+    requests.run("k", lambda: calls.append(1) or {})
+    requests.run("k", lambda: calls.append(1) or {})
+    assert calls == [1, 1]
+
+
+def test_concurrent_identical_requests_are_coalesced(requests):
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+
+    def slow():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {"acceptedIds": ["a"]}
+
+    owner = threading.Thread(target=lambda: results.append(requests.run("k", slow)))
+    owner.start()
+    started.wait(5)
+    waiter = threading.Thread(target=lambda: results.append(requests.run("k", slow)))
+    waiter.start()
+    time.sleep(0.05)
+    release.set()
+    owner.join(5)
+    waiter.join(5)
+    assert calls == [1]
+    assert sorted(bool(r.get("idempotentReplay")) for r in results) == [False, True]
+    assert requests.coalesced == 1
+
+
+def test_request_claimed_by_another_process_is_waited_for(requests):
+    other = IdempotentRequests(ttl=60, wait=5)
+    assert other._claim("k", "other-token") == ("claimed", None)
+    threading.Timer(0.3, other._complete, ("k", "other-token", {"acceptedIds": ["a"]})).start()
+
+    result = requests.run("k", lambda: pytest.fail("ran a request another process claimed"))
+    assert result["idempotentReplay"] is True
+    assert result["acceptedIds"] == ["a"]
+
+
+def test_async_run_replays_and_keeps_the_loop_free(requests, monkeypatch):
+    claim = requests._claim
+
+    def slow_claim(key, token):
+        time.sleep(0.3)  # e.g. waiting for another writer's lock
+        return claim(key, token)
+
+    monkeypatch.setattr(requests, "_claim", slow_claim)
+
+    async def main():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+
+        async def work():
+            return {"acceptedIds": ["a"]}
+
+        first = await requests.run_async("k", work)
+        second = await requests.run_async("k", work)
+        task.cancel()
+        return first, second, ticks
+
+    first, second, ticks = asyncio.run(main())
+    assert "idempotentReplay" not in first
+    assert second["idempotentReplay"] is True
+    assert ticks > 20
@@ -0,0 +1,149 @@
+import asyncio
+import re
+
+import pytest
+
+from shared import metrics
+from shared.metrics import (
+    AgentLabelMiddleware,
+    CallRecorder,
+    Counter,
+    Histogram,
+    error_type,
+    record_rate_limit,
+    render_metrics,
+    result_error_type,
+)
+from shared.sse_stream import ResponseTooLarge
+
+# Prometheus text format 0.0.4: name{label="value",...} value
+SAMPLE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{([a-zA-Z_]\w*="([^"\\\n]|\\.)*",?)*\})? \S+$')
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    monkeypatch.setattr(metrics, "_registry", None)
+    monkeypatch.setenv("AGENT_NAME", "TestAgent")
+    monkeypatch.delenv("METRICS_ENABLED", raising=False)
+    return metrics.get_metrics_registry()
+
+
+def samples(text, name):
+    return [line for line in text.splitlines() if line.startswith(name + "{") or line.startswith(name + " ")]
+
+
+def test_counter_renders_sorted_series_with_escaped_labels():
+    counter = Counter("test_total", "Test", ("tool", "note"))
+    counter.inc(("b", "plain"))
+    counter.inc(("a", 'say "hi"\\\n'), 2.5)
+    counter.inc(("b", "plain"))
+    assert counter.render() == [
+        'test_total{tool="a",note="say \\"hi\\"\\\\\\n"} 2.5',
+        'test_total{tool="b",note="plain"} 2',
+    ]
+    assert all(SAMPLE.match(line) for line in counter.render())
+
+
+def test_histogram_buckets_are_cumulative_with_sum_and_count():
+    histogram = Histogram("test_seconds", "Test", ("tool",), buckets=(1.0, 0.1))
+    for value in (0.05, 0.5, 0.5, 7.0):
+        histogram.observe(("t",), value)
+    assert histogram.render() == [
+        'test_seconds_bucket{tool="t",le="0.1"} 1',
+        'test_seconds_bucket{tool="t",le="1"} 3',
+        'test_seconds_bucket{tool="t",le="+Inf"} 4',
+        'test_seconds_sum{tool="t"} 8.05',
+        'test_seconds_count{tool="t"} 4',
+    ]
+
+
+def test_render_has_help_and_type_for_every_metric(registry):
+    text = render_metrics()
+    assert text.endswith("\n")
+    for metric in registry.metrics:
+        assert f"# HELP {metric.name} {metric.documentation}\n# TYPE {metric.name} {metric.kind}\n" in text
+    assert not [line for line in text.splitlines() if not line.startswith("#")]
+
+
+def test_call_recorder_records_the_call_labelled_by_agent_tool_and_environment(registry):
+    recorder = CallRecorder("monitoringErroredInstances", {"environment": "qa3"}, request_bytes=120)
+    body = b"".join(recorder.count([b"data: ", b"{}\n\n"]))
+    recorder.finish({"isError": True, "error": "boom"})
+
+    labels = ("TestAgent", "monitoringErroredInstances", "qa3")
+    assert body == b"data: {}\n\n"
+    assert registry.calls.value(labels) == 1
+    assert registry.request_bytes.value(labels) == 120
+    assert registry.response_bytes.value(labels) == 10
+    assert registry.errors.value(labels + ("tool_error",)) == 1
+
+    text = render_metrics()
+    assert ('oic_agent_mcp_errors_total{agent="TestAgent",tool="monitoringErroredInstances",'
+            'environment="qa3",type="tool_error"} 1') in text
+    assert samples(text, "oic_agent_mcp_call_duration_seconds_count") == [
+        'oic_agent_mcp_call_duration_seconds_count{agent="TestAgent",tool="monitoringErroredInstances",'
+        'environment="qa3"} 1'
+    ]
+    assert all(SAMPLE.match(line) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_metrics_disabled_records_nothing(monkeypatch, registry):
+    monkeypatch.setenv("METRICS_ENABLED", "false")
+    CallRecorder("health").finish({})
+    record_rate_limit("monitoringErroredInstances", {"environment": "qa3"}, "read", 0.5)
+    assert [line for line in render_metrics().splitlines() if not line.startswith("#")] == []
+
+
+def test_rate_limit_records_wait_and_outcome(registry):
+    record_rate_limit("monitoringErroredInstances", {"environment": "qa3"}, "read", 0.0)
+    record_rate_limit("monitoringErroredInstances", {"environment": "qa3"}, "read", 0.3)
+    record_rate_limit("monitoringResubmitErroredInstances", {"environment": "qa3"}, "write", 0.0, rejected=True)
+
+    read = ("TestAgent", "monitoringErroredInstances", "qa3", "read")
+    write = ("TestAgent", "monitoringResubmitErroredInstances", "qa3", "write")
+    assert registry.rate_limited.value(read + ("delayed",)) == 1
+    assert registry.rate_limited.value(write + ("rejected",)) == 1
+    assert 'oic_agent_mcp_rate_limit_wait_seconds_count{agent="TestAgent",tool="monitoringErroredInstances",' \
+           'environment="qa3",class="read"} 2' in render_metrics()
+
+
+def test_agent_label_middleware_labels_calls_made_while_serving_a_request(registry):
+    async def app(scope, receive, send):
+        CallRecorder("health").finish({})
+
+    asyncio.run(AgentLabelMiddleware(app, "CoordinatorAgent")({}, None, None))
+    CallRecorder("health").finish({})
+    assert registry.calls.value(("CoordinatorAgent", "health", "")) == 1
+    assert registry.calls.value(("TestAgent", "health", "")) == 1
+
+
+class HTTPError(Exception):
+    def __init__(self, status):
+        self.response = type("Response", (), {"status_code": status})()
+
+
+class ReadTimeout(Exception):
+    pass
+
+
+class ConnectError(Exception):
+    pass
+
+
+@pytest.mark.parametrize("error, expected", [
+    (HTTPError(503), "http_503"),
+    (ReadTimeout(), "timeout"),
+    (ConnectError(), "connection"),
+    (ValueError("bad json"), "json_decode"),
+    (ResponseTooLarge("too big"), "too_large"),
+    (RuntimeError(), "other"),
+])
+def test_error_type(error, expected):
+    assert error_type(error) == expected
+
+
+def test_result_error_type():
+    assert result_error_type({"items": []}) is None
+    assert result_error_type({"isError": True}) == "tool_error"
+    assert result_error_type({"raw": "<html>"}) == "json_decode"
+    assert result_error_type("text") is None
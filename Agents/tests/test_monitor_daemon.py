@@ -0,0 +1,64 @@
+import time
+
+from monitor_daemon import MonitorDaemon
+from shared.fanout import ERRORED_IDS_BY_ENVIRONMENT_KEY
+from shared.resubmit import save_resubmit_result
+from shared.state_store import get_shared_state
+from shared.watermark import load_watermarks
+
+
+class FakeClient:
+    """Answers monitoringErroredInstances from a list of canned results."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.calls = []
+
+    def call_tool(self, tool_name, arguments, **kwargs):
+        self.calls.append(arguments)
+        return self.results.pop(0)
+
+
+def _items(*ids):
+    created = time.strftime("%Y-%m-%dT%H:%M:%S.000+0000", time.gmtime(time.time() - 30))
+    return [{"id": instance_id, "creationDate": created} for instance_id in ids]
+
+
+def _daemon(*results):
+    daemon = MonitorDaemon(environments=["qa3"], mcp_server_url="http://127.0.0.1:9")
+    daemon.client = FakeClient(*results)
+    return daemon
+
+
+def _saved_ids(environment="qa3"):
+    return get_shared_state()[ERRORED_IDS_BY_ENVIRONMENT_KEY][environment]["instanceIds"]
+
+
+def test_truncated_window_keeps_the_watermark():
+    daemon = _daemon({"items": _items("a", "b"), "totalResults": 3})
+    summary = daemon.poll("qa3")
+    assert summary["truncated"] is True
+    assert summary["new"] == 2
+    assert load_watermarks()["qa3"].polled_at == 0.0
+
+    daemon.client = FakeClient({"items": _items("a", "b", "c"), "totalResults": 3})
+    summary = daemon.poll("qa3")
+    assert summary["new"] == 1
+    assert "truncated" not in summary
+    assert load_watermarks()["qa3"].polled_at > 0
+
+
+def test_failed_poll_keeps_the_watermark():
+    daemon = _daemon({"isError": True, "error": "down"})
+    assert daemon.poll("qa3")["error"] == "down"
+    assert "qa3" not in load_watermarks()
+
+
+def test_published_ids_accumulate_until_resubmitted():
+    daemon = _daemon({"items": _items("a", "b")}, {"items": _items("a", "b", "c")})
+    daemon.poll("qa3")
+    daemon.poll("qa3")
+    assert _saved_ids() == ["a", "b", "c"]
+
+    save_resubmit_result({"acceptedIds": ["a", "c"], "recoveryJobIds": []}, "qa3")
+    assert _saved_ids() == ["b"]
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+from CoordinatorAgent import pipeline, tools
+from shared.recovery_watcher import get_open_jobs
+from shared.state_store import get_shared_state
+from shared.triage import ESCALATIONS_KEY
+
+ITEMS = [
+    {"id": "E1", "integration": "ORDERS", "errorCode": "500", "recoverable": True},
+    {"id": "E2", "integration": "ORDERS", "errorCode": "500", "recoverable": True},
+    {"id": "E3", "integration": "INVOICES", "errorCode": "400", "recoverable": False},
+]
+
+
+class FakeOICClient:
+    """The MCP tools of the pipeline: jobs report RUNNING on the first poll and COMPLETED after."""
+
+    def __init__(self, items=ITEMS, monitor_error=None):
+        self.items = items
+        self.monitor_error = monitor_error
+        self.calls = []
+        self.polls = {}
+        self._lock = threading.Lock()
+
+    def call_tool(self, tool_name, arguments, idempotency_key=None, **kwargs):
+        with self._lock:
+            self.calls.append(tool_name)
+            if tool_name == "monitoringErroredInstances":
+                if self.monitor_error:
+                    return {"isError": True, "error": self.monitor_error}
+                return {"items": list(self.items), "totalResults": len(self.items)}
+            if tool_name == "monitoringResubmitErroredInstances":
+                ids = arguments["instanceIds"]
+                return {"acceptedIds": list(ids), "recoveryJobId": f"JOB-{ids[0]}", "resubmitRequested": True,
+                        "resubmittedInstancesCount": len(ids)}
+            if tool_name == "monitoringErrorRecoveryJobDetails":
+                polls = self.polls[arguments["id"]] = self.polls.get(arguments["id"], 0) + 1
+                if polls == 1:
+                    return {"id": arguments["id"], "status": "RUNNING", "successCount": 0}
+                return {"id": arguments["id"], "status": "COMPLETED", "successCount": 2, "failedCount": 0}
+        raise AssertionError(f"unexpected tool {tool_name}")
+
+
+class FakeAsyncOICClient(FakeOICClient):
+    async def call_tool(self, tool_name, arguments, idempotency_key=None, **kwargs):
+        await asyncio.sleep(0)
+        return FakeOICClient.call_tool(self, tool_name, arguments, idempotency_key)
+
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setenv("RECOVERY_POLL_INITIAL_INTERVAL", "0.01")
+    monkeypatch.setenv("RECOVERY_POLL_JITTER", "0")
+
+
+def stub_clients(monkeypatch, module, client):
+    monkeypatch.setattr(module, "get_mcp_client", lambda url=None: client)
+    monkeypatch.setattr(module, "get_async_mcp_client", lambda url=None: client)
+    return client
+
+
+def assert_completed_report(report):
+    assert report["error"] is None
+    assert report["monitor"] == {"errorsFound": 3, "instanceIds": ["E1", "E2", "E3"]}
+    assert report["resubmit"]["acceptedIds"] == ["E1", "E2", "E3"]
+    assert report["resubmit"]["recoveryJobIds"] == ["JOB-E1"]
+    assert report["recovery"]["jobs"] == {"JOB-E1": "COMPLETED"}
+    assert (report["recovery"]["successCount"], report["recovery"]["allDone"]) == (2, True)
+    assert report["recovery"]["timedOut"] is False
+    assert get_shared_state()["resubmit_result"]["recoveryJobIds"] == ["JOB-E1"]
+    assert get_open_jobs() == {}
+
+
+def test_pipeline_monitors_resubmits_and_watches_the_recovery_job(monkeypatch):
+    client = stub_clients(monkeypatch, pipeline, FakeOICClient())
+    report = pipeline.run_pipeline("qa3", wait_timeout=5)
+    assert client.calls == ["monitoringErroredInstances", "monitoringResubmitErroredInstances",
+                            "monitoringErrorRecoveryJobDetails", "monitoringErrorRecoveryJobDetails"]
+    assert_completed_report(report)
+
+    text = pipeline.format_report(report)
+    assert "**Step 1: Monitor Errors**\n- Environment: qa3\n- Time Window: 1h\n- Errors Found: 3" in text
+    assert "- Recovery Job IDs: [JOB-E1]" in text
+    assert "- Status per job: JOB-E1: COMPLETED" in text
+    assert "Error:" not in text
+
+
+def test_pipeline_async_matches_the_sync_run(monkeypatch):
+    client = stub_clients(monkeypatch, pipeline, FakeAsyncOICClient())
+    report = asyncio.run(pipeline.run_pipeline_async("qa3", wait_timeout=5))
+    assert client.polls == {"JOB-E1": 2}
+    assert_completed_report(report)
+
+
+def test_pipeline_stops_at_a_monitor_error(monkeypatch):
+    client = stub_clients(monkeypatch, pipeline, FakeOICClient(monitor_error="401 Unauthorized"))
+    report = pipeline.run_pipeline("qa3")
+    assert client.calls == ["monitoringErroredInstances"]
+    assert (report["monitor"], report["resubmit"], report["recovery"]) == (None, None, None)
+    assert pipeline.format_report(report).endswith("Error: 401 Unauthorized")
+
+
+def test_pipeline_without_resubmit_only_monitors(monkeypatch):
+    client = stub_clients(monkeypatch, pipeline, FakeOICClient())
+    report = pipeline.run_pipeline("qa3", resubmit=False)
+    assert client.calls == ["monitoringErroredInstances"]
+    assert report["monitor"]["errorsFound"] == 3
+    assert "**Step 2" not in pipeline.format_report(report)
+
+
+def test_triage_then_watch_resubmits_recoverable_errors_and_escalates_the_rest(monkeypatch):
+    client = stub_clients(monkeypatch, tools, FakeOICClient())
+    triaged = json.loads(tools.triage_errors("qa3"))
+    assert triaged["counts"]["resubmit"] == 2 and triaged["counts"]["escalate"] == 1
+    assert triaged["resubmit"]["acceptedIds"] == ["E1", "E2"]
+    assert [entry["id"] for entry in get_shared_state()[ESCALATIONS_KEY]] == ["E3"]
+
+    summary = json.loads(tools.wait_for_recovery_jobs("qa3", timeoutSeconds=5))
+    assert summary["allDone"] is True
+    assert summary["jobs"]["JOB-E1"]["status"] == "COMPLETED"
+    assert client.calls[:2] == ["monitoringErroredInstances", "monitoringResubmitErroredInstances"]
+    assert get_open_jobs() == {}
@@ -0,0 +1,69 @@
+import json
+
+import pytest
+
+from shared.projection import get_projection_stats, render_tool_output
+
+
+def errored(count):
+    return {
+        "totalResults": count,
+        "items": [
+            {"id": f"I{i:04d}", "integrationInstance": f"INT_{i % 3}", "creationDate": "2026-01-01T00:00:00Z",
+             "errorCode": "500" if i % 2 else "404", "recoverable": True, "payload": "x" * 50}
+            for i in range(count)
+        ],
+    }
+
+
+def test_small_results_are_projected_and_compact():
+    text = render_tool_output(errored(2), "errored_instances")
+    output = json.loads(text)
+    assert ", " not in text and "\n" not in text
+    assert output["totalResults"] == 2
+    assert set(output["items"][0]) == {"id", "integrationInstance", "creationDate", "errorCode", "recoverable"}
+    assert "truncated" not in output
+
+
+def test_large_results_are_truncated_within_the_budget():
+    text = render_tool_output(errored(500), "errored_instances", token_budget=500)
+    output = json.loads(text)
+    assert len(text) <= 500 * 4
+    assert output["truncated"] is True
+    returned = output["summary"]["returnedItems"]
+    assert 0 < returned == len(output["items"]) < 500
+    assert output["summary"]["totalItems"] == 500
+    assert output["summary"]["countsByField"]["errorCode"] == {"500": 250, "404": 250}
+    assert output["moreAvailable"] == {"cursor": str(returned), "remainingItems": 500 - returned}
+
+
+@pytest.mark.parametrize("token_budget", [1, 300, 2000])
+def test_cursor_round_trip_returns_every_item_once(token_budget):
+    result = errored(237)
+    seen, cursor = [], None
+    for _ in range(1000):
+        output = json.loads(render_tool_output(result, "errored_instances", cursor, token_budget=token_budget))
+        seen.extend(item["id"] for item in output["items"])
+        if "moreAvailable" not in output:
+            break
+        assert output["moreAvailable"]["remainingItems"] == 237 - len(seen)
+        cursor = output["moreAvailable"]["cursor"]
+    assert seen == [item["id"] for item in result["items"]]
+
+
+def test_errors_and_unknown_cursors():
+    error = {"isError": True, "error": "HTTP 503"}
+    assert json.loads(render_tool_output(error, "errored_instances")) == error
+    output = json.loads(render_tool_output(errored(3), "errored_instances", cursor="bogus"))
+    assert len(output["items"]) == 3 and "offset" not in output
+
+
+def test_compaction_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("TOOL_OUTPUT_COMPACT", "false")
+    assert render_tool_output(errored(1), "errored_instances") == json.dumps(errored(1), indent=2)
+
+
+def test_bytes_are_counted_per_projection():
+    render_tool_output(errored(10), "recovery_jobs")
+    stats = get_projection_stats()["recovery_jobs"]
+    assert stats["calls"] >= 1 and stats["bytesAfter"] < stats["bytesBefore"]
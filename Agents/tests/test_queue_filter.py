@@ -0,0 +1,50 @@
+from MonitorQueueRequestAgent import tools as queue_tools
+from shared.queue_filter import filter_queued_instances, parse_oic_timestamp
+
+FETCHED = "2025-11-21T05:00:00.000+0000"
+
+
+def _instance(instance_id, created, mep_type="ASYNC_ONE_WAY", status="IN_PROGRESS"):
+    return {"id": instance_id, "creationDate": created, "dataFetchTime": FETCHED, "mepType": mep_type, "status": status}
+
+
+ITEMS = [
+    _instance("old", "2025-11-21T04:30:00.000+0000"),
+    _instance("mid", "2025-11-21T04:50:00.000+0000"),
+    _instance("sync", "2025-11-21T04:00:00.000+0000", mep_type="SYNC"),
+    _instance("done", "2025-11-21T04:00:00.000+0000", status="COMPLETED"),
+]
+
+
+class FakeClient:
+    def call_tool(self, tool_name, arguments, **kwargs):
+        return {"items": ITEMS}
+
+
+def test_parse_oic_timestamp():
+    assert parse_oic_timestamp("2025-11-21T04:33:10.496+0000") == parse_oic_timestamp("2025-11-21T04:33:10.496Z")
+    assert parse_oic_timestamp("not a date") is None
+    assert parse_oic_timestamp(None) is None
+
+
+def test_filter_keeps_old_async_in_progress_instances():
+    result = filter_queued_instances(ITEMS, min_age_minutes=5)
+    assert [instance["instanceId"] for instance in result["instances"]] == ["old", "mid"]
+    assert result["instances"][0]["queuedMinutes"] == 30.0
+    assert result["scanned"] == 4
+
+
+def test_filter_uses_the_environment_default(monkeypatch):
+    monkeypatch.setenv("QUEUE_MIN_AGE_MINUTES", "20")
+    result = filter_queued_instances(ITEMS)
+    assert result["minAgeMinutes"] == 20
+    assert [instance["instanceId"] for instance in result["instances"]] == ["old"]
+
+
+def test_find_queued_instances_honours_queue_min_age_minutes(monkeypatch):
+    monkeypatch.setattr(queue_tools, "get_mcp_client", lambda url=None: FakeClient())
+    monkeypatch.setenv("QUEUE_MIN_AGE_MINUTES", "5")
+    assert "mid" in queue_tools.find_queued_instances()
+    monkeypatch.setenv("QUEUE_MIN_AGE_MINUTES", "20")
+    assert "mid" not in queue_tools.find_queued_instances()
+    assert "mid" in queue_tools.find_queued_instances(minAgeMinutes=5)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+
+from shared import rate_limiter
+from shared.rate_limiter import RateLimiter, _LocalBuckets, _parse_overrides
+
+READ_TOOL = "monitoringErroredInstances"
+WRITE_TOOL = "monitoringResubmitErroredInstances"
+
+
+def make_limiter(tmp_path, shared=False, **kwargs):
+    options = {"enabled": True, "limits": {"read": (1.0, 1.0), "write": (1.0, 1.0)}, "overrides": {},
+               "max_wait": 0.0, "shared": shared, "path": tmp_path / "rate_limits.db"}
+    options.update(kwargs)
+    return RateLimiter(**options)
+
+
+def test_bucket_refills_at_the_rate(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(rate_limiter.time, "time", lambda: now[0])
+    buckets = _LocalBuckets()
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 1.0) == 0.0
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 1.0) == 0.0
+    # Empty: the next token is due in 1 / rate seconds
+    assert abs(buckets.reserve("qa3:read", 10.0, 2.0, 1.0) - 0.1) < 1e-9
+    now[0] += 0.5
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 1.0) == 0.0
+    # Refill never goes past the burst
+    now[0] += 60
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 0.0) == 0.0
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 0.0) == 0.0
+    assert buckets.reserve("qa3:read", 10.0, 2.0, 0.0) is None
+
+
+def test_buckets_are_per_environment_and_tool_class(tmp_path):
+    limiter = make_limiter(tmp_path)
+    assert limiter.acquire(READ_TOOL, {"environment": "qa3"}) is None
+    rejected = limiter.acquire(READ_TOOL, {"environment": "qa3"})
+    assert rejected["isError"] and "read calls to qa3" in rejected["error"]
+    assert limiter.acquire(READ_TOOL, {"environment": "prod1"}) is None
+    assert limiter.acquire(WRITE_TOOL, {"environment": "qa3"}) is None
+    assert limiter.stats()["buckets"]["qa3:read"]["rejected"] == 1
+
+
+def test_overrides_and_unlimited_classes(tmp_path):
+    overrides = _parse_overrides("prod1.read=0, dev.write=5/10, bogus, qa3.other=1", {"read": (10, 20), "write": (2, 4)})
+    assert overrides == {("prod1", "read"): (0.0, 20), ("dev", "write"): (5.0, 10.0)}
+    limiter = make_limiter(tmp_path, overrides=overrides)
+    assert all(limiter.acquire(READ_TOOL, {"environment": "prod1"}) is None for _ in range(5))
+
+
+def test_sqlite_buckets_are_shared_between_limiters(tmp_path):
+    first = make_limiter(tmp_path, shared=True)
+    second = make_limiter(tmp_path, shared=True)
+    assert first.acquire(READ_TOOL, {"environment": "qa3"}) is None
+    assert second.acquire(READ_TOOL, {"environment": "qa3"})["isError"]
+    assert second.stats()["shared"] is True
+
+
+def test_wait_is_capped_by_the_deadline_budget(tmp_path):
+    limiter = make_limiter(tmp_path, max_wait=30.0)
+    assert limiter.acquire(READ_TOOL, {"environment": "qa3"}) is None
+    start = time.monotonic()
+    rejected = limiter.acquire(READ_TOOL, {"environment": "qa3"}, budget=0.05)
+    assert "within 0.05s" in rejected["error"]
+    assert time.monotonic() - start < 0.5
+
+
+def test_acquire_async_waits_for_the_next_token(tmp_path):
+    limiter = make_limiter(tmp_path, shared=True, limits={"read": (20.0, 1.0), "write": (1.0, 1.0)}, max_wait=1.0)
+
+    async def acquire_twice():
+        start = time.monotonic()
+        results = [await limiter.acquire_async(READ_TOOL, {"environment": "qa3"}) for _ in range(2)]
+        return results, time.monotonic() - start
+
+    results, elapsed = asyncio.run(acquire_twice())
+    assert results == [None, None]
+    assert elapsed >= 0.04
+    assert limiter.stats()["buckets"]["qa3:read"]["delayed"] == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+import pytest
+
+from shared.recovery_watcher import (
+    POLL_FAILURES_KEY, RecoveryJobWatcher, get_open_jobs, register_open_jobs, resolve_recovery_jobs,
+    watch_recovery_jobs, watch_recovery_jobs_async
+)
+from shared.state_store import get_state_store
+
+
+class FakeClient:
+    """Answers monitoringErrorRecoveryJobDetails from {jobId: result}."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def call_tool(self, tool_name, arguments, **kwargs):
+        self.calls.append(arguments["id"])
+        return self.results[arguments["id"]]
+
+
+class FakeAsyncClient(FakeClient):
+    async def call_tool(self, tool_name, arguments, **kwargs):
+        return FakeClient.call_tool(self, tool_name, arguments)
+
+
+NOT_FOUND = {"isError": True, "error": "HTTP 404: Recovery job not found"}
+
+
+@pytest.fixture(autouse=True)
+def max_failed_polls(monkeypatch):
+    monkeypatch.setenv("RECOVERY_JOB_MAX_FAILED_POLLS", "3")
+
+
+def test_finished_jobs_leave_the_open_jobs():
+    register_open_jobs(["J1", "J2"], "qa3")
+    client = FakeClient({"J1": {"status": "completed"}, "J2": {"status": "RUNNING"}})
+    summary = watch_recovery_jobs(client, get_open_jobs())
+    assert summary["statusCounts"] == {"COMPLETED": 1, "RUNNING": 1}
+    assert summary["openJobIds"] == ["J2"]
+    assert get_open_jobs() == {"J2": "qa3"}
+
+
+def test_jobs_that_cannot_be_read_expire():
+    register_open_jobs(["BAD"], "prod1")
+    register_open_jobs(["OK"], "qa3")
+    client = FakeClient({"BAD": NOT_FOUND, "OK": {"status": "RUNNING"}})
+    for _ in range(2):
+        summary = watch_recovery_jobs(client, resolve_recovery_jobs("qa3"))
+        assert "expiredJobIds" not in summary
+    assert get_state_store().get(POLL_FAILURES_KEY) == {"BAD": 2}
+
+    summary = watch_recovery_jobs(client, resolve_recovery_jobs("qa3"))
+    assert summary["expiredJobIds"] == ["BAD"]
+    assert get_open_jobs() == {"OK": "qa3"}
+    assert get_state_store().get(POLL_FAILURES_KEY) == {}
+
+    client.calls.clear()
+    watch_recovery_jobs(client, resolve_recovery_jobs("qa3"))
+    assert client.calls == ["OK"]
+
+
+def test_a_successful_poll_resets_the_failure_count():
+    register_open_jobs(["J1"], "qa3")
+    watch_recovery_jobs(FakeClient({"J1": NOT_FOUND}), get_open_jobs())
+    watch_recovery_jobs(FakeClient({"J1": {"status": "RUNNING"}}), get_open_jobs())
+    assert get_state_store().get(POLL_FAILURES_KEY) == {}
+
+
+@pytest.mark.parametrize("result", [
+    {"isError": True, "circuitOpen": True, "error": "MCP server unavailable"},
+    {"isError": True, "deadlineExceeded": True, "error": "Deadline budget exhausted"},
+    {"isError": True, "error": "Synthetic OIC error (HTTP 503)"},
+])
+def test_server_failures_do_not_expire_jobs(result):
+    register_open_jobs(["J1"], "qa3")
+    for _ in range(4):
+        watch_recovery_jobs(FakeClient({"J1": result}), get_open_jobs())
+    assert get_open_jobs() == {"J1": "qa3"}
+
+
+def test_async_watch_expires_jobs_too():
+    register_open_jobs(["BAD"], "qa3")
+    client = FakeAsyncClient({"BAD": NOT_FOUND})
+    for _ in range(3):
+        summary = asyncio.run(watch_recovery_jobs_async(client, get_open_jobs()))
+    assert summary["expiredJobIds"] == ["BAD"]
+    assert get_open_jobs() == {}
+
+
+def test_poll_interval_backs_off_without_progress_and_resets_on_progress():
+    watcher = RecoveryJobWatcher({"J1": "qa3"}, initial_interval=1, max_interval=4, multiplier=2, jitter=0)
+    watcher.record("J1", {"status": "RUNNING", "successCount": 0}, 0)
+    assert watcher.next_wake() == 1
+    watcher.record("J1", {"status": "RUNNING", "successCount": 0}, 1)
+    assert watcher.next_wake() == 3
+    watcher.record("J1", {"status": "RUNNING", "successCount": 0}, 3)
+    watcher.record("J1", {"status": "RUNNING", "successCount": 0}, 7)
+    assert watcher.next_wake() == 11
+    watcher.record("J1", {"status": "RUNNING", "successCount": 5}, 11)
+    assert watcher.next_wake() == 12
+    watcher.record("J1", {"status": "COMPLETED"}, 12)
+    assert watcher.next_wake() is None
@@ -0,0 +1,90 @@
+import asyncio
+
+from shared import response_cache
+from shared.response_cache import INVALIDATION_STATE_KEY, ResponseCache
+from shared.state_store import get_state_store
+
+URL = "http://mcp.test"
+READ_TOOL = "monitoringErroredInstances"
+WRITE_TOOL = "monitoringResubmitErroredInstances"
+QA3 = {"environment": "qa3", "duration": "1h"}
+
+
+def make_cache(**kwargs):
+    options = {"enabled": True, "max_entries": 10, "ttls": {READ_TOOL: 30}, "shared_invalidation": False}
+    options.update(kwargs)
+    return ResponseCache(**options)
+
+
+def test_hit_returns_a_copy():
+    cache = make_cache()
+    cache.put(URL, READ_TOOL, QA3, {"items": [1]})
+    cached = cache.get(URL, READ_TOOL, {"duration": "1h", "environment": "qa3"})
+    cached["items"].append(2)
+    assert cache.get(URL, READ_TOOL, QA3) == {"items": [1]}
+    assert cache.stats()["hits"] == 2
+
+
+def test_entries_expire_after_their_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(response_cache.time, "time", lambda: now[0])
+    cache = make_cache()
+    cache.put(URL, READ_TOOL, QA3, {"items": []})
+    now[0] += 29
+    assert cache.get(URL, READ_TOOL, QA3) is not None
+    now[0] += 2
+    assert cache.get(URL, READ_TOOL, QA3) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = make_cache(max_entries=2)
+    for environment in ("a", "b"):
+        cache.put(URL, READ_TOOL, {"environment": environment}, {"environment": environment})
+    cache.get(URL, READ_TOOL, {"environment": "a"})
+    cache.put(URL, READ_TOOL, {"environment": "c"}, {"environment": "c"})
+    assert cache.get(URL, READ_TOOL, {"environment": "b"}) is None
+    assert cache.get(URL, READ_TOOL, {"environment": "a"}) is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_errors_and_uncached_tools_are_not_stored():
+    cache = make_cache()
+    cache.put(URL, READ_TOOL, QA3, {"isError": True, "error": "HTTP 503"})
+    cache.put(URL, WRITE_TOOL, QA3, {"acceptedIds": ["a"]})
+    cache.put(URL, "monitoringErrorRecoveryJobDetails", QA3, {"status": "RUNNING"})
+    assert cache.stats()["entries"] == 0
+
+
+def test_writes_invalidate_reads_of_the_same_environment():
+    cache = make_cache()
+    cache.put(URL, READ_TOOL, QA3, {"items": []})
+    cache.put(URL, READ_TOOL, {"environment": "prod1"}, {"items": []})
+    cache.invalidate_for_write(WRITE_TOOL, {"environment": "qa3", "instanceIds": ["a"]})
+    assert cache.get(URL, READ_TOOL, QA3) is None
+    assert cache.get(URL, READ_TOOL, {"environment": "prod1"}) is not None
+
+
+def test_invalidation_reaches_other_processes_through_shared_state():
+    # Two caches on one state store stand in for two agent processes
+    reader, writer = make_cache(shared_invalidation=True), make_cache(shared_invalidation=True)
+    reader.put(URL, READ_TOOL, QA3, {"items": []})
+    reader.put(URL, READ_TOOL, {"environment": "prod1"}, {"items": []})
+    writer.invalidate_for_write(WRITE_TOOL, {"environment": "qa3", "instanceIds": ["a"]})
+    assert set(get_state_store().get(INVALIDATION_STATE_KEY)) == {"qa3"}
+    assert reader.get(URL, READ_TOOL, QA3) is None
+    assert reader.get(URL, READ_TOOL, {"environment": "prod1"}) is not None
+
+
+def test_async_variants_share_the_invalidation_marks():
+    reader, writer = make_cache(shared_invalidation=True), make_cache(shared_invalidation=True)
+
+    async def scenario():
+        reader.put(URL, READ_TOOL, QA3, {"items": []})
+        before = await reader.get_async(URL, READ_TOOL, QA3)
+        await writer.invalidate_for_write_async(WRITE_TOOL, {"environment": "qa3"})
+        return before, await reader.get_async(URL, READ_TOOL, QA3)
+
+    before, after = asyncio.run(scenario())
+    assert before == {"items": []}
+    assert after is None
@@ -0,0 +1,79 @@
+import asyncio
+import threading
+
+from shared.resubmit import chunk_ids, merge_resubmit_results, resubmit_in_batches, resubmit_in_batches_async
+
+
+class FakeResubmitClient:
+    """Accepts every batch with a recovery job per call; batches containing a fail_on ID fail."""
+
+    def __init__(self, fail_on=()):
+        self.fail_on = set(fail_on)
+        self.batches = []
+        self.keys = []
+        self._lock = threading.Lock()
+
+    def call_tool(self, tool_name, arguments, idempotency_key=None, **kwargs):
+        batch = arguments["instanceIds"]
+        with self._lock:
+            self.batches.append(list(batch))
+            self.keys.append(idempotency_key)
+            number = len(self.batches)
+        if self.fail_on & set(batch):
+            return {"isError": True, "error": f"batch {number} failed"}
+        return {"acceptedIds": list(batch), "recoveryJobId": f"JOB{batch[0]}", "resubmitRequested": True,
+                "resubmittedInstancesCount": len(batch)}
+
+
+class FakeAsyncResubmitClient(FakeResubmitClient):
+    async def call_tool(self, tool_name, arguments, idempotency_key=None, **kwargs):
+        await asyncio.sleep(0)
+        return FakeResubmitClient.call_tool(self, tool_name, arguments, idempotency_key)
+
+
+IDS = [f"I{i:03d}" for i in range(120)]
+
+
+def test_chunk_ids_dedupes_and_caps_the_batch_size():
+    assert chunk_ids(["a", "b", "a", "c"], 2) == [["a", "b"], ["c"]]
+    assert [len(batch) for batch in chunk_ids(IDS)] == [50, 50, 20]
+    assert [len(batch) for batch in chunk_ids(IDS, 500)] == [50, 50, 20]
+
+
+def test_merge_resubmit_results_keeps_partial_failures():
+    batches = [["a"], ["b"], ["c"]]
+    results = [
+        {"acceptedIds": ["a"], "recoveryJobId": "J1", "resubmitRequested": True, "resubmittedInstancesCount": 1},
+        {"isError": True, "error": "boom"},
+        {"acceptedIds": ["c"], "recoveryJobId": "J3", "resubmittedInstancesCount": 1},
+    ]
+    merged = merge_resubmit_results(batches, results)
+    assert merged["acceptedIds"] == ["a", "c"]
+    assert (merged["recoveryJobId"], merged["recoveryJobIds"]) == ("J1", ["J1", "J3"])
+    assert merged["resubmittedInstancesCount"] == 2
+    assert merged["batchCount"] == 3
+    assert merged["failedBatches"] == [{"instanceIds": ["b"], "error": "boom"}]
+
+
+def test_merge_resubmit_results_fails_when_every_batch_fails():
+    merged = merge_resubmit_results([["a"], ["b"]], [{"isError": True, "error": "x"}, {"isError": True, "error": "y"}])
+    assert merged["isError"] is True
+    assert merged["error"] == "x"
+    assert len(merged["failedBatches"]) == 2
+
+
+def test_resubmit_in_batches_sends_every_batch_once():
+    client = FakeResubmitClient()
+    result = resubmit_in_batches(client, "qa3", IDS, concurrency=3)
+    assert sorted(len(batch) for batch in client.batches) == [20, 50, 50]
+    assert sorted(result["acceptedIds"]) == IDS
+    assert len(result["recoveryJobIds"]) == 3
+    assert len(set(client.keys)) == 3 and all(client.keys)
+
+
+def test_resubmit_in_batches_async_matches_the_sync_result():
+    client = FakeAsyncResubmitClient(fail_on={"I060"})
+    result = asyncio.run(resubmit_in_batches_async(client, "qa3", IDS, concurrency=2))
+    assert len(client.batches) == 3
+    assert result["acceptedIds"] == IDS[:50] + IDS[100:]
+    assert result["failedBatches"][0]["instanceIds"] == IDS[50:100]
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from shared.resubmit import resubmit_in_batches, resubmit_in_batches_async
+from shared.resubmit_index import ResubmitIndex, get_resubmit_index
+from test_resubmit import FakeAsyncResubmitClient, FakeResubmitClient
+
+
+def test_filter_skips_instances_inside_the_cooldown(tmp_path):
+    index = ResubmitIndex(tmp_path / "index.db", cooldown=60)
+    index.record("qa3", ["a", "b"], "J1")
+    to_send, skipped = index.filter("qa3", ["a", "c", "b"])
+    assert to_send == ["c"]
+    assert set(skipped) == {"a", "b"}
+    assert skipped["a"]["recoveryJobId"] == "J1"
+    # Other environments are independent
+    assert index.filter("prod1", ["a"]) == (["a"], {})
+
+
+def test_zero_cooldown_disables_the_filter(tmp_path):
+    index = ResubmitIndex(tmp_path / "index.db", cooldown=0)
+    index.record("qa3", ["a"])
+    assert index.filter("qa3", ["a"]) == (["a"], {})
+
+
+def test_entries_expire_and_are_bounded(tmp_path, monkeypatch):
+    index = ResubmitIndex(tmp_path / "index.db", cooldown=10, ttl=10, max_entries=3)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now - 20)
+    index.record("qa3", ["old"])
+    monkeypatch.setattr(time, "time", lambda: now)
+    index.record("qa3", ["a", "b", "c", "d"])
+    assert index.stats()["entries"] == 3
+    assert index.lookup("qa3", ["old"]) == {}
+
+
+def test_forget_allows_an_immediate_resubmit(tmp_path):
+    index = ResubmitIndex(tmp_path / "index.db", cooldown=60)
+    index.record("qa3", ["a", "b"])
+    index.forget("qa3", ["a"])
+    assert index.filter("qa3", ["a", "b"])[0] == ["a"]
+    index.forget("qa3")
+    assert index.filter("qa3", ["a", "b"])[0] == ["a", "b"]
+
+
+def test_resubmit_skips_recently_resubmitted_ids():
+    client = FakeResubmitClient()
+    resubmit_in_batches(client, "qa3", ["a", "b"], idempotent=False)
+    result = resubmit_in_batches(client, "qa3", ["b", "c"], idempotent=False)
+    assert client.batches == [["a", "b"], ["c"]]
+    assert result["skippedIds"] == ["b"]
+    assert result["skippedRecoveryJobIds"] == ["JOBa"]
+
+
+def test_async_resubmit_uses_the_same_index():
+    client = FakeAsyncResubmitClient()
+    asyncio.run(resubmit_in_batches_async(client, "qa3", ["a"], idempotent=False))
+    result = asyncio.run(resubmit_in_batches_async(client, "qa3", ["a", "b"], idempotent=False))
+    assert client.batches == [["a"], ["b"]]
+    assert result["skippedIds"] == ["a"]
+    assert get_resubmit_index().stats()["entries"] == 2
@@ -0,0 +1,142 @@
+import asyncio
+import time
+
+import pytest
+
+from benchmarks.mcp_standin_server import StandInMCPServer
+from shared.mcp_client import MCPClient
+from shared.rate_limiter import RateLimiter
+from shared.retry import (
+    RetryPolicy,
+    budget_timeout,
+    deadline_budget,
+    invocation_budget,
+    is_transient,
+    remaining_budget,
+)
+
+READ_TOOL = "monitoringErroredInstances"
+WRITE_TOOL = "monitoringResubmitErroredInstances"
+
+
+def test_writes_are_only_retried_under_an_idempotency_key():
+    policy = RetryPolicy(attempts=4)
+    assert policy.attempts_for(READ_TOOL, None) == 4
+    assert policy.attempts_for(WRITE_TOOL, None) == 1
+    assert policy.attempts_for(WRITE_TOOL, "key") == 4
+
+
+def test_backoff_is_full_jitter_capped_at_the_max_delay():
+    policy = RetryPolicy(attempts=3, base_delay=1.0, max_delay=3.0)
+    for retry, cap in ((0, 1.0), (1, 2.0), (5, 3.0)):
+        delays = [policy.delay(retry) for _ in range(50)]
+        assert all(0.0 <= delay <= cap for delay in delays)
+
+
+def test_is_transient():
+    assert is_transient({}, "timeout")
+    assert is_transient({}, "http_502")
+    assert not is_transient({}, "http_400")
+    assert is_transient({"isError": True, "error": "OIC returned HTTP 503"}, None)
+    assert is_transient({"isError": True, "error": "Network error: ECONNRESET"}, None)
+    assert not is_transient({"isError": True, "error": "OIC returned HTTP 404"}, None)
+    assert not is_transient({"isError": True, "circuitOpen": True, "error": "HTTP 503"}, None)
+    assert not is_transient({"isError": True, "deadlineExceeded": True, "error": "HTTP 503"}, None)
+
+
+def test_deadline_budgets_nest_and_only_shorten():
+    assert remaining_budget() is None
+    with deadline_budget(60):
+        assert 59 < remaining_budget() <= 60
+        with deadline_budget(5):
+            assert remaining_budget() <= 5
+        with deadline_budget(600):
+            assert remaining_budget() <= 60
+        with deadline_budget(0):
+            assert 59 < remaining_budget() <= 60
+    assert remaining_budget() is None
+
+
+def test_budget_timeout_caps_call_timeouts():
+    assert budget_timeout(30, None) == 30
+    assert budget_timeout(None, 4) == 4
+    assert budget_timeout(30, 4) == 4
+    assert budget_timeout((5, 60), 10) == (5, 10)
+
+
+def test_invocation_budget_opens_one_budget_per_invocation():
+    open_budget, close_budget = invocation_budget(30)
+    context = object()
+
+    async def invocation():
+        assert open_budget(context) is None
+        # Tools run in tasks and threads started from the invocation's context
+        in_task = await asyncio.create_task(asyncio.sleep(0, remaining_budget()))
+        in_thread = await asyncio.to_thread(remaining_budget)
+        close_budget(context)
+        return in_task, in_thread, remaining_budget()
+
+    in_task, in_thread, after = asyncio.run(invocation())
+    assert 29 < in_task <= 30 and 29 < in_thread <= 30
+    assert after is None
+
+    open_none, _ = invocation_budget(0)
+    open_none(context)
+    assert remaining_budget() is None
+
+
+@pytest.fixture
+def failing_server(monkeypatch):
+    monkeypatch.setenv("MCP_BREAKER_ENABLED", "false")
+    with StandInMCPServer(error_rate=1.0) as server:
+        yield server
+
+
+def make_client(server, attempts=3, base_delay=0.01):
+    client = MCPClient(server.url, limiter=RateLimiter(enabled=False),
+                       retry=RetryPolicy(attempts=attempts, base_delay=base_delay, max_delay=base_delay))
+    client.sent = 0
+    call_tool = client._call_tool
+
+    def counting_call_tool(*args, **kwargs):
+        client.sent += 1
+        return call_tool(*args, **kwargs)
+
+    client._call_tool = counting_call_tool
+    return client
+
+
+def test_client_retries_transient_read_errors(failing_server):
+    client = make_client(failing_server)
+    result = client.call_tool(READ_TOOL, {"environment": "qa3"}, use_cache=False)
+    assert result["isError"] and "503" in result["error"]
+    assert client.sent == 3
+
+
+def test_client_retries_writes_only_with_an_idempotency_key(failing_server):
+    client = make_client(failing_server)
+    client.call_tool(WRITE_TOOL, {"environment": "qa3", "instanceIds": ["a"]}, use_cache=False)
+    assert client.sent == 1
+    client.call_tool(WRITE_TOOL, {"environment": "qa3", "instanceIds": ["a"]}, use_cache=False,
+                     idempotency_key="key")
+    assert client.sent == 4
+
+
+def test_client_skips_backoffs_past_the_deadline(failing_server):
+    client = make_client(failing_server)
+    # Full jitter could pick a short backoff: pin it past the budget
+    client.retry.delay = lambda retry: 30.0
+    with deadline_budget(5):
+        start = time.monotonic()
+        client.call_tool(READ_TOOL, {"environment": "qa3"}, use_cache=False)
+    assert client.sent == 1
+    assert time.monotonic() - start < 5
+
+
+def test_client_fails_fast_after_the_deadline(failing_server):
+    client = make_client(failing_server)
+    with deadline_budget(0.01):
+        time.sleep(0.02)
+        result = client.call_tool(READ_TOOL, {"environment": "qa3"}, use_cache=False)
+    assert result["deadlineExceeded"]
+    assert client.sent == 0
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+from shared.sse_stream import ResponseTooLarge, SSEDecoder, read_jsonrpc_response, read_jsonrpc_response_async
+
+SSE = "text/event-stream"
+RESPONSE = {"jsonrpc": "2.0", "id": 7, "result": {"content": [{"type": "text", "text": "ok"}]}}
+PROGRESS = {"jsonrpc": "2.0", "method": "notifications/progress", "params": {"progress": 1}}
+
+
+def sse_body(*messages, newline="\n"):
+    return "".join(f"event: message{newline}data: {json.dumps(m)}{newline}{newline}" for m in messages).encode()
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+@pytest.mark.parametrize("size", [1, 3, 17, 4096])
+def test_events_split_across_chunks(size):
+    body = sse_body(PROGRESS, RESPONSE)
+    assert read_jsonrpc_response(chunked(body, size), 7, SSE) == RESPONSE
+
+
+def test_multi_line_data_is_joined_with_newlines():
+    decoder = SSEDecoder()
+    assert decoder.feed(b'data: {"id": 7,\ndata:  "result": 1}\n: comment\n\n') == ['{"id": 7,\n "result": 1}']
+
+
+def test_crlf_line_endings():
+    body = sse_body(PROGRESS, RESPONSE, newline="\r\n")
+    # Split between the \r and the \n of a line ending
+    split = body.index(b"\r\n") + 1
+    assert read_jsonrpc_response([body[:split], body[split:]], 7, SSE) == RESPONSE
+
+
+def test_plain_json_body():
+    body = json.dumps(RESPONSE).encode()
+    assert read_jsonrpc_response(chunked(body, 5), 7, "application/json") == RESPONSE
+    assert read_jsonrpc_response([b"Bad Gateway"], 7, "text/html") == {"raw": "Bad Gateway"}
+
+
+def test_stream_ending_without_a_blank_line_still_yields_the_event():
+    body = sse_body(PROGRESS) + f"data: {json.dumps(RESPONSE)}".encode()
+    assert read_jsonrpc_response([body], 7, SSE) == RESPONSE
+
+
+def test_stream_ending_without_a_response():
+    assert read_jsonrpc_response([sse_body(PROGRESS)], 7, SSE) is None
+    # A response with another id is used when none carries the request id
+    other = dict(RESPONSE, id=99)
+    assert read_jsonrpc_response([sse_body(other)], 7, SSE) == other
+
+
+def test_reading_stops_at_the_matching_response():
+    def chunks():
+        yield sse_body(RESPONSE)
+        raise AssertionError("read past the response")
+
+    assert read_jsonrpc_response(chunks(), 7, SSE) == RESPONSE
+
+
+def test_async_reader():
+    async def chunks():
+        for chunk in chunked(sse_body(PROGRESS, RESPONSE), 10):
+            yield chunk
+
+    assert asyncio.run(read_jsonrpc_response_async(chunks(), 7, SSE)) == RESPONSE
+
+
+def test_oversized_messages_are_rejected():
+    with pytest.raises(ResponseTooLarge):
+        read_jsonrpc_response([b"data: " + b"x" * 200], 7, SSE, max_message_bytes=100)
+    with pytest.raises(ResponseTooLarge):
+        read_jsonrpc_response([b"{" * 200], 7, "application/json", max_message_bytes=100)
@@ -0,0 +1,102 @@
+import json
+import multiprocessing
+import threading
+
+import pytest
+
+from shared import state_store
+from shared.state_store import JsonFileStateStore, SQLiteStateStore, get_state_store
+
+BACKENDS = {"sqlite": ("shared_state.db", SQLiteStateStore), "json": ("shared_state.json", JsonFileStateStore)}
+
+
+def make_store(tmp_path, backend):
+    name, store_class = BACKENDS[backend]
+    return store_class(tmp_path / name)
+
+
+def increment(backend, path, count):
+    store = BACKENDS[backend][1](path)
+    for _ in range(count):
+        store.update_key("counter", lambda value: value + 1, 0)
+    store.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_update_touches_only_the_given_keys(tmp_path, backend):
+    store = make_store(tmp_path, backend)
+    store.update({"a": 1, "b": [1, 2]})
+    store.update({"b": {"nested": True}})
+    assert store.get_all() == {"a": 1, "b": {"nested": True}}
+    store.delete("a", "missing")
+    assert store.get("a", "default") == "default"
+    store.close()
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_concurrent_threads_lose_no_updates(tmp_path, backend):
+    store = make_store(tmp_path, backend)
+    threads = [threading.Thread(target=lambda: [store.update_key("counter", lambda v: v + 1, 0) for _ in range(50)])
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("counter") == 400
+    store.close()
+
+
+@pytest.mark.skipif("fork" not in multiprocessing.get_all_start_methods(), reason="needs fork")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_concurrent_processes_lose_no_updates(tmp_path, backend):
+    path = tmp_path / BACKENDS[backend][0]
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=increment, args=(backend, path, 25)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+    assert BACKENDS[backend][1](path).get("counter") == 100
+
+
+def test_sqlite_store_migrates_the_legacy_json_file(tmp_path, monkeypatch):
+    legacy = tmp_path / "shared_state.json"
+    legacy.write_text(json.dumps({"environment": "prod1", "last_errored_instance_ids": ["A1"]}))
+    monkeypatch.setattr(state_store, "LEGACY_STATE_PATH", legacy)
+    store = SQLiteStateStore(tmp_path / "shared_state.db")
+    assert store.get_all() == {"environment": "prod1", "last_errored_instance_ids": ["A1"]}
+    store.update({"environment": "qa3"})
+    store.close()
+    # Only an empty database is seeded
+    assert SQLiteStateStore(tmp_path / "shared_state.db").get("environment") == "qa3"
+
+
+@pytest.mark.parametrize("content", ["{not json", "[1, 2]", ""])
+def test_corrupt_legacy_file_is_ignored(tmp_path, monkeypatch, content):
+    legacy = tmp_path / "shared_state.json"
+    legacy.write_text(content)
+    monkeypatch.setattr(state_store, "LEGACY_STATE_PATH", legacy)
+    assert SQLiteStateStore(tmp_path / "shared_state.db").get_all() == {}
+
+
+def test_json_store_recovers_from_a_missing_or_corrupt_file(tmp_path):
+    store = JsonFileStateStore(tmp_path / "state" / "shared_state.json")
+    assert store.get_all() == {}
+    assert store.get("environment", "qa3") == "qa3"
+    store.path.parent.mkdir()
+    store.path.write_text("{truncated")
+    assert store.get_all() == {}
+    store.update_key("ids", lambda ids: ids + ["A1"], [])
+    assert json.loads(store.path.read_text()) == {"ids": ["A1"]}
+
+
+def test_backend_is_selected_from_the_environment(tmp_path, monkeypatch):
+    monkeypatch.setenv("AGENT_STATE_BACKEND", "json")
+    monkeypatch.setenv("AGENT_STATE_PATH", str(tmp_path / "state.json"))
+    store = get_state_store()
+    assert isinstance(store, JsonFileStateStore) and store is get_state_store()
+    monkeypatch.setattr(state_store, "_store", None)
+    monkeypatch.setenv("AGENT_STATE_BACKEND", "redis")
+    with pytest.raises(ValueError):
+        get_state_store()
@@ -0,0 +1,154 @@
+import asyncio
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from shared import tracing
+from shared.metrics import CallRecorder
+from shared.tracing import (
+    SPAN_KIND_CLIENT,
+    SPAN_KIND_INTERNAL,
+    STATUS_ERROR,
+    STATUS_OK,
+    FileSpanExporter,
+    start_span,
+    trace_headers,
+    traced,
+    with_current_context,
+)
+
+
+@pytest.fixture
+def exporter(monkeypatch, tmp_path):
+    monkeypatch.setenv("TRACING_ENABLED", "true")
+    monkeypatch.setenv("OTEL_SERVICE_NAME", "test-service")
+    exporter = FileSpanExporter(str(tmp_path / "traces.jsonl"), batch_size=1000, flush_interval=3600)
+    monkeypatch.setattr(tracing, "_exporter", exporter)
+    return exporter
+
+
+def exported(exporter):
+    """Flush and return the OTLP/JSON requests written, one per line."""
+    exporter.flush()
+    if not exporter.path.exists():
+        return []
+    return [json.loads(line) for line in exporter.path.read_text().splitlines()]
+
+
+def exported_spans(exporter):
+    return {span["name"]: span for request in exported(exporter)
+            for resource in request["resourceSpans"] for scope in resource["scopeSpans"] for span in scope["spans"]}
+
+
+def attributes(span):
+    return {attribute["key"]: attribute["value"] for attribute in span["attributes"]}
+
+
+def test_spans_are_written_as_otlp_json_lines(exporter):
+    span = start_span("step", attributes={"name": "x", "count": 3, "ratio": 0.5, "ok": True})
+    span.set_attribute("missing", None)
+    span.end()
+    span.end()
+
+    [request] = exported(exporter)
+    [resource] = request["resourceSpans"]
+    assert {"key": "service.name", "value": {"stringValue": "test-service"}} in resource["resource"]["attributes"]
+    [scope] = resource["scopeSpans"]
+    assert scope["scope"] == {"name": "oic-agentops.shared.tracing"}
+    [otlp] = scope["spans"]
+    assert re.fullmatch(r"[0-9a-f]{32}", otlp["traceId"]) and re.fullmatch(r"[0-9a-f]{16}", otlp["spanId"])
+    assert "parentSpanId" not in otlp
+    assert (otlp["name"], otlp["kind"], otlp["status"]) == ("step", SPAN_KIND_INTERNAL, {"code": STATUS_OK})
+    assert int(otlp["endTimeUnixNano"]) >= int(otlp["startTimeUnixNano"]) > 0
+    assert attributes(otlp) == {
+        "name": {"stringValue": "x"},
+        "count": {"intValue": "3"},
+        "ratio": {"doubleValue": 0.5},
+        "ok": {"boolValue": True},
+    }
+    assert exporter.exported == 1
+
+
+def test_mcp_call_span_is_a_child_of_the_tool_span(exporter):
+    @traced
+    def monitor_errors(environment="qa3"):
+        recorder = CallRecorder("monitoringErroredInstances", {"environment": environment})
+        headers = recorder.trace_headers()
+        recorder.finish({"items": []})
+        return headers
+
+    headers = monitor_errors(environment="prod1")
+    spans = exported_spans(exporter)
+    parent, child = spans["tool monitor_errors"], spans["mcp monitoringErroredInstances"]
+
+    assert child["traceId"] == parent["traceId"]
+    assert child["parentSpanId"] == parent["spanId"]
+    assert "parentSpanId" not in parent
+    assert child["kind"] == SPAN_KIND_CLIENT
+    assert headers == {"traceparent": f"00-{child['traceId']}-{child['spanId']}-01"}
+    assert attributes(parent)["tool.arg.environment"] == {"stringValue": "prod1"}
+    assert attributes(child)["oic.environment"] == {"stringValue": "prod1"}
+    assert tracing.current_span() is None
+
+
+def test_async_tool_spans_join_the_trace_from_worker_threads(exporter):
+    @traced
+    async def wait_for_recovery_jobs(jobIds=None):
+        def poll(job_id):
+            span = start_span(f"poll {job_id}")
+            span.end()
+            return span.parent_id
+
+        with ThreadPoolExecutor(2) as pool:
+            return list(pool.map(with_current_context(poll), jobIds))
+
+    parents = asyncio.run(wait_for_recovery_jobs(jobIds=["J1", "J2"]))
+    spans = exported_spans(exporter)
+    tool = spans["tool wait_for_recovery_jobs"]
+    assert parents == [tool["spanId"], tool["spanId"]]
+    assert {spans["poll J1"]["traceId"], spans["poll J2"]["traceId"]} == {tool["traceId"]}
+    assert attributes(tool)["tool.arg.jobIds.count"] == {"intValue": "2"}
+
+
+def test_failed_tools_set_the_error_status(exporter):
+    @traced
+    def resubmit_errors():
+        raise RuntimeError("server down")
+
+    @traced
+    def get_recovery_job_status():
+        return json.dumps({"isError": True, "error": "unknown job"})
+
+    with pytest.raises(RuntimeError):
+        resubmit_errors()
+    get_recovery_job_status()
+
+    spans = exported_spans(exporter)
+    raised, returned = spans["tool resubmit_errors"], spans["tool get_recovery_job_status"]
+    assert raised["status"] == {"code": STATUS_ERROR, "message": "server down"}
+    assert attributes(raised)["error.type"] == {"stringValue": "RuntimeError"}
+    assert returned["status"] == {"code": STATUS_ERROR, "message": "tool_error"}
+
+
+def test_a_full_batch_is_flushed_at_once(exporter):
+    exporter.batch_size = 2
+    for name in ("a", "b", "c"):
+        start_span(name).end()
+    assert [len(request["resourceSpans"][0]["scopeSpans"][0]["spans"]) for request
+            in map(json.loads, exporter.path.read_text().splitlines())] == [2]
+    assert [len(request["resourceSpans"][0]["scopeSpans"][0]["spans"]) for request in exported(exporter)] == [2, 1]
+
+
+def test_tracing_off_records_nothing(exporter, monkeypatch):
+    monkeypatch.setenv("TRACING_ENABLED", "false")
+
+    @traced
+    def monitor_errors():
+        return trace_headers()
+
+    assert start_span("step") is None
+    assert monitor_errors() == {}
+    assert CallRecorder("health").trace_headers() == {}
+    assert exported(exporter) == []
@@ -0,0 +1,130 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from shared.state_store import get_shared_state
+from shared.triage import ESCALATIONS_KEY, TriageRuleError, TriageRules, escalate, triage
+
+AGENTS_DIR = Path(__file__).resolve().parents[1]
+NOW = 1_700_000_000.0
+
+
+def _load(name):
+    return TriageRules(json.loads((AGENTS_DIR / name).read_text(encoding="utf-8")))
+
+
+def _item(**fields):
+    return dict({"id": "1", "integrationInstance": "INT_ORDER|01.00.0000", "recoverable": True}, **fields)
+
+
+def test_shipped_rules_never_discard():
+    spec = json.loads((AGENTS_DIR / "triage_rules.json").read_text(encoding="utf-8"))
+    assert spec["default"] != "discard"
+    assert all(rule["action"] != "discard" for rule in spec["rules"])
+
+
+def test_missing_recoverable_is_unknown():
+    rules = _load("triage_rules.json")
+    item = _item()
+    del item["recoverable"]
+    assert rules.classify_item(item, "qa3") == ("resubmit", None)
+    assert rules.classify_item(_item(recoverable=False), "qa3") == ("escalate", "not-recoverable")
+    assert rules.classify_item(_item(recoverable=None), "qa3") == ("resubmit", None)
+
+
+def test_recoverable_true_rule_skips_unknown():
+    rules = TriageRules({"default": "escalate", "rules": [
+        {"name": "ok", "match": {"recoverable": True}, "action": "resubmit"}
+    ]})
+    assert rules.classify_item(_item(), "qa3") == ("resubmit", "ok")
+    assert rules.classify_item({"id": "2"}, "qa3") == ("escalate", None)
+
+
+def test_unique_constraint_matches_ora_messages():
+    rules = _load("triage_rules.json")
+    item = _item(errorMessage="ORA-00001: unique constraint (APP.PK_ORDER) violated")
+    assert rules.classify_item(item, "qa3") == ("escalate", "unique-constraint")
+
+
+def test_prod_unauthorized_only_in_prod():
+    rules = _load("triage_rules.json")
+    item = _item(errorMessage="HTTP 401 Unauthorized from ERP")
+    assert rules.classify_item(item, "prod1") == ("escalate", "prod-unauthorized")
+    assert rules.classify_item(item, "qa3") == ("resubmit", None)
+    assert rules.classify_item(dict(item, environment="prod3"), "qa3") == ("escalate", "prod-unauthorized")
+
+
+def test_example_rules_discard_by_payload_and_age():
+    rules = _load("triage_rules.example.json")
+    payload = _item(errorMessage="Invalid payload: missing field orderId")
+    assert rules.classify_item(payload, "qa3", NOW) == ("discard", "invalid-payload")
+
+    hello = _item(integrationInstance="INT_HELLO_WORLD|01.00.0000")
+    old = dict(hello, creationDate="2023-11-12T00:00:00.000+0000")
+    new = dict(hello, creationDate="2023-11-14T21:00:00.000+0000")
+    assert rules.classify_item(old, "qa3", NOW) == ("discard", "stale-hello-world")
+    assert rules.classify_item(new, "qa3", NOW) == ("resubmit", None)
+    assert rules.classify_item(hello, "qa3", NOW) == ("resubmit", None)
+
+
+def test_first_matching_rule_wins_and_globs_match():
+    rules = TriageRules({"default": "resubmit", "rules": [
+        {"name": "first", "match": {"integration": "INT_*", "errorCode": "5??"}, "action": "escalate"},
+        {"name": "second", "match": {"integration": "INT_ORDER"}, "action": "discard"},
+    ]})
+    assert rules.classify_item(_item(errorCode="503"), "qa3") == ("escalate", "first")
+    assert rules.classify_item(_item(errorCode="404"), "qa3") == ("discard", "second")
+    assert rules.classify_item(_item(integrationInstance="OTHER|1"), "qa3") == ("resubmit", None)
+
+
+def test_fingerprint_hash_matches():
+    rules = TriageRules({"rules": [{"match": {"fingerprint": "Order <ID> not found"}, "action": "escalate"}]})
+    assert rules.classify_item(_item(errorMessage="Order ABC123 not found"), "qa3") == ("escalate", "rule-1")
+
+
+def test_classify_splits_items_and_counts_rules():
+    rules = _load("triage_rules.json")
+    items = [_item(id="1"), _item(id="2", recoverable=False), _item(id="3"), "junk"]
+    plan = rules.classify(items, "qa3", NOW)
+    assert [item["id"] for item in plan["resubmit"]] == ["1", "3"]
+    assert [item["id"] for item in plan["escalate"]] == ["2"]
+    assert plan["discard"] == []
+    assert plan["escalate"][0]["triageRule"] == "not-recoverable"
+    assert plan["ruleCounts"] == {"default": 2, "not-recoverable": 1}
+
+
+@pytest.mark.parametrize("spec", [
+    {"default": "delete"},
+    {"rules": [{"match": {}, "action": "retry"}]},
+    {"rules": [{"match": {"colour": "red"}, "action": "discard"}]},
+    {"rules": [{"match": {"fingerprint": "("}, "action": "discard"}]},
+])
+def test_invalid_rules_are_rejected(spec):
+    with pytest.raises(TriageRuleError):
+        TriageRules(spec)
+
+
+def test_load_falls_back_to_builtin_rules(tmp_path):
+    rules = TriageRules.load(str(tmp_path / "missing.json"))
+    assert rules.classify_item(_item(recoverable=False), "qa3") == ("escalate", "not-recoverable")
+
+
+def test_escalate_keeps_newest_entry_per_instance():
+    escalate("qa3", [_item(id="1", triageRule="a"), _item(id="2", triageRule="a")])
+    escalate("qa3", [_item(id="1", triageRule="b")])
+    entries = get_shared_state()[ESCALATIONS_KEY]
+    assert [(e["id"], e["rule"]) for e in entries] == [("1", "b"), ("2", "a")]
+
+
+def test_dry_run_sends_nothing():
+    class NoCalls:
+        def call_tool(self, *args, **kwargs):
+            raise AssertionError("dry run called the MCP server")
+
+    rules = _load("triage_rules.json")
+    result = triage(NoCalls(), "qa3", [_item(id="1"), _item(id="2", recoverable=False)], dry_run=True, rules=rules)
+    assert result["dryRun"] is True
+    assert result["counts"] == {"resubmit": 1, "discard": 0, "escalate": 1}
+    assert result["resubmitIds"] == ["1"]
+    assert ESCALATIONS_KEY not in get_shared_state()
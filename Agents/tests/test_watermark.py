@@ -0,0 +1,63 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from shared.watermark import Watermark, covering_duration, load_watermarks, reset_watermarks, save_watermark
+
+NOW = 1_700_000_000.0
+
+
+def _ts(epoch):
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000+0000")
+
+
+def _item(instance_id, created):
+    return {"id": instance_id, "creationDate": _ts(created)}
+
+
+@pytest.mark.parametrize("gap, duration", [
+    (60, "1h"), (3600, "1h"), (3601, "6h"), (86400, "1d"), (2.5 * 86400, "3d"), (4 * 86400, "RETENTIONPERIOD"),
+])
+def test_covering_duration(gap, duration):
+    assert covering_duration(gap) == duration
+
+
+def test_new_watermark_uses_the_initial_duration():
+    assert Watermark().duration(NOW, overlap=0, initial="6h") == "6h"
+
+
+def test_advance_drops_seen_instances():
+    watermark = Watermark()
+    first = watermark.advance([_item("a", NOW - 600), _item("b", NOW - 300)], NOW, overlap=120)
+    assert [item["id"] for item in first] == ["a", "b"]
+    assert watermark.creation_date == pytest.approx(NOW - 300)
+    assert watermark.polled_at == NOW
+
+    later = NOW + 60
+    second = watermark.advance([_item("a", NOW - 600), _item("b", NOW - 300), _item("c", NOW + 30)], later, overlap=120)
+    assert [item["id"] for item in second] == ["c"]
+    assert watermark.duration(later + 60, overlap=120) == "1h"
+    # Only instances inside the overlap are remembered by ID
+    assert set(watermark.recent_ids) == {"c"}
+
+
+def test_incomplete_poll_keeps_the_watermark():
+    watermark = Watermark(creation_date=NOW - 3600, polled_at=NOW - 3600)
+    new = watermark.advance([_item("x", NOW - 60), _item("y", NOW - 30)], NOW, overlap=0, complete=False)
+    assert [item["id"] for item in new] == ["x", "y"]
+    assert (watermark.creation_date, watermark.polled_at) == (NOW - 3600, NOW - 3600)
+    assert set(watermark.recent_ids) == {"x", "y"}
+
+    # The same window again: the returned instances are not reported twice, the missing one is
+    again = watermark.advance([_item("x", NOW - 60), _item("w", NOW - 1800)], NOW + 60, overlap=0)
+    assert [item["id"] for item in again] == ["w"]
+    assert watermark.polled_at == NOW + 60
+
+
+def test_watermarks_persist_per_environment():
+    save_watermark("qa3", Watermark(NOW, NOW, {"a": NOW}))
+    save_watermark("prod1", Watermark(NOW - 1, NOW - 1))
+    reset_watermarks("prod1")
+    stored = load_watermarks()
+    assert list(stored) == ["qa3"]
+    assert stored["qa3"].to_state() == {"creationDate": NOW, "polledAt": NOW, "recentIds": {"a": NOW}}
@@ -14,10 +14,17 @@ import { ToolContext } from "./tools/types.js";
 import * as Schemas from "./schemas.js";
 import { OicResponse } from "./types.js";
 
+// Responses of tool calls sent with an idempotency key (params._meta.idempotencyKey),
+// kept so that a client retrying a write after a lost response gets the first result
+// instead of running the write against OIC again
+const IDEMPOTENCY_TTL_MS = 10 * 60 * 1000;
+const IDEMPOTENCY_MAX_ENTRIES = 1000;
+
 class OicMonitorServer {
     private server: Server;
     private tokenManagers: Map<string, TokenManager>;
     private app: express.Application;
+    private idempotentResponses: Map<string, { expiresAt: number; response: Promise<any> }> = new Map();
 
     constructor() {
         // Use a map to store token managers per environment
@@ -154,79 +161,118 @@ class OicMonitorServer {
         }));
 
         this.server.setRequestHandler(CallToolRequestSchema, async (request) => {
-            const { name, arguments: args } = request.params;
-            const params = args as any || {};
+            const idempotencyKey = (request.params as any)._meta?.idempotencyKey;
+            if (typeof idempotencyKey === 'string' && idempotencyKey) {
+                return this.runIdempotent(idempotencyKey, () => this.callTool(request));
+            }
+            return this.callTool(request);
+        });
+    }
 
-            const tool = getToolByName(name);
-            if (!tool) {
-                throw new Error(`Unknown tool: ${name}`);
+    private async runIdempotent(key: string, run: () => Promise<any>): Promise<any> {
+        // Entries are inserted in expiry order, so expired ones are at the front
+        const now = Date.now();
+        for (const [entryKey, entry] of this.idempotentResponses) {
+            if (entry.expiresAt > now && this.idempotentResponses.size <= IDEMPOTENCY_MAX_ENTRIES) {
+                break;
             }
+            this.idempotentResponses.delete(entryKey);
+        }
 
-            // Determine environment from params if available (for tools that support it)
-            const environment = (params as any)?.environment || 'dev';
-            const envConfig = (params as any)?.environment ? getConfigForEnvironment(environment) : CONFIG;
-            
-            const context: ToolContext = {
-                defaultConfig: CONFIG,
-                getAccessToken: this.getAccessToken.bind(this),
-                fetchWithPagination: this.fetchWithPagination.bind(this),
-                fetchSingle: this.fetchSingle.bind(this),
-            };
+        const existing = this.idempotentResponses.get(key);
+        if (existing) {
+            console.log(`↩️  Replaying response for idempotency key ${key}`);
+            return existing.response;
+        }
 
-            try {
-                const results = await tool.execute(context, params);
-
-                let responseData = results;
-                if (results && results.items !== undefined) {
-                    responseData = results;
-                } else if (results && Array.isArray(results)) {
-                    responseData = { items: results };
-                } else if (results && results.items === undefined) {
-                    responseData = results;
-                }
+        const response = run();
+        this.idempotentResponses.set(key, { expiresAt: now + IDEMPOTENCY_TTL_MS, response });
+        try {
+            const result = await response;
+            if (result?.isError) {
+                // Failed calls are not replayed, so a retry runs again
+                this.idempotentResponses.delete(key);
+            }
+            return result;
+        } catch (error) {
+            this.idempotentResponses.delete(key);
+            throw error;
+        }
+    }
 
-                return {
-                    content: [
-                        {
-                            type: "text",
-                            text: JSON.stringify(responseData, null, 2),
-                        },
-                    ],
-                };
-            } catch (error: any) {
-                let errorMessage = `Error executing ${name}: ${error.message}`;
-
-                if (error.response) {
-                    const status = error.response.status;
-                    const statusText = error.response.statusText;
-                    const data = error.response.data;
-
-                    if (status === 401) {
-                        errorMessage = `Authentication failed (401): The access token may be invalid or expired. Please check your OIC credentials.`;
-                    } else if (status === 403) {
-                        errorMessage = `Authorization failed (403): You don't have permission to access this resource.`;
-                    } else if (status === 404) {
-                        errorMessage = `Resource not found (404): The requested endpoint does not exist.`;
-                    } else {
-                        errorMessage = `Error executing ${name}: ${status} ${statusText}${data ? ` - ${JSON.stringify(data)}` : ''}`;
-                    }
-                } else if (error.request) {
-                    errorMessage = `Network error: Unable to reach the API server. Please check your network connection and API base URL.`;
-                }
+    private async callTool(request: any): Promise<any> {
+        const { name, arguments: args } = request.params;
+        const params = args as any || {};
 
-                console.error(`Error in ${name}:`, errorMessage);
+        const tool = getToolByName(name);
+        if (!tool) {
+            throw new Error(`Unknown tool: ${name}`);
+        }
 
-                return {
-                    content: [
-                        {
-                            type: "text",
-                            text: errorMessage,
-                        },
-                    ],
-                    isError: true,
-                };
+        // Determine environment from params if available (for tools that support it)
+        const environment = (params as any)?.environment || 'dev';
+        const envConfig = (params as any)?.environment ? getConfigForEnvironment(environment) : CONFIG;
+        
+        const context: ToolContext = {
+            defaultConfig: CONFIG,
+            getAccessToken: this.getAccessToken.bind(this),
+            fetchWithPagination: this.fetchWithPagination.bind(this),
+            fetchSingle: this.fetchSingle.bind(this),
+        };
+
+        try {
+            const results = await tool.execute(context, params);
+
+            let responseData = results;
+            if (results && results.items !== undefined) {
+                responseData = results;
+            } else if (results && Array.isArray(results)) {
+                responseData = { items: results };
+            } else if (results && results.items === undefined) {
+                responseData = results;
             }
-        });
+
+            return {
+                content: [
+                    {
+                        type: "text",
+                        text: JSON.stringify(responseData, null, 2),
+                    },
+                ],
+            };
+        } catch (error: any) {
+            let errorMessage = `Error executing ${name}: ${error.message}`;
+
+            if (error.response) {
+                const status = error.response.status;
+                const statusText = error.response.statusText;
+                const data = error.response.data;
+
+                if (status === 401) {
+                    errorMessage = `Authentication failed (401): The access token may be invalid or expired. Please check your OIC credentials.`;
+                } else if (status === 403) {
+                    errorMessage = `Authorization failed (403): You don't have permission to access this resource.`;
+                } else if (status === 404) {
+                    errorMessage = `Resource not found (404): The requested endpoint does not exist.`;
+                } else {
+                    errorMessage = `Error executing ${name}: ${status} ${statusText}${data ? ` - ${JSON.stringify(data)}` : ''}`;
+                }
+            } else if (error.request) {
+                errorMessage = `Network error: Unable to reach the API server. Please check your network connection and API base URL.`;
+            }
+
+            console.error(`Error in ${name}:`, errorMessage);
+
+            return {
+                content: [
+                    {
+                        type: "text",
+                        text: errorMessage,
+                    },
+                ],
+                isError: true,
+            };
+        }
     }
 
     private async fetchSingle(url: string, token: string, params: any, retryOn401: boolean = true, environment: string = 'dev', envConfig?: any): Promise<any> {
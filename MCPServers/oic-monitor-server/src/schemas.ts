@@ -262,7 +262,12 @@ export const monitoringDiscardErroredInstanceSchema = {
 export const monitoringDiscardErroredInstancesSchema = {
     type: "object",
     properties: {
-        ...commonListSchema
+        ...commonListSchema,
+        instanceIds: {
+            type: "array",
+            items: { type: "string" },
+            description: "Array of instance IDs to discard (max 50). When given, only these instances are discarded and q is ignored."
+        }
     },
     required: ["environment"]
 };
@@ -6,7 +6,7 @@ import { ToolDefinition, ToolContext } from "./types.js";
 
 export const monitoringDiscardErroredInstancesTool: ToolDefinition = {
     name: "monitoringDiscardErroredInstances",
-    description: "Discard multiple errored integration instances using filter criteria.",
+    description: "Discard multiple errored integration instances, either an array of instance ID strings (max 50) or all instances matching filter criteria.",
     schema: monitoringDiscardErroredInstancesSchema,
     execute: async (context: ToolContext, params: any) => {
         if (!params.environment) {
@@ -16,6 +16,34 @@ export const monitoringDiscardErroredInstancesTool: ToolDefinition = {
         const environment = params.environment;
         const envConfig = getConfigForEnvironment(environment);
         const token = await context.getAccessToken(envConfig, false, environment);
+
+        if (params.instanceIds && params.instanceIds.length > 0) {
+            const instanceIds: string[] = params.instanceIds.map((id: any) => String(id));
+
+            if (instanceIds.length > 50) {
+                throw new Error(`Maximum 50 instanceIds allowed per request. Received: ${instanceIds.length}`);
+            }
+
+            console.log(`[Discard] Bulk discarding ${instanceIds.length} instances in ${environment}`);
+
+            // Request body: {"ids": ["id1", "id2", ...]}
+            const response = await axios.post(
+                `${envConfig.apiBaseUrl}/ic/api/integration/v1/monitoring/errors/discard`,
+                { ids: instanceIds },
+                {
+                    headers: {
+                        Authorization: `Bearer ${token}`,
+                        'Content-Type': 'application/json'
+                    },
+                    params: {
+                        integrationInstance: envConfig.integrationInstance,
+                        return: "monitoringui"
+                    },
+                }
+            );
+
+            return response.data;
+        }
         
         const requestParams = {
             ...params,